@@ -8,14 +8,12 @@ import tqdm
 import threading
 import fire
 import datetime
-from nltk.tokenize import wordpunct_tokenize
-from nltk.stem import PorterStemmer
-from typing import List, Tuple, Any, Dict, Set, Optional
+import time
+from typing import Callable, List, Tuple, Any, Dict, Set, Optional
 import dateutil.parser
 from github import (
-    Repository,
-    UnknownObjectException,
     GithubException,
+    Repository,
     PullRequest,
     PaginatedList,
 )
@@ -29,7 +27,15 @@ from gitbugactions.actions.actions import (
 from gitbugactions.actions.workflow import GitHubWorkflow, GitHubWorkflowFactory
 from gitbugactions.actions.action import Action
 from gitbugactions.test_executor import TestExecutor
+from gitbugactions.actions.run_cache import ActRunCache
+from gitbugactions.git.worktree import WorktreeManager
 from gitbugactions.github_api import GithubAPI
+from gitbugactions.distributed import (
+    LocalJobQueue,
+    JobQueueServer,
+    parse_address,
+    get_authkey,
+)
 from gitbugactions.util import (
     get_default_github_actions,
     clone_repo,
@@ -39,7 +45,13 @@ from gitbugactions.util import (
 from gitbugactions.collect_bugs.collection_strategies import *
 from gitbugactions.collect_bugs.test_config import TestConfig
 from gitbugactions.collect_bugs.bug_patch import BugPatch
+from gitbugactions.collect_bugs.journal import CollectionJournal, RepoStatus
+from gitbugactions.collect_bugs.commit_index import CommitIndex
+from gitbugactions.collect_bugs.bug_fix_classifier import BugFixClassifier
+from gitbugactions.collect_bugs.issue_fetcher import IssueFetcher
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from contextlib import nullcontext
 
 
 class PatchCollector:
@@ -50,13 +62,19 @@ class PatchCollector:
         self.language = repo.language.strip().lower()
         self.cloned = False
         self.clone_lock = threading.Lock()
+        # Commit at the head of the clone
+        self.head: Optional[str] = None
         self.default_github_actions = None
+        self.test_states_lock = threading.Lock()
+        self.test_states: Dict[Tuple[str, ...], Future] = {}
         self.filter_on_commit_message = kwargs.get("filter_on_commit_message", True)
         self.filter_on_commit_time_start = kwargs.get(
             "filter_on_commit_time_start", None
         )
         self.filter_on_commit_time_end = kwargs.get("filter_on_commit_time_end", None)
         self.pull_requests = kwargs.get("pull_requests", False)
+        self.bug_fix_classifier = BugFixClassifier()
+        self.workflow_actions: Dict[str, Set[Action]] = {}
 
     def __clone_repo(self):
         # Too many repos cloning at the same time lead to errors
@@ -83,13 +101,21 @@ class PatchCollector:
                 self.first_commit = self.repo_clone.revparse_single(
                     str(self.repo_clone.head.target)
                 )
+                self.head = str(self.first_commit.id)
+                self.worktrees = WorktreeManager(self.repo_clone)
                 self.cloned = True
 
+    def get_remote_head(self) -> Optional[str]:
+        """
+        Returns the commit at the head of the default branch of the repo on GitHub
+        """
+        try:
+            return self.repo.get_branch(self.repo.default_branch).commit.sha
+        except GithubException:
+            return None
+
     def __is_bug_fix(self, commit: pygit2.Commit):
-        tokens = wordpunct_tokenize(commit.message)
-        stemmer = PorterStemmer()
-        tokens = [stemmer.stem(token) for token in tokens]
-        return "fix" in tokens
+        return self.bug_fix_classifier.is_bug_fix(commit.message)
 
     def __get_patches(self, repo_clone, commit, previous_commit):
         diff = repo_clone.diff(str(previous_commit.id), str(commit.id))
@@ -115,60 +141,95 @@ class PatchCollector:
 
         return bug_patch, test_patch, non_code_patch
 
-    def __cleanup_repo(
-        self, repo_clone: pygit2.Repository, repo_path: str, commit: pygit2.Commit
-    ):
+    def __run_test_state(
+        self,
+        state: Tuple[str, ...],
+        run: Callable[[], Optional[List[ActTestsRun]]],
+    ) -> Optional[List[ActTestsRun]]:
         """
-        Cleanups up repository dir for any untracked or modified files
+        Runs each test state of the repo only once. The bug patches that test the
+        same state (e.g. patches with the same previous commit) share its runs. A
+        failed run is not shared with the next bug patches, which run it again.
         """
-        repo_clone.reset(commit.id, pygit2.GIT_RESET_HARD)
-        subprocess.run(
-            ["git", "clean", "-f", "-d", "-x"], cwd=repo_path, capture_output=True
-        )
+        with self.test_states_lock:
+            future = self.test_states.get(state)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.test_states[state] = future
+
+        if owner:
+            try:
+                future.set_result(run())
+            except Exception as e:
+                with self.test_states_lock:
+                    if self.test_states.get(state) is future:
+                        del self.test_states[state]
+                future.set_exception(e)
+        return future.result()
 
     def __test_patch(
         self,
         bug: BugPatch,
-        act_cache_dir: str,
+        docker_sem: Optional[threading.Semaphore],
     ) -> List[Optional[List[ActTestsRun]]]:
         test_patch_runs = [None, None, None]
         self.__clone_repo()
 
-        new_repo_path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
-        shutil.copytree(self.repo_clone.workdir, new_repo_path, symlinks=True)
-        repo_clone = pygit2.Repository(os.path.join(new_repo_path, ".git"))
-
-        try:
+        # The clone may have been moved by get_default_github_actions
+        with self.worktrees.checkout(bug.previous_commit) as repo_clone:
+            # The act cache dir is only acquired while act runs
             executor = TestExecutor(
                 repo_clone,
                 self.language,
-                act_cache_dir,
+                None,
                 self.default_github_actions,
             )
+
+            def run_act(
+                test_fn: Callable[[TestExecutor], Optional[List[ActTestsRun]]]
+            ) -> Optional[List[ActTestsRun]]:
+                # Only the thread that runs a test state holds a docker worker. The
+                # threads waiting for a shared test state do not.
+                with docker_sem if docker_sem is not None else nullcontext():
+                    act_cache_dir = ActCacheDirManager.acquire_act_cache_dir()
+                    executor.act_cache_dir = act_cache_dir
+                    try:
+                        return test_fn(executor)
+                    finally:
+                        ActCacheDirManager.return_act_cache_dir(act_cache_dir)
+
             all_runs_crashed = lambda x: x is None or all(
                 map(lambda act_run: act_run.failed, x)
             )
 
+            test_states = bug.get_test_states()
+
             # Previous commit
-            act_runs = bug.test_previous_commit(executor)
+            act_runs = self.__run_test_state(
+                test_states[0], lambda: run_act(bug.test_previous_commit)
+            )
             if all_runs_crashed(act_runs):
                 return test_patch_runs
             test_patch_runs[0] = act_runs
 
             # Previous commit with diff
             if len(bug.test_patch) > 0:
-                act_runs = bug.test_previous_commit_with_diff(executor)
+                act_runs = self.__run_test_state(
+                    test_states[1],
+                    lambda: run_act(bug.test_previous_commit_with_diff),
+                )
                 if all_runs_crashed(act_runs):
                     return test_patch_runs
                 test_patch_runs[1] = act_runs
 
             # Current commit
-            act_runs = bug.test_current_commit(executor)
+            act_runs = self.__run_test_state(
+                test_states[2], lambda: run_act(bug.test_current_commit)
+            )
             if all_runs_crashed(act_runs):
                 return test_patch_runs
             test_patch_runs[2] = act_runs
-        finally:
-            delete_repo_clone(repo_clone)
 
         return test_patch_runs
 
@@ -177,105 +238,91 @@ class PatchCollector:
 
         commit = self.repo_clone.revparse_single(commit_hex)
         matches = re.findall("#[0-9]+", commit.message)
-        issues = []
-
-        if len(matches) > 0:
-            github = GithubAPI()
-            # We need to get the repo again to use the current token
-            repo = github.get_repo(self.repo.full_name)
-        else:
+        if len(matches) == 0:
             return []
 
-        for match in matches:
-            match_id = int(match[1:])
-            try:
-                # GitHub's REST API considers every pull request an issue
-                # https://docs.github.com/en/rest/issues/issues?apiVersion=2022-11-28#get-an-issue
-                issue = repo.get_issue(match_id)
-                is_pull_request = issue.pull_request is not None
-                comments, labels, review_comments = [], [], None
-
-                if is_pull_request:
-                    review_comments = []
-                    pull_request = issue.as_pull_request()
-                    for comment in pull_request.get_review_comments():
-                        review_comments.append(comment.body)
-
-                for comment in issue.get_comments():
-                    comments.append(comment.body)
-
-                for label in issue.get_labels():
-                    labels.append(
-                        {"name": label.name, "description": label.description}
-                    )
+        # A new client is created to use the current token
+        fetcher = IssueFetcher(GithubAPI(), self.repo.full_name)
+        numbers = [int(match[1:]) for match in matches]
+        issues = fetcher.fetch(numbers)
+        return [issues[number] for number in numbers if number in issues]
 
-                issues.append(
-                    {
-                        "id": match_id,
-                        "title": issue.title,
-                        "body": issue.body,
-                        "comments": comments,
-                        "labels": labels,
-                        "is_pull_request": is_pull_request,
-                        "review_comments": review_comments,
-                    }
+    def __get_workflow_actions(self, blob: pygit2.Blob) -> Set[Action]:
+        """
+        Get the actions used by a workflow file. The result is memoized by the
+        blob id, since most commits share unchanged workflow files.
+        """
+        blob_id = str(blob.id)
+        if blob_id not in self.workflow_actions:
+            actions: Set[Action] = set()
+            try:
+                workflow: GitHubWorkflow = GitHubWorkflowFactory.create_workflow(
+                    "", self.language, content=blob.data.decode("utf-8")
                 )
-            except (UnknownObjectException, GithubException):
-                continue
-
-        return issues
+                actions.update(workflow.get_actions())
+            except Exception:
+                pass
+            self.workflow_actions[blob_id] = actions
+        return self.workflow_actions[blob_id]
 
     def __get_used_actions(self, commit: str) -> Set[Action]:
         """
         Get the actions used by the workflows declared in the commit version.
-        Use git show to avoid checking out the whole version
+        The workflows are read from the object database to avoid checking out
+        the whole version
         """
         actions: Set[Action] = set()
 
         # Search for workflows in the commit version
-        run = subprocess.run(
-            f"git show {commit}:.github/workflows",
-            cwd=self.repo_clone.workdir,
-            shell=True,
-            capture_output=True,
-        )
-
-        # If the folder does not exist, there are no workflows
-        if run.returncode != 0:
+        git_commit = self.repo_clone.get(commit)
+        if git_commit is None:
+            return actions
+        try:
+            workflows = git_commit.peel(pygit2.Tree) / ".github" / "workflows"
+        except KeyError:
+            # If the folder does not exist, there are no workflows
+            return actions
+        if not isinstance(workflows, pygit2.Tree):
             return actions
-
-        # Get the workflows paths
-        workflow_paths = run.stdout.decode("utf-8").split("\n")
 
         # Get the actions used by each workflow
-        for workflow_path in workflow_paths:
-            # Skip empty lines and non yaml files
-            if workflow_path == "" or not (
-                workflow_path.endswith(".yml") or workflow_path.endswith(".yaml")
+        for entry in workflows:
+            # Skip non yaml files
+            if not isinstance(entry, pygit2.Blob) or not (
+                entry.name.endswith(".yml") or entry.name.endswith(".yaml")
             ):
                 continue
-
-            # Read the workflow file
-            run = subprocess.run(
-                f"git show {commit}:.github/workflows/{workflow_path}",
-                cwd=self.repo_clone.workdir,
-                shell=True,
-                capture_output=True,
-            )
-            if run.returncode != 0:
-                continue
-
-            # Get the actions used by the workflow
-            try:
-                workflow: GitHubWorkflow = GitHubWorkflowFactory.create_workflow(
-                    "", self.language, content=run.stdout.decode("utf-8")
-                )
-                actions.update(workflow.get_actions())
-            except Exception:
-                continue
+            actions.update(self.__get_workflow_actions(entry))
 
         return actions
 
+    def __classify_commits(
+        self, commit_index: CommitIndex, commits: List[pygit2.Commit]
+    ):
+        # Classifies in bulk the commits that are not in the index yet
+        commits = [
+            commit
+            for commit in commits
+            if commit_index.get_is_bug_fix(str(commit.id)) is None
+        ]
+        classifications = self.bug_fix_classifier.classify(
+            commit.message for commit in commits
+        )
+        for commit, is_bug_fix in zip(commits, classifications):
+            commit_index.set_is_bug_fix(str(commit.id), is_bug_fix)
+
+    def __get_indexed_used_actions(
+        self, commit_index: CommitIndex, commit: str
+    ) -> Set[Action]:
+        actions = commit_index.get_actions(commit)
+        if actions is None:
+            used_actions = self.__get_used_actions(commit)
+            commit_index.set_actions(
+                commit, [action.declaration for action in used_actions]
+            )
+            return used_actions
+        return set(map(Action, actions))
+
     def get_possible_patches(self):
         self.__clone_repo()
         if len(list(self.repo_clone.references.iterator())) == 0:
@@ -283,6 +330,8 @@ class PatchCollector:
 
         commit_to_patches: Dict[str, List[BugPatch]] = {}
         commits = list(self.repo_clone.walk(self.repo_clone.head.target))
+        # The commits mined by previous runs are loaded from the index
+        commit_index = CommitIndex(self.repo.full_name)
 
         try:
             if self.pull_requests:
@@ -292,8 +341,13 @@ class PatchCollector:
                     for pull_commit in pull_commits:
                         commits.append(self.repo_clone.get(pull_commit.sha))
 
+            if self.filter_on_commit_message:
+                self.__classify_commits(commit_index, commits)
+
             for commit in commits:
-                if self.filter_on_commit_message and not self.__is_bug_fix(commit):
+                if self.filter_on_commit_message and not commit_index.get_is_bug_fix(
+                    str(commit.id)
+                ):
                     continue
 
                 commit_time = datetime.datetime.fromtimestamp(
@@ -319,18 +373,34 @@ class PatchCollector:
                     # The current commit is the first one
                     continue
 
-                bug_patch, test_patch, non_code_patch = self.__get_patches(
-                    self.repo_clone, commit, previous_commit
-                )
-                if len(bug_patch) == 0 and len(non_code_patch) == 0:
+                # The patches of the indexed commits are only parsed if the commit
+                # has a bug patch
+                patches = None
+                patch_sizes = commit_index.get_patch_sizes(str(commit.id))
+                if patch_sizes is None:
+                    patches = self.__get_patches(
+                        self.repo_clone, commit, previous_commit
+                    )
+                    commit_index.set_patches(str(commit.id), *patches)
+                    patch_sizes = tuple(map(len, patches))
+                if patch_sizes[0] == 0 and patch_sizes[2] == 0:
                     logging.info(
                         f"Skipping commit {self.repo.full_name} {str(commit.id)}: no bug patch"
                     )
                     continue
+                if patches is None:
+                    patches = commit_index.get_patches(str(commit.id))
+                bug_patch, test_patch, non_code_patch = patches
 
                 actions: Set[Action] = set()
-                actions.update(self.__get_used_actions(str(commit.id)))
-                actions.update(self.__get_used_actions(str(previous_commit.id)))
+                actions.update(
+                    self.__get_indexed_used_actions(commit_index, str(commit.id))
+                )
+                actions.update(
+                    self.__get_indexed_used_actions(
+                        commit_index, str(previous_commit.id)
+                    )
+                )
 
                 if str(previous_commit.id) in commit_to_patches:
                     commit_to_patches[str(previous_commit.id)].append(
@@ -356,10 +426,8 @@ class PatchCollector:
                             actions,
                         )
                     ]
-                self.__cleanup_repo(
-                    self.repo_clone, self.repo_clone.workdir, self.first_commit
-                )
         finally:
+            commit_index.close()
             self.repo_clone.reset(self.first_commit.id, pygit2.GIT_RESET_HARD)
 
         # We remove the merges since when multiple bug patches point to the same
@@ -391,24 +459,23 @@ class PatchCollector:
             self.repo_clone, self.first_commit, self.language
         )
 
-    def test_patch(self, bug_patch: BugPatch):
-        act_cache_dir = ActCacheDirManager.acquire_act_cache_dir()
-
-        try:
-            test_patch_runs = self.__test_patch(
-                bug_patch,
-                act_cache_dir,
-            )
-            bug_patch.actions_runs = test_patch_runs
-            strategy = PatchCollector.check_runs(bug_patch)
-            if strategy is None:
-                return False
-            else:
-                bug_patch.strategy_used = strategy
-                bug_patch.issues = self.__get_related_commit_info(bug_patch.commit)
-                return True
-        finally:
-            ActCacheDirManager.return_act_cache_dir(act_cache_dir)
+    def test_patch(
+        self, bug_patch: BugPatch, docker_sem: Optional[threading.Semaphore] = None
+    ):
+        """
+        Args:
+            docker_sem (Optional[threading.Semaphore]): If set, limits the number of
+                                                        concurrent act runs.
+        """
+        test_patch_runs = self.__test_patch(bug_patch, docker_sem)
+        bug_patch.actions_runs = test_patch_runs
+        strategy = PatchCollector.check_runs(bug_patch)
+        if strategy is None:
+            return False
+        else:
+            bug_patch.strategy_used = strategy
+            bug_patch.issues = self.__get_related_commit_info(bug_patch.commit)
+            return True
 
     @staticmethod
     def check_runs(bug_patch) -> Optional[str]:
@@ -420,8 +487,11 @@ class PatchCollector:
 
     def delete_repo(self):
         if self.cloned:
+            self.worktrees.cleanup()
             delete_repo_clone(self.repo_clone)
         self.cloned = False
+        with self.test_states_lock:
+            self.test_states.clear()
 
 
 def set_test_config(
@@ -442,6 +512,525 @@ def set_test_config(
         )
 
 
+class PatchTestJobHandler:
+    """
+    Tests the patches dispatched as jobs by a collect_bugs coordinator.
+    The clone and the default actions of each repo are reused across jobs. The
+    clones of the least recently used repos without running jobs are deleted
+    once more than MAX_REPOS repos are kept.
+    """
+
+    MAX_REPOS = 8
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configured = False
+        # Ordered from the least to the most recently used repo
+        self.patch_collectors: OrderedDict[str, PatchCollector] = OrderedDict()
+        self.repo_locks: Dict[str, threading.Lock] = {}
+        # Repos whose default actions were searched (they may not have any)
+        self.default_actions_set: Set[str] = set()
+        self.running_jobs: Dict[str, int] = {}
+        self.cached_actions: Set[Action] = set()
+
+    def __configure(self, config: Dict):
+        with self.lock:
+            if self.configured:
+                return
+            set_test_config(
+                config["normalize_non_code_patch"], tuple(config["strategies"])
+            )
+            Act.set_memory_limit(config["memory_limit"])
+            self.configured = True
+
+    def __acquire_patch_collector(self, repo_name: str) -> PatchCollector:
+        with self.lock:
+            # The repo is not evicted while it has running jobs
+            self.running_jobs[repo_name] = self.running_jobs.get(repo_name, 0) + 1
+            if repo_name not in self.patch_collectors:
+                github = GithubAPI()
+                self.patch_collectors[repo_name] = PatchCollector(
+                    github.get_repo(repo_name)
+                )
+                self.repo_locks[repo_name] = threading.Lock()
+            self.patch_collectors.move_to_end(repo_name)
+            patch_collector = self.patch_collectors[repo_name]
+            repo_lock = self.repo_locks[repo_name]
+
+        with repo_lock:
+            if repo_name not in self.default_actions_set:
+                # The patches are tested without default actions, as in the local
+                # pipeline, instead of searching for them again in every job
+                try:
+                    patch_collector.set_default_github_actions()
+                except Exception:
+                    logging.error(
+                        f"Error while setting default github actions from {repo_name}: {traceback.format_exc()}"
+                    )
+                self.default_actions_set.add(repo_name)
+        return patch_collector
+
+    def __release_patch_collector(self, repo_name: str):
+        evicted: List[PatchCollector] = []
+        with self.lock:
+            self.running_jobs[repo_name] -= 1
+            if self.running_jobs[repo_name] == 0:
+                del self.running_jobs[repo_name]
+
+            idle_repos = [
+                name for name in self.patch_collectors if name not in self.running_jobs
+            ]
+            n_evicted = len(self.patch_collectors) - PatchTestJobHandler.MAX_REPOS
+            for name in idle_repos[: max(n_evicted, 0)]:
+                evicted.append(self.patch_collectors.pop(name))
+                del self.repo_locks[name]
+                self.default_actions_set.discard(name)
+
+        for patch_collector in evicted:
+            patch_collector.delete_repo()
+
+    def __cache_actions(self, actions: Set[Action]):
+        with self.lock:
+            actions = actions - self.cached_actions
+            self.cached_actions.update(actions)
+        for action in actions:
+            ActCacheDirManager.cache_action(action)
+
+    def __call__(self, job: Dict) -> Dict:
+        self.__configure(job["config"])
+        repo_name = job["bug"]["repository"]
+        try:
+            patch_collector = self.__acquire_patch_collector(repo_name)
+            bug_patch = BugPatch.from_dict(job["bug"], patch_collector.repo_clone)
+            bug_patch.actions = set(map(Action, job["actions"]))
+            self.__cache_actions(bug_patch.actions)
+
+            is_bug_patch = patch_collector.test_patch(bug_patch)
+            return {
+                "is_bug_patch": is_bug_patch,
+                "data": bug_patch.get_data() if is_bug_patch else None,
+                "runs": CollectionJournal.summarize_runs(bug_patch.actions_runs),
+            }
+        finally:
+            self.__release_patch_collector(repo_name)
+
+    def cleanup(self):
+        for patch_collector in self.patch_collectors.values():
+            patch_collector.delete_repo()
+
+
+class CollectionPipeline:
+    """
+    Each repository flows independently through the stages of the collection:
+    clone and patch mining -> action caching -> default actions discovery ->
+    patch testing. The patches of a repository start being tested as soon as
+    the repository is ready, instead of waiting for every other repository.
+    """
+
+    # Seconds between the writes of data.json while repositories are collected
+    SAVE_DATA_INTERVAL = 60
+
+    def __init__(
+        self,
+        results_path: str,
+        n_workers: int,
+        journal: CollectionJournal = None,
+        job_queue: LocalJobQueue = None,
+        job_config: Dict = None,
+    ):
+        """
+        Args:
+            job_queue (LocalJobQueue, optional): If set, the patches are not tested locally.
+                                                 Instead, they are dispatched as jobs to the
+                                                 workers of the queue (see PatchTestJobHandler).
+            job_config (Dict, optional): Configuration sent to the workers with each job.
+        """
+        self.results_path = results_path
+        self.journal = journal
+        self.job_queue = job_queue
+        self.job_config = job_config
+        # Per-stage concurrency limits
+        self.repo_executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.action_executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.test_executor = ThreadPoolExecutor(max_workers=n_workers)
+        # Every stage that runs act shares the same docker workers (and act cache dirs)
+        self.docker_sem = threading.Semaphore(n_workers)
+
+        self.actions_lock = threading.Lock()
+        self.cached_actions: Dict[Action, Future] = {}
+        self.results_lock = threading.Lock()
+        self.repos: Dict[str, Dict] = {}
+        data_path = os.path.join(self.results_path, "data.json")
+        if self.journal is not None and os.path.exists(data_path):
+            # Keep the data of the repos collected by previous runs
+            with open(data_path, "r") as fp:
+                self.repos = json.loads(fp.read())
+        self.repos_saved_at = time.monotonic()
+        self.test_futures_lock = threading.Lock()
+        self.test_futures: List[Future] = []
+        # Number of patches of each repo still being tested
+        self.remaining_patches: Dict[str, int] = {}
+        # Jobs dispatched to the workers whose result was not received yet
+        self.pending_jobs: Dict[str, Tuple[PatchCollector, BugPatch]] = {}
+        self.submitted_jobs = 0
+        # Repo which tests the bug patches with each digest. Only the digests are
+        # kept, not the patches.
+        self.digests_lock = threading.Lock()
+        self.patch_digests: Dict[str, str] = {}
+
+    def __cache_actions(self, actions: Set[Action]):
+        futures: List[Future] = []
+        with self.actions_lock:
+            for action in actions:
+                if action not in self.cached_actions:
+                    self.cached_actions[action] = self.action_executor.submit(
+                        ActCacheDirManager.cache_action, action
+                    )
+                futures.append(self.cached_actions[action])
+
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                logging.error(
+                    f"Error while downloading action: {traceback.format_exc()}"
+                )
+
+    def __save_repo_data(self, patch_collector: PatchCollector, n_bug_patches: int):
+        repo = patch_collector.repo
+        repo_data = {
+            "clone_url": repo.clone_url,
+            "commits": repo.get_commits().totalCount,
+            "possible_bug_patches": n_bug_patches,
+            "stars": repo.stargazers_count,
+            "size": repo.size,
+        }
+
+        with self.results_lock:
+            self.repos[repo.full_name] = repo_data
+            # Rewriting the whole file after every repo would be quadratic
+            if (
+                time.monotonic() - self.repos_saved_at
+                >= CollectionPipeline.SAVE_DATA_INTERVAL
+            ):
+                self.__write_repos_data()
+
+    def __write_repos_data(self):
+        """
+        Writes data.json. Must be called with results_lock held.
+        """
+        data_path = os.path.join(self.results_path, "data.json")
+        # A crash while writing must not corrupt the data of the previous write
+        with open(data_path + ".tmp", "w") as fp:
+            fp.write(json.dumps(self.repos))
+        os.replace(data_path + ".tmp", data_path)
+        self.repos_saved_at = time.monotonic()
+
+    def __save_bug_patch(self, bug_patch: BugPatch, data: Dict = None):
+        data_path = self.__get_bug_patches_path(bug_patch.repo.full_name)
+        with self.results_lock:
+            with open(data_path, "a") as fp:
+                data = bug_patch.get_data() if data is None else data
+                fp.write((json.dumps(data) + "\n"))
+            # The journal is updated under the same lock to avoid saving a bug twice
+            if self.journal is not None:
+                self.journal.set_bug_patch_tested(bug_patch, True)
+
+    def __patch_tested(
+        self,
+        patch_collector: PatchCollector,
+        bug_patch: BugPatch,
+        is_patch: Optional[bool],
+        data: Dict = None,
+        runs_summary: List = None,
+    ):
+        """
+        Records the result of testing a patch. `is_patch` is None if the test failed
+        with an error. `data` and `runs_summary` are set when the patch was
+        tested by a worker.
+        """
+        if is_patch is None:
+            if self.journal is not None:
+                self.journal.set_bug_patch_error(bug_patch)
+        elif is_patch:
+            if data is not None:
+                bug_patch.strategy_used = data["strategy"]
+            self.__save_bug_patch(bug_patch, data)
+        elif self.journal is not None:
+            self.journal.set_bug_patch_tested(bug_patch, False, runs_summary)
+
+        # The repo is finished once all of its patches are tested
+        repo_name = patch_collector.repo.full_name
+        with self.test_futures_lock:
+            self.remaining_patches[repo_name] -= 1
+            finished = self.remaining_patches[repo_name] == 0
+        if finished:
+            self.__finish_repo(patch_collector)
+
+    def __test_patch(self, patch_collector: PatchCollector, bug_patch: BugPatch):
+        is_patch = None
+        try:
+            is_patch = patch_collector.test_patch(bug_patch, self.docker_sem)
+        except Exception:
+            logging.error(
+                f"Error while collecting patches from {bug_patch.repo}: {traceback.format_exc()}"
+            )
+        finally:
+            self.__patch_tested(patch_collector, bug_patch, is_patch)
+
+    def __dispatch_patches(
+        self, patch_collector: PatchCollector, bug_patches: List[BugPatch]
+    ):
+        with self.test_futures_lock:
+            for bug_patch in bug_patches:
+                job_id = f"{patch_collector.repo.full_name}@{bug_patch.commit}"
+                self.pending_jobs[job_id] = (patch_collector, bug_patch)
+                self.submitted_jobs += 1
+                self.job_queue.put_job(
+                    {
+                        "id": job_id,
+                        "type": "test_patch",
+                        "bug": bug_patch.get_data(),
+                        "actions": [action.declaration for action in bug_patch.actions],
+                        "config": self.job_config,
+                    }
+                )
+        # The workers use their own clones
+        patch_collector.delete_repo()
+
+    def __handle_job_result(self, result: Dict):
+        with self.test_futures_lock:
+            if result["id"] not in self.pending_jobs:
+                return
+            patch_collector, bug_patch = self.pending_jobs.pop(result["id"])
+
+        if "error" in result:
+            logging.error(
+                f"Error while collecting patches from {bug_patch.repo}: {result['error']}"
+            )
+            self.__patch_tested(patch_collector, bug_patch, None)
+        else:
+            self.__patch_tested(
+                patch_collector,
+                bug_patch,
+                result["result"]["is_bug_patch"],
+                data=result["result"]["data"],
+                runs_summary=result["result"]["runs"],
+            )
+
+    def __finish_repo(self, patch_collector: PatchCollector):
+        patch_collector.delete_repo()
+        if self.journal is not None:
+            self.journal.finish_repo(patch_collector.repo.full_name)
+
+    def __get_bug_patches_path(self, repo_name: str) -> str:
+        return os.path.join(self.results_path, repo_name.replace("/", "-") + ".json")
+
+    def __get_saved_bug_patches(self, repo_name: str) -> Dict[str, Dict]:
+        """
+        Returns the data of the bug patches of the repo saved in the results, by
+        commit
+        """
+        data_path = self.__get_bug_patches_path(repo_name)
+        if not os.path.exists(data_path):
+            return {}
+        saved_bug_patches = {}
+        with open(data_path, "r") as fp:
+            for line in fp:
+                if len(line.strip()) == 0:
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # Line truncated by a crash
+                    continue
+                saved_bug_patches[data["commit_hash"]] = data
+        return saved_bug_patches
+
+    def __resume_repo(
+        self,
+        patch_collector: PatchCollector,
+        status: Optional[RepoStatus],
+        bug_patches: List[BugPatch],
+    ) -> List[BugPatch]:
+        """
+        Records the mined bug patches in the journal. Returns the bug patches which
+        were not tested by previous runs.
+        """
+        repo_name = patch_collector.repo.full_name
+        self.journal.set_repo_mined(repo_name, bug_patches, patch_collector.head)
+
+        # A bug patch is saved before being recorded in the journal. If a run
+        # crashed in between, the saved bug patch is recorded now.
+        tested_commits = self.journal.get_tested_commits(repo_name)
+        saved_bug_patches = self.__get_saved_bug_patches(repo_name)
+        for bug_patch in bug_patches:
+            if (
+                bug_patch.commit in saved_bug_patches
+                and bug_patch.commit not in tested_commits
+            ):
+                data = saved_bug_patches[bug_patch.commit]
+                bug_patch.strategy_used = data["strategy"]
+                self.journal.set_bug_patch_tested(bug_patch, True, runs_summary=[])
+                tested_commits.add(bug_patch.commit)
+
+        return list(
+            filter(
+                lambda bug_patch: bug_patch.commit not in tested_commits,
+                bug_patches,
+            )
+        )
+
+    def __drop_duplicate_patches(
+        self, repo_name: str, bug_patches: List[BugPatch]
+    ) -> List[BugPatch]:
+        """
+        Drops the bug patches with the same changes as a bug patch of another repo
+        (e.g. the same fix in a fork), which is only tested in the first repo.
+        """
+        unique_bug_patches: List[BugPatch] = []
+        with self.digests_lock:
+            for bug_patch in bug_patches:
+                owner = self.patch_digests.setdefault(bug_patch.digest, repo_name)
+                if owner != repo_name:
+                    logging.info(
+                        f"Skipping commit {repo_name} {bug_patch.commit}: same patch as in {owner}"
+                    )
+                    continue
+                unique_bug_patches.append(bug_patch)
+        return unique_bug_patches
+
+    def __collect_repo(self, patch_collector: PatchCollector):
+        repo_name = patch_collector.repo.full_name
+        status = None
+        if self.journal is not None:
+            status = self.journal.get_repo_status(repo_name)
+        # The repos collected by previous runs are mined again if new commits were
+        # pushed since then
+        if (
+            status == RepoStatus.DONE
+            and self.journal.get_repo_head(repo_name)
+            == patch_collector.get_remote_head()
+        ):
+            logging.info(f"Skipping {repo_name}: already collected")
+            return
+
+        try:
+            bug_patches = patch_collector.get_possible_patches() or []
+        except Exception:
+            logging.error(
+                f"Error while collecting commits from {patch_collector.repo}: {traceback.format_exc()}"
+            )
+            patch_collector.delete_repo()
+            return
+
+        self.__save_repo_data(patch_collector, len(bug_patches))
+        bug_patches = self.__drop_duplicate_patches(repo_name, bug_patches)
+        if self.journal is not None:
+            bug_patches = self.__resume_repo(patch_collector, status, bug_patches)
+        if len(bug_patches) == 0:
+            self.__finish_repo(patch_collector)
+            return
+
+        # Populate the base cache dir with the actions required by the repo
+        if self.job_queue is None:
+            actions: Set[Action] = set()
+            for bug_patch in bug_patches:
+                actions.update(bug_patch.actions)
+            self.__cache_actions(actions)
+
+        with self.test_futures_lock:
+            self.remaining_patches[repo_name] = len(bug_patches)
+        if self.job_queue is not None:
+            self.__dispatch_patches(patch_collector, bug_patches)
+            return
+
+        try:
+            with self.docker_sem:
+                patch_collector.set_default_github_actions()
+        except Exception:
+            logging.error(
+                f"Error while setting default github actions from {patch_collector.repo}: {traceback.format_exc()}"
+            )
+
+        with self.test_futures_lock:
+            for bug_patch in bug_patches:
+                self.test_futures.append(
+                    self.test_executor.submit(
+                        self.__test_patch, patch_collector, bug_patch
+                    )
+                )
+
+    def __check_unrecorded_results(self, patch_collectors: List[PatchCollector]):
+        """
+        Fails if the results of a repo were saved by a run not recorded in the
+        journal, instead of mixing them with the results of this run.
+        """
+        unrecorded: List[str] = []
+        for patch_collector in patch_collectors:
+            repo_name = patch_collector.repo.full_name
+            path = self.__get_bug_patches_path(repo_name)
+            if (
+                self.journal.get_repo_status(repo_name) is None
+                and os.path.exists(path)
+                and os.path.getsize(path) > 0
+            ):
+                unrecorded.append(repo_name)
+        if len(unrecorded) > 0:
+            raise RuntimeError(
+                f"{self.results_path} has results of {', '.join(unrecorded)} which "
+                "are not recorded in the journal (they were collected with "
+                "resume=False, other options or before the journal existed). "
+                "Remove them or use another results_path."
+            )
+
+    def run(self, patch_collectors: List[PatchCollector]):
+        if self.journal is not None:
+            self.__check_unrecorded_results(patch_collectors)
+        with self.results_lock:
+            self.__write_repos_data()
+
+        repo_futures = [
+            self.repo_executor.submit(self.__collect_repo, patch_collector)
+            for patch_collector in patch_collectors
+        ]
+
+        if self.job_queue is not None:
+            # Results are streamed back while the repos are still being mined
+            with tqdm.tqdm(total=self.submitted_jobs) as progress:
+                while (
+                    any(not future.done() for future in repo_futures)
+                    or len(self.pending_jobs) > 0
+                ):
+                    # The jobs of the repos still being mined are submitted later
+                    if progress.total != self.submitted_jobs:
+                        progress.total = self.submitted_jobs
+                        progress.refresh()
+                    result = self.job_queue.get_result(timeout=1)
+                    if result is not None:
+                        self.__handle_job_result(result)
+                        progress.update()
+
+        for future in tqdm.tqdm(as_completed(repo_futures), total=len(repo_futures)):
+            try:
+                future.result()
+            except Exception:
+                logging.error(
+                    f"Error while collecting repository: {traceback.format_exc()}"
+                )
+        with self.results_lock:
+            self.__write_repos_data()
+
+        with self.test_futures_lock:
+            test_futures = list(self.test_futures)
+        for future in tqdm.tqdm(as_completed(test_futures), total=len(test_futures)):
+            future.result()
+
+        self.repo_executor.shutdown()
+        self.action_executor.shutdown()
+        self.test_executor.shutdown()
+
+
 def collect_bugs(
     data_path: str,
     results_path="data/out_bugs",
@@ -453,6 +1042,9 @@ def collect_bugs(
     normalize_non_code_patch: bool = True,
     strategies: Tuple[str] = ("PASS_PASS", "FAIL_PASS"),
     pull_requests: bool = False,
+    resume: bool = True,
+    coordinator_address: str = None,
+    cache_test_runs: bool = False,
 ):
     """Collects bug-fixes from the repos listed in `data_path`. The result is saved
     on `results_path`. A file `data.json` is also created with information about
@@ -472,8 +1064,21 @@ def collect_bugs(
         strategies (Tuple[str], optional): List of strategies to be used. Defaults to ("PASS_PASS", "FAIL_PASS").
                                            The available strategies are: "PASS_PASS", "FAIL_PASS", "FAIL_FAIL", "FAIL_PASS_BUILD".
         pull_requests (bool, optional): If True, the commits in pull requests will be considered. Defaults to False.
+        resume (bool, optional): If True, the run resumes the work recorded in the journal (`results_path`/journal.db) of previous runs,
+                                 skipping the bug patches already tested. The repos collected by previous runs are mined again if new
+                                 commits were pushed to them. The journal is reset if the previous runs used other options. If False,
+                                 the journal is reset. The results of a repo saved in `results_path` are never overwritten: the run fails
+                                 if they are not recorded in the journal (e.g. after a reset), and they must be removed first.
+                                 Defaults to True.
+        coordinator_address (str, optional): If set (host:port), the patches are not tested locally. Instead, they are dispatched to
+                                             the workers (see worker.py) connected to this address. The environment variable
+                                             GITBUGACTIONS_AUTHKEY must be set with the same key used by the workers.
+        cache_test_runs (bool, optional): If True, the test runs are cached in `results_path`/test-cache, so that equal trees
+                                          are only tested once, even across resumed runs. Defaults to False.
     """
     set_test_config(normalize_non_code_patch, strategies)
+    if cache_test_runs:
+        ActRunCache.set_cache_dir(os.path.join(results_path, "test-cache"))
 
     Act.set_memory_limit(memory_limit)
     github: GithubAPI = GithubAPI(
@@ -497,128 +1102,59 @@ def collect_bugs(
         "pull_requests": pull_requests,
     }
 
-    patch_collectors: List[Tuple[PatchCollector, Any]] = []
-    with ThreadPoolExecutor(max_workers=n_workers) as executor:
-        future_to_collector: Dict[Future, PatchCollector] = {}
-
-        dir_list = os.listdir(data_path)
-        for file in dir_list:
-            if file.endswith(".json"):
-                with open(os.path.join(data_path, file), "r") as f:
-                    run = json.loads(f.read())
-                    if not os.path.exists(results_path):
-                        os.mkdir(results_path)
-
-                    if (
-                        run["number_of_test_actions"] == 1
-                        and "actions_run" in run
-                        and len(run["actions_run"]["tests"]) > 0
-                    ):
-                        repo = github.get_repo(run["repository"])
-                        patch_collector = PatchCollector(repo, **kwargs)
-                        future_to_collector[
-                            executor.submit(patch_collector.get_possible_patches)
-                        ] = patch_collector
-
-        for future in tqdm.tqdm(
-            as_completed(future_to_collector), total=len(future_to_collector)
-        ):
-            try:
-                patch_collector = future_to_collector[future]
-                result = future.result()
-            except Exception:
-                logging.error(
-                    f"Error while collecting commits from {patch_collector.repo}: {traceback.format_exc()}"
-                )
-            else:
-                patch_collectors.append((patch_collector, result))
-
-    data_path = os.path.join(results_path, "data.json")
-    repos = {}
-    with open(data_path, "w") as fp:
-        for patch_collector, bug_patches in patch_collectors:
-            repos[patch_collector.repo.full_name] = {
-                "clone_url": patch_collector.repo.clone_url,
-                "commits": patch_collector.repo.get_commits().totalCount,
-                "possible_bug_patches": len(bug_patches),
-                "stars": patch_collector.repo.stargazers_count,
-                "size": patch_collector.repo.size,
-            }
-        fp.write(json.dumps(repos))
-
-    # Populate the base cache dir with required actions
-    with ThreadPoolExecutor(max_workers=n_workers) as executor:
-        futures_to_actions: Dict[Future, Action] = {}
-        actions_to_download: Set[Action] = set()
-        for patch_collector, bug_patches in patch_collectors:
-            for bug_patch in bug_patches:
-                actions_to_download.update(bug_patch.actions)
+    if not os.path.exists(results_path):
+        os.mkdir(results_path)
 
-        for action in actions_to_download:
-            futures_to_actions[
-                executor.submit(ActCacheDirManager.cache_action, action)
-            ] = action
+    patch_collectors: List[PatchCollector] = []
+    for file in os.listdir(data_path):
+        if file.endswith(".json"):
+            with open(os.path.join(data_path, file), "r") as f:
+                run = json.loads(f.read())
 
-        for future in tqdm.tqdm(
-            as_completed(futures_to_actions), total=len(futures_to_actions)
-        ):
-            try:
-                future.result()
-            except Exception:
-                logging.error(
-                    f"Error while downloading action: {traceback.format_exc()}"
-                )
-                continue
-
-    with ThreadPoolExecutor(max_workers=n_workers) as executor:
-        future_to_collector: Dict[Future, PatchCollector] = {}
-        for patch_collector, _ in patch_collectors:
-            future_to_collector[
-                executor.submit(patch_collector.set_default_github_actions)
-            ] = patch_collector
-
-        for future in tqdm.tqdm(
-            as_completed(future_to_collector), total=len(future_to_collector)
-        ):
-            try:
-                patch_collector = future_to_collector[future]
-                future.result()
-            except Exception:
-                logging.error(
-                    f"Error while setting default github actions from {patch_collector.repo}: {traceback.format_exc()}"
-                )
-                continue
-
-    with ThreadPoolExecutor(max_workers=n_workers) as executor:
-        future_to_patches: Dict[Future, Tuple[BugPatch]] = {}
-        for patch_collector, bug_patches in patch_collectors:
-            for bug_patch in bug_patches:
-                future_to_patches[
-                    executor.submit(patch_collector.test_patch, bug_patch)
-                ] = bug_patch
-
-        for future in tqdm.tqdm(
-            as_completed(future_to_patches), total=len(future_to_patches)
-        ):
-            try:
-                bug_patch = future_to_patches[future]
-                is_patch = future.result()
-            except Exception:
-                logging.error(
-                    f"Error while collecting patches from {bug_patch.repo}: {traceback.format_exc()}"
-                )
-            else:
-                if is_patch:
-                    data_path = os.path.join(
-                        results_path,
-                        bug_patch.repo.full_name.replace("/", "-") + ".json",
-                    )
-                    with open(data_path, "a") as fp:
-                        data = bug_patch.get_data()
-                        fp.write((json.dumps(data) + "\n"))
-
-    for patch_collector, _ in patch_collectors:
-        patch_collector.delete_repo()
+                if (
+                    run["number_of_test_actions"] == 1
+                    and "actions_run" in run
+                    and len(run["actions_run"]["tests"]) > 0
+                ):
+                    repo = github.get_repo(run["repository"])
+                    patch_collectors.append(PatchCollector(repo, **kwargs))
+
+    journal_path = os.path.join(results_path, "journal.db")
+    if not resume and os.path.exists(journal_path):
+        os.remove(journal_path)
+    # The work recorded by previous runs is discarded if the configuration changed
+    journal = CollectionJournal(
+        journal_path,
+        config={
+            "memory_limit": memory_limit,
+            "filter_on_commit_message": filter_on_commit_message,
+            "filter_on_commit_time_start": filter_on_commit_time_start,
+            "filter_on_commit_time_end": filter_on_commit_time_end,
+            "normalize_non_code_patch": normalize_non_code_patch,
+            "strategies": list(strategies),
+            "pull_requests": pull_requests,
+        },
+    )
+    job_queue = None
+    if coordinator_address is not None:
+        job_queue = JobQueueServer(parse_address(coordinator_address), get_authkey())
+
+    try:
+        CollectionPipeline(
+            results_path,
+            n_workers,
+            journal=journal,
+            job_queue=job_queue,
+            job_config={
+                "normalize_non_code_patch": normalize_non_code_patch,
+                "strategies": list(strategies),
+                "memory_limit": memory_limit,
+            },
+        ).run(patch_collectors)
+    finally:
+        journal.close()
+        if job_queue is not None:
+            job_queue.shutdown()
 
 
 def main():
@@ -186,7 +186,10 @@ class CollectInfraReposStrategy(CollectReposStrategy):
 
 
 def collect_repos(
-    query: str, pagination_freq: str = "M", n_workers: int = 1, out_path: str = "./out/"
+    query: str,
+    pagination_freq: str = "M",
+    n_workers: int = 1,
+    out_path: str = "./out/",
 ):
     """Collect the repositories from GitHub that match the query and have executable
     GitHub Actions workflows with parsable tests.
@@ -195,6 +198,7 @@ def collect_repos(
         query (str): Query with the Github searching format (https://docs.github.com/en/search-github/searching-on-github/searching-for-repositories).
         pagination_freq (str, optional): Useful if the number of repos to collect is superior to 1000 results (GitHub limit). The possible values are listed here: https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#timeseries-offset-aliases.
                                          For instance, if the value is 'D', each request will be limited to the repos created in a single day, until all the days are obtained.
+                                         The windows are only searched separately where the results exceed the limit. If the value is 'auto', the creation range is split by the number of results instead. Defaults to 'M'.
         n_workers (int, optional): Number of parallel workers. Defaults to 1.
         out_path (str, optional): Folder on which the results will be saved. Defaults to "./out/".
     """
@@ -115,7 +115,7 @@ def export_bugs(dataset_path: str, output_folder_path: str, n_workers=1):
     futures_to_bug = {}
 
     for jsonl_path in os.listdir(dataset_path):
-        if jsonl_path == "log.out" or jsonl_path == "data.json":
+        if jsonl_path == "data.json" or not jsonl_path.endswith(".json"):
             continue
 
         with open(os.path.join(dataset_path, jsonl_path), "r") as jsonl:
@@ -5,18 +5,23 @@ import pygit2
 import tqdm
 import logging, traceback
 import os, sys, shutil
+import threading
 
 from gitbugactions.test_executor import TestExecutor
-from gitbugactions.util import delete_repo_clone
+from gitbugactions.util import delete_repo_clone, clone_repo
+from gitbugactions.git.worktree import WorktreeManager
 from gitbugactions.docker.export import create_diff_image
 from gitbugactions.docker.client import DockerClient
 from gitbugactions.actions.actions import Act, ActCacheDirManager, ActTestsRun
+from gitbugactions.actions.test_results import TestResults
+from gitbugactions.distributed import JobQueueServer, parse_address, get_authkey
 
 from collect_bugs import BugPatch
 from run_bug import get_default_actions, get_diff_path
 from junitparser import TestCase
-from typing import Callable, Optional, List, Dict
-from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Callable, Optional, List, Dict, Set, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
 
 
 def run_commit(
@@ -35,6 +40,8 @@ def run_commit(
             act_cache_dir,
             get_default_actions(diff_folder_path, repo_clone, bug.language),
             runner_image=image_name,
+            # The tests must be rerun to check their flakiness
+            use_cache=False,
         )
 
         return test_fn(executor, offline)
@@ -44,49 +51,28 @@ def run_commit(
         ActCacheDirManager.return_act_cache_dir(act_cache_dir)
 
 
-def equal_test_results(old_test_results: List[Dict], new_test_results: List[TestCase]):
-    def check_test(old_test: Dict, new_test: TestCase):
-        # Different test
-        if not (
-            old_test["name"] == new_test.name
-            and old_test["classname"] == new_test.classname
-        ):
-            return False
-        # Test is passed
-        if new_test.is_passed and old_test["results"][0]["result"] == "Passed":
-            return True
-        if len(old_test["results"]) != len(new_test.result):
-            return False
-        aux_new_test_result = list(new_test.result)
-        for old_result in old_test["results"]:
-            for i, new_result in enumerate(aux_new_test_result):
-                if old_result["result"] == new_result.__class__.__name__:
-                    aux_new_test_result.pop(i)
-                    break
-            else:
-                return False
-        return True
-
+def equal_test_results(
+    old_test_results: List[Dict], new_test_results: Union[TestResults, List[TestCase]]
+):
     if len(old_test_results) != len(new_test_results):
         return False
 
-    aux_new_test_results = list(new_test_results)
-    for old_test in old_test_results:
-        for i, new_test in enumerate(aux_new_test_results):
-            if check_test(old_test, new_test):
-                aux_new_test_results.pop(i)
-                break
-        else:
-            return False
-    return True
+    # The tests and their results are compared as multisets, regardless of order
+    if not isinstance(new_test_results, TestResults):
+        new_test_results = TestResults(new_test_results)
+    return (
+        TestResults.get_multiset_from_dicts(old_test_results)
+        == new_test_results.multiset
+    )
 
 
 def filter_bug(
     bug: Dict,
-    repo_clone: pygit2.Repository,
+    worktrees: WorktreeManager,
     export_path: str,
     offline: bool,
 ) -> str:
+    repo_clone = worktrees.acquire(bug["previous_commit_hash"])
     try:
         repo_name = bug["repository"].replace("/", "-")
         bug_patch: BugPatch = BugPatch.from_dict(bug, repo_clone)
@@ -179,12 +165,168 @@ def filter_bug(
         else:
             return "NON-FLAKY"
     finally:
-        delete_repo_clone(repo_clone)
+        worktrees.release(repo_clone)
         docker_client.images.remove(image_name, force=True)
 
 
+class FilterBugJobHandler:
+    """
+    Tests the flakiness of the bugs dispatched as jobs by a filter_bugs coordinator.
+    Each repository is cloned once per worker and tested on its worktrees. The
+    clones of the least recently used repositories without running jobs are
+    deleted once more than MAX_REPOS repositories are kept.
+    """
+
+    MAX_REPOS = 8
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.repo_locks: Dict[str, threading.Lock] = {}
+        # Ordered from the least to the most recently used repository
+        self.worktrees: OrderedDict[str, WorktreeManager] = OrderedDict()
+        self.running_jobs: Dict[str, int] = {}
+
+    def __acquire_worktrees(self, bug: Dict) -> WorktreeManager:
+        with self.lock:
+            # The repository is not evicted while it has running jobs
+            self.running_jobs[bug["repository"]] = (
+                self.running_jobs.get(bug["repository"], 0) + 1
+            )
+            if bug["repository"] not in self.repo_locks:
+                self.repo_locks[bug["repository"]] = threading.Lock()
+            repo_lock = self.repo_locks[bug["repository"]]
+
+        with repo_lock:
+            if bug["repository"] not in self.worktrees:
+                repo_clone = clone_repo(
+                    bug["clone_url"],
+                    os.path.join(tempfile.gettempdir(), str(uuid.uuid4())),
+                )
+                with self.lock:
+                    self.worktrees[bug["repository"]] = WorktreeManager(repo_clone)
+            with self.lock:
+                self.worktrees.move_to_end(bug["repository"])
+                return self.worktrees[bug["repository"]]
+
+    def __release_worktrees(self, bug: Dict):
+        evicted: List[WorktreeManager] = []
+        with self.lock:
+            self.running_jobs[bug["repository"]] -= 1
+            if self.running_jobs[bug["repository"]] == 0:
+                del self.running_jobs[bug["repository"]]
+
+            idle_repos = [
+                repository
+                for repository in self.worktrees
+                if repository not in self.running_jobs
+            ]
+            n_evicted = len(self.worktrees) - FilterBugJobHandler.MAX_REPOS
+            for repository in idle_repos[: max(n_evicted, 0)]:
+                evicted.append(self.worktrees.pop(repository))
+                del self.repo_locks[repository]
+
+        for worktrees in evicted:
+            worktrees.cleanup()
+            delete_repo_clone(worktrees.repo_clone)
+
+    def __call__(self, job: Dict) -> Dict:
+        bug = job["bug"]
+        try:
+            worktrees = self.__acquire_worktrees(bug)
+            return {
+                "status": filter_bug(bug, worktrees, job["export_path"], job["offline"])
+            }
+        finally:
+            self.__release_worktrees(bug)
+
+    def cleanup(self):
+        for worktrees in self.worktrees.values():
+            worktrees.cleanup()
+            delete_repo_clone(worktrees.repo_clone)
+
+
+def save_status(res_path: str, repository: str, commit: str, status: str):
+    files = {
+        "NON-FLAKY": "non-flaky.json",
+        "FAIL": "fail.json",
+        "FLAKY": "flaky.json",
+    }
+    if status not in files:
+        return
+    with open(os.path.join(res_path, files[status]), "a") as f:
+        f.write(json.dumps({"repository": repository, "commit": commit}) + "\n")
+
+
+def read_bugs(bugs_path: str) -> List[List[Dict]]:
+    """
+    Returns the bugs of each repository collected by collect_bugs
+    """
+    repos_bugs = []
+    for bugs_file in os.listdir(bugs_path):
+        if bugs_file == "data.json" or not bugs_file.endswith(".json"):
+            continue
+
+        with open(os.path.join(bugs_path, bugs_file), "r") as f:
+            bugs = list(filter(lambda line: len(line.strip()) != 0, f.readlines()))
+            if len(bugs) == 0:
+                continue
+        repos_bugs.append(list(map(json.loads, bugs)))
+    return repos_bugs
+
+
+def dispatch_bugs(
+    bugs_path: str,
+    export_path: str,
+    res_path: str,
+    offline: bool,
+    coordinator_address: str,
+):
+    job_queue = JobQueueServer(parse_address(coordinator_address), get_authkey())
+    try:
+        pending_jobs: Dict[str, Dict] = {}
+        for bugs in read_bugs(bugs_path):
+            for bug in bugs:
+                job_id = f"{bug['repository']}@{bug['commit_hash']}"
+                pending_jobs[job_id] = bug
+                job_queue.put_job(
+                    {
+                        "id": job_id,
+                        "type": "filter_bug",
+                        "bug": bug,
+                        "export_path": export_path,
+                        "offline": offline,
+                    }
+                )
+
+        with tqdm.tqdm(total=len(pending_jobs)) as progress:
+            while len(pending_jobs) > 0:
+                result = job_queue.get_result(timeout=1)
+                if result is None or result["id"] not in pending_jobs:
+                    continue
+                bug = pending_jobs.pop(result["id"])
+                progress.update()
+                if "error" in result:
+                    logging.error(
+                        f"Error testing flakiness on {result['id']}: {result['error']}"
+                    )
+                    continue
+                save_status(
+                    res_path,
+                    bug["repository"],
+                    bug["commit_hash"],
+                    result["result"]["status"],
+                )
+    finally:
+        job_queue.shutdown()
+
+
 def filter_bugs(
-    bugs_path: str, export_path: str, res_path: str, n_workers=1, offline=True
+    bugs_path: str,
+    export_path: str,
+    res_path: str,
+    n_workers=1,
+    offline=True,
+    coordinator_address: str = None,
 ):
     """Creates the list of non-flaky bug-fixes that are able to be reproduced.
 
@@ -194,72 +336,76 @@ def filter_bugs(
         res_path (str): Folder on which the results will be saved.
         n_workers (int, optional): Number of parallel workers. Defaults to 1.
         offline (bool, optional): If the containers must be isolated from the internet. Defaults to True.
+        coordinator_address (str, optional): If set (host:port), the bugs are not tested locally. Instead, they are dispatched to
+                                             the workers (see worker.py) connected to this address. The environment variable
+                                             GITBUGACTIONS_AUTHKEY must be set with the same key used by the workers.
+                                             `export_path` must be a path accessible by the workers (e.g. shared storage).
     """
+    if coordinator_address is not None:
+        dispatch_bugs(bugs_path, export_path, res_path, offline, coordinator_address)
+        return
+
     ActCacheDirManager.init_act_cache_dirs(n_dirs=n_workers)
-    executor = ThreadPoolExecutor(max_workers=n_workers)
 
     with ThreadPoolExecutor(max_workers=n_workers) as executor:
         future_to_bug: Dict[Future, Dict] = {}
+        # Bugs still being tested and work trees of each repository
+        repo_futures: Dict[str, Set[Future]] = {}
+        repo_worktrees: Dict[str, WorktreeManager] = {}
+        repos_bugs = read_bugs(bugs_path)
+        progress = tqdm.tqdm(total=sum(len(bugs) for bugs in repos_bugs))
 
-        for bugs_file in os.listdir(bugs_path):
-            if bugs_file == "data.json" or not bugs_file.endswith(".json"):
-                continue
-
-            with open(os.path.join(bugs_path, bugs_file), "r") as f:
-                bugs = list(filter(lambda line: len(line.strip()) != 0, f.readlines()))
-                if len(bugs) == 0:
-                    continue
-            clone_url = json.loads(bugs[0])["clone_url"]
-            repo_clone = pygit2.clone_repository(
-                clone_url, os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
-            )
-
-            try:
-                for bug in bugs:
-                    bug = json.loads(bug)
-                    new_repo_path = os.path.join(
-                        tempfile.gettempdir(), str(uuid.uuid4())
-                    )
-                    shutil.copytree(repo_clone.workdir, new_repo_path, symlinks=True)
-                    repo_clone_copy = pygit2.Repository(
-                        os.path.join(new_repo_path, ".git")
-                    )
-                    future = executor.submit(
-                        filter_bug, bug, repo_clone_copy, export_path, offline
-                    )
-                    future_to_bug[future] = bug
-            finally:
-                delete_repo_clone(repo_clone)
-
-        for future in tqdm.tqdm(as_completed(future_to_bug), total=len(future_to_bug)):
+        def handle_result(future: Future):
+            bug = future_to_bug.pop(future)
+            repository = bug["repository"]
+            commit = bug["commit_hash"]
             try:
-                bug = future_to_bug[future]
-                repository = bug["repository"]
-                commit = bug["commit_hash"]
                 status = future.result()
             except Exception:
                 logging.error(
                     f"Error testing flakiness on {repository}@{commit}: {traceback.format_exc()}"
                 )
             else:
-                if status == "NON-FLAKY":
-                    with open(os.path.join(res_path, "non-flaky.json"), "a") as f:
-                        f.write(
-                            json.dumps({"repository": repository, "commit": commit})
-                            + "\n"
-                        )
-                elif status == "FAIL":
-                    with open(os.path.join(res_path, "fail.json"), "a") as f:
-                        f.write(
-                            json.dumps({"repository": repository, "commit": commit})
-                            + "\n"
-                        )
-                elif status == "FLAKY":
-                    with open(os.path.join(res_path, "flaky.json"), "a") as f:
-                        f.write(
-                            json.dumps({"repository": repository, "commit": commit})
-                            + "\n"
-                        )
+                save_status(res_path, repository, commit, status)
+            progress.update()
+
+            # The clone of the repository is released as soon as its bugs are tested
+            repo_futures[repository].discard(future)
+            if len(repo_futures[repository]) == 0:
+                del repo_futures[repository]
+                worktrees = repo_worktrees.pop(repository)
+                worktrees.cleanup()
+                delete_repo_clone(worktrees.repo_clone)
+
+        def wait_results():
+            done, _ = wait(list(future_to_bug), return_when=FIRST_COMPLETED)
+            for future in done:
+                handle_result(future)
+
+        for bugs in repos_bugs:
+            # Keeps at most one repository clone per worker on disk
+            while len(repo_worktrees) >= n_workers:
+                wait_results()
+
+            repository = bugs[0]["repository"]
+            repo_clone = clone_repo(
+                bugs[0]["clone_url"],
+                os.path.join(tempfile.gettempdir(), str(uuid.uuid4())),
+            )
+            # Each bug is tested on its own worktree of the repository clone
+            repo_worktrees[repository] = WorktreeManager(repo_clone)
+            repo_futures[repository] = set()
+
+            for bug in bugs:
+                future = executor.submit(
+                    filter_bug, bug, repo_worktrees[repository], export_path, offline
+                )
+                future_to_bug[future] = bug
+                repo_futures[repository].add(future)
+
+        while len(future_to_bug) > 0:
+            wait_results()
+        progress.close()
 
 
 def main():
@@ -6,13 +6,14 @@ import logging
 import subprocess
 import threading
 
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional
 from abc import ABC, abstractmethod
-from junitparser import TestCase, Error
+from junitparser import TestCase
 from dataclasses import dataclass
 from gitbugactions.actions.workflow import GitHubWorkflow, GitHubWorkflowFactory
 from gitbugactions.github_api import GithubToken
 from gitbugactions.actions.action import Action
+from gitbugactions.actions.test_results import TestResult, TestResults
 from gitbugactions.docker.client import DockerClient
 
 
@@ -116,7 +117,7 @@ class ActCacheDirManager:
 @dataclass
 class ActTestsRun:
     failed: bool
-    tests: List[TestCase]
+    tests: TestResults
     stdout: str
     stderr: str
     workflow: GitHubWorkflow
@@ -126,27 +127,54 @@ class ActTestsRun:
     default_actions: bool
     return_code: int
 
+    def __post_init__(self):
+        # The junitparser tests are stored in the compact representation
+        if not isinstance(self.tests, TestResults):
+            self.tests = TestResults(self.tests)
+
     @property
-    def failed_tests(self) -> List[TestCase]:
-        failed_tests = []
-        for test in self.tests:
-            # Check if it is failed (not passed, not skipped and without errors)
-            if (
-                not test.is_passed
-                and not test.is_skipped
-                and not any(map(lambda r: isinstance(r, Error), test.result))
-            ):
-                failed_tests.append(test)
-        return failed_tests
+    def failed_tests(self) -> List[TestResult]:
+        # Failed tests are not passed, not skipped and without errors
+        return self.tests.failed
 
     @property
-    def erroring_tests(self) -> List[TestCase]:
-        erroring_tests = []
-        for test in self.tests:
-            # Check if it is erroring (not passed, not skipped, and with erorrs)
-            if any(map(lambda r: isinstance(r, Error), test.result)):
-                erroring_tests.append(test)
-        return erroring_tests
+    def erroring_tests(self) -> List[TestResult]:
+        return self.tests.erroring
+
+    @staticmethod
+    def from_dict(data: Dict, workflow: GitHubWorkflow) -> "ActTestsRun":
+        """
+        Rebuilds a run from the output of `asdict`. The workflow is not serialized,
+        so the workflow of the run must be provided.
+        """
+        tests = TestResults(
+            TestResult(
+                test_data["classname"],
+                test_data["name"],
+                test_data["time"],
+                [
+                    (result["result"], result["message"], result["type"])
+                    for result in test_data["results"]
+                    if result["result"] != "Passed"
+                ],
+                test_data["stdout"],
+                test_data["stderr"],
+            )
+            for test_data in data["tests"]
+        )
+
+        return ActTestsRun(
+            failed=data["failed"],
+            tests=tests,
+            stdout=data["stdout"],
+            stderr=data["stderr"],
+            workflow=workflow,
+            workflow_name=data["workflow_name"],
+            build_tool=data["build_tool"],
+            elapsed_time=data["elapsed_time"],
+            default_actions=data["default_actions"],
+            return_code=data["return_code"],
+        )
 
     def asdict(self) -> Dict:
         res = {}
@@ -156,13 +184,9 @@ class ActTestsRun:
                 res[k] = []
                 for test in self.tests:
                     results = []
-                    for result in test.result:
+                    for result, message, type_ in test.results:
                         results.append(
-                            {
-                                "result": result.__class__.__name__,
-                                "message": result.message,
-                                "type": result.type,
-                            }
+                            {"result": result, "message": message, "type": type_}
                         )
                     if len(results) == 0:
                         results.append({"result": "Passed", "message": "", "type": ""})
@@ -227,6 +251,7 @@ class Act:
     __SETUP_LOCK = threading.Lock()
     __MEMORY_LIMIT = "7g"
     __DEFAULT_IMAGE = "gitbugactions:latest"
+    __VERSION: Optional[str] = None
 
     def __init__(
         self,
@@ -304,6 +329,20 @@ class Act:
     def set_memory_limit(limit: str):
         Act.__MEMORY_LIMIT = limit
 
+    @staticmethod
+    def get_memory_limit() -> str:
+        return Act.__MEMORY_LIMIT
+
+    @staticmethod
+    def get_version() -> str:
+        with Act.__SETUP_LOCK:
+            if Act.__VERSION is None:
+                run = subprocess.run(
+                    f"{Act.__ACT_PATH} --version", shell=True, capture_output=True
+                )
+                Act.__VERSION = run.stdout.decode("utf-8").strip()
+            return Act.__VERSION
+
     def run_act(
         self, repo_path, workflow: GitHubWorkflow, act_cache_dir: str
     ) -> ActTestsRun:
@@ -0,0 +1,10 @@
+from gitbugactions.actions.workflow_registry import WorkflowRegistry
+
+GO_KEYWORDS = ["go"]
+
+WorkflowRegistry.register(
+    "go",
+    "go",
+    GO_KEYWORDS,
+    "gitbugactions.actions.go.go_workflow:GoWorkflow",
+)
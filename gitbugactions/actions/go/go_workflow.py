@@ -1,14 +1,15 @@
 from typing import List, Tuple
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 from pathlib import Path
 import re
 
 from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.actions.go import GO_KEYWORDS
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 
 
 class GoWorkflow(GitHubWorkflow):
-    BUILD_TOOL_KEYWORDS = ["go"]
+    BUILD_TOOL_KEYWORDS = GO_KEYWORDS
     # Regex patterns to match go test commands
     __COMMAND_PATTERNS = [
         r"go\s+(([^\s]+\s+)*)?",
@@ -138,7 +139,7 @@ class GoWorkflow(GitHubWorkflow):
                                     + " 2>&1 | ~/go/bin/go-junit-report > report.xml"
                                 )
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         parser = JUnitXMLParser()
         return parser.get_test_results(str(Path(repo_path, "report.xml")))
 
@@ -0,0 +1,17 @@
+from gitbugactions.actions.workflow_registry import WorkflowRegistry
+
+MAVEN_KEYWORDS = ["maven", "mvn", "mavenw", "mvnw"]
+GRADLE_KEYWORDS = ["gradle", "gradlew"]
+
+WorkflowRegistry.register(
+    "java",
+    "maven",
+    MAVEN_KEYWORDS,
+    "gitbugactions.actions.java.maven_workflow:MavenWorkflow",
+)
+WorkflowRegistry.register(
+    "java",
+    "gradle",
+    GRADLE_KEYWORDS,
+    "gitbugactions.actions.java.gradle_workflow:GradleWorkflow",
+)
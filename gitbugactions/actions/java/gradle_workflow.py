@@ -1,14 +1,15 @@
 from typing import List
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 from pathlib import Path
 import re
 
 from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.actions.java import GRADLE_KEYWORDS
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 
 
 class GradleWorkflow(GitHubWorkflow):
-    BUILD_TOOL_KEYWORDS = ["gradle", "gradlew"]
+    BUILD_TOOL_KEYWORDS = GRADLE_KEYWORDS
     # Regex patterns to match gradle commands
     __TESTS_COMMAND_PATTERNS = [
         r"(gradle|gradlew)\s+(([^\s]+\s+)*)?(test|check|build|buildDependents|buildNeeded)",
@@ -33,7 +34,7 @@ class GradleWorkflow(GitHubWorkflow):
                         if "run" in step and self._is_test_command(step["run"]):
                             step["run"] += " --offline"
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         parser = JUnitXMLParser()
         return parser.get_test_results(
             str(Path(repo_path, "build", "test-results", "test"))
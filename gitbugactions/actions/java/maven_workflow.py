@@ -1,14 +1,15 @@
 from typing import List
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 from pathlib import Path
 import re
 
 from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.actions.java import MAVEN_KEYWORDS
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 
 
 class MavenWorkflow(GitHubWorkflow):
-    BUILD_TOOL_KEYWORDS = ["maven", "mvn", "mavenw", "mvnw"]
+    BUILD_TOOL_KEYWORDS = MAVEN_KEYWORDS
     # Regex patterns to match maven test commands
     __TESTS_COMMAND_PATTERNS = [
         r"(maven|mvn|mavenw|mvnw)\s+(([^\s]+\s+)*)?(test|package|verify|install)",
@@ -33,7 +34,7 @@ class MavenWorkflow(GitHubWorkflow):
                         if "run" in step and self._is_test_command(step["run"]):
                             step["run"] += " -offline"
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         parser = JUnitXMLParser()
         return parser.get_test_results(
             str(Path(repo_path, "target", "surefire-reports"))
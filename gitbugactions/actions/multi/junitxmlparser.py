@@ -1,37 +1,103 @@
 from .testparser import TestParser
-from junitparser import JUnitXml, TestCase, TestSuite
-from typing import List, Union
+from gitbugactions.actions.test_results import TestResult
+from junitparser import TestCase, JUnitXmlError
+from junitparser.junitparser import etree
+from typing import Any, List, Optional, Tuple
 from pathlib import Path
 
 
 class JUnitXMLParser(TestParser):
-    def __get_test_results_xml(
-        self, xml: Union[JUnitXml, TestSuite, TestCase]
-    ) -> List[TestCase]:
-        """Recursive function to iterate over the JUnit XML file and return a list of tests"""
-        tests: List[TestCase] = []
-
-        # Check if the element is a TestCase (leaf node)
-        if not isinstance(xml, TestCase):
-            # If it is a TestSuite, iterate over all elements
-            for element in xml:
-                if element is not None:
-                    tests.extend(self.__get_test_results_xml(element))
-        else:
-            tests.append(xml)
+    # Maximum number of characters kept from the output and messages of each test
+    MAX_OUTPUT_LENGTH: int = 64 * 1024
+    __TEXT_TAGS = {"system-out", "system-err", "failure", "error", "skipped"}
+
+    class __Suite:
+        def __init__(self):
+            self.tests: List[TestResult] = []
+            # Tests of the nested suites, which come after the tests of the suite
+            self.nested_tests: List[TestResult] = []
+
+    @staticmethod
+    def __truncate(text: Optional[str]) -> Optional[str]:
+        if text is None:
+            return None
+        return text[: JUnitXMLParser.MAX_OUTPUT_LENGTH]
+
+    @staticmethod
+    def __get_test_result(elem) -> TestResult:
+        test = TestCase.fromelem(elem)
+        return TestResult(
+            test.classname,
+            test.name,
+            test.time,
+            [
+                (
+                    result.__class__.__name__,
+                    JUnitXMLParser.__truncate(result.message),
+                    result.type,
+                )
+                for result in test.result
+            ],
+            JUnitXMLParser.__truncate(test.system_out),
+            JUnitXMLParser.__truncate(test.system_err),
+        )
+
+    def __get_test_results_xml(self, file: Path) -> List[TestResult]:
+        """
+        Streams the JUnit XML file and returns the list of tests, in the same order
+        as iterating over the suites of the file with junitparser. Each element is
+        removed from the document as soon as it is parsed, and the output and
+        messages of the tests are truncated, so the whole document is never kept
+        in memory.
+        """
+        tests: List[TestResult] = []
+        # Stack of the open elements, with their tag and the suite of the testsuites
+        stack: List[Tuple[str, Optional[JUnitXMLParser.__Suite], Any]] = []
+
+        for event, elem in etree.iterparse(str(file), events=("start", "end")):
+            if event == "start":
+                if len(stack) == 0 and elem.tag not in ("testsuites", "testsuite"):
+                    raise JUnitXmlError("Invalid format.")
+                # Suites are only read in the root or in other suites
+                is_suite = elem.tag == "testsuite" and (
+                    len(stack) <= 1 or stack[-1][1] is not None
+                )
+                suite = JUnitXMLParser.__Suite() if is_suite else None
+                stack.append((elem.tag, suite, elem))
+                continue
+
+            _, suite, _ = stack.pop()
+            parent_tag, parent, parent_elem = (
+                stack[-1] if len(stack) > 0 else ("", None, None)
+            )
+            if elem.tag == "testcase":
+                if parent is not None:
+                    parent.tests.append(JUnitXMLParser.__get_test_result(elem))
+            elif suite is not None:
+                if parent is not None:
+                    parent.nested_tests.extend(suite.tests + suite.nested_tests)
+                else:
+                    tests.extend(suite.tests + suite.nested_tests)
+            elif parent_tag not in ("testsuites", "testsuite"):
+                # The children of the tests are read with the test
+                if elem.tag in JUnitXMLParser.__TEXT_TAGS:
+                    elem.text = JUnitXMLParser.__truncate(elem.text)
+                continue
+
+            # The elements of the suites (e.g. tests, properties and output) are
+            # removed once they are parsed
+            elem.clear()
+            if parent_elem is not None:
+                parent_elem.remove(elem)
 
         return tests
 
     def _get_test_results(self, file: Path) -> list:
         """Returns a list of failed tests from a JUnit XML file"""
-        tests: List[TestCase] = []
+        tests: List[TestResult] = []
 
         # Check if it is an xml file
         if file.suffix == ".xml":
-            # Load the XML file with the JUnit XML parser
-            xml = JUnitXml.fromfile(str(file))
-            if xml is not None:
-                # Start the recursive function on the root element
-                tests.extend(self.__get_test_results_xml(xml))
+            tests.extend(self.__get_test_results_xml(file))
 
         return tests
@@ -1,5 +1,5 @@
 from typing import List
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 
 from gitbugactions.actions.workflow import GitHubWorkflow
 
@@ -15,7 +15,7 @@ class UnknownWorkflow(GitHubWorkflow):
     def instrument_test_steps(self):
         pass
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         return []
 
     def get_build_tool(self) -> str:
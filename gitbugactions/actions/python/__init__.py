@@ -0,0 +1,17 @@
+from gitbugactions.actions.workflow_registry import WorkflowRegistry
+
+PYTEST_KEYWORDS = ["pytest", "py.test"]
+UNITTEST_KEYWORDS = ["unittest", "xmlrunner"]
+
+WorkflowRegistry.register(
+    "python",
+    "pytest",
+    PYTEST_KEYWORDS,
+    "gitbugactions.actions.python.pytest_workflow:PytestWorkflow",
+)
+WorkflowRegistry.register(
+    "python",
+    "unittest",
+    UNITTEST_KEYWORDS,
+    "gitbugactions.actions.python.unittest_workflow:UnittestWorkflow",
+)
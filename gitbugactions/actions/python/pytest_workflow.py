@@ -1,14 +1,15 @@
 from typing import List
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 from pathlib import Path
 import re
 
 from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.actions.python import PYTEST_KEYWORDS
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 
 
 class PytestWorkflow(GitHubWorkflow):
-    BUILD_TOOL_KEYWORDS = ["pytest", "py.test"]
+    BUILD_TOOL_KEYWORDS = PYTEST_KEYWORDS
     # Regex patterns to match pytest commands
     __TESTS_COMMAND_PATTERNS = [
         r"pytest",
@@ -52,7 +53,7 @@ class PytestWorkflow(GitHubWorkflow):
                                     step["run"],
                                 )
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         parser = JUnitXMLParser()
         return parser.get_test_results(str(Path(repo_path, "report.xml")))
 
@@ -1,14 +1,15 @@
 from typing import List
-from junitparser import TestCase
+from gitbugactions.actions.test_results import TestResult
 from pathlib import Path
 import re
 
 from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.actions.python import UNITTEST_KEYWORDS
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 
 
 class UnittestWorkflow(GitHubWorkflow):
-    BUILD_TOOL_KEYWORDS = ["unittest", "xmlrunner"]
+    BUILD_TOOL_KEYWORDS = UNITTEST_KEYWORDS
     # Regex patterns to match unittest commands
     __TESTS_COMMAND_PATTERNS = [
         r"python([23](\.\d+)?)?\s+(([^\s]+\s+)*)?-m\s+unittest",  # Matches commands that call unittest through python's module option
@@ -53,7 +54,7 @@ class UnittestWorkflow(GitHubWorkflow):
                                 new_step_run += step["run"]
                             step["run"] = new_step_run
 
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         parser = JUnitXMLParser()
         return parser.get_test_results(str(Path(repo_path, "test_reports")))
 
@@ -0,0 +1,136 @@
+import os
+import json
+import yaml
+import uuid
+import hashlib
+import logging
+import threading
+import pygit2
+from typing import Dict, List, Optional
+from gitbugactions.actions.actions import Act, ActTestsRun
+from gitbugactions.actions.workflow import GitHubWorkflow
+from gitbugactions.docker.client import DockerClient
+
+
+class ActRunCache:
+    """
+    Persistent cache of test runs. A run is identified by the tree of the repository
+    after the patches are applied, the instrumented workflows, the runner image and
+    the version of act, so the same tree is only tested once, even across different
+    bug patches or runs. The cache is disabled unless a cache dir is set.
+    """
+
+    __CACHE_DIR: Optional[str] = os.environ.get("GITBUGACTIONS_TEST_CACHE_DIR")
+    __IMAGE_IDS: Dict[str, str] = {}
+    __IMAGE_IDS_LOCK: threading.Lock = threading.Lock()
+
+    @classmethod
+    def set_cache_dir(cls, cache_dir: Optional[str]):
+        """
+        Sets the folder where the runs are cached. None disables the cache.
+        """
+        cls.__CACHE_DIR = cache_dir
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.__CACHE_DIR is not None
+
+    @staticmethod
+    def get_tree_id(repo_clone: pygit2.Repository, patches: List[str]) -> str:
+        """
+        Returns the id of the tree of the working directory, which is the tree of
+        the HEAD commit after `patches` are applied
+        """
+        tree = str(repo_clone.head.peel(pygit2.Commit).tree.id)
+        if len(patches) == 0:
+            return tree
+        return hashlib.sha256("\n".join([tree] + patches).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_image_id(cls, runner_image: str) -> str:
+        with cls.__IMAGE_IDS_LOCK:
+            if runner_image not in cls.__IMAGE_IDS:
+                Act(runner_image=runner_image)  # Make sure that the image is available
+                cls.__IMAGE_IDS[runner_image] = (
+                    DockerClient.getInstance().images.get(runner_image).id
+                )
+            return cls.__IMAGE_IDS[runner_image]
+
+    @staticmethod
+    def get_workflow_hash(workflow: GitHubWorkflow) -> str:
+        content = type(workflow).__name__ + yaml.dump(workflow.doc)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_key(
+        repo_clone: pygit2.Repository,
+        patches: List[str],
+        workflows: List[GitHubWorkflow],
+        runner_image: str,
+        offline: bool,
+        timeout: int,
+    ) -> str:
+        """
+        Args:
+            patches (List[str]): Patches applied to the working directory of
+                                 `repo_clone` since the HEAD commit was checked out.
+        """
+        key = {
+            "tree": ActRunCache.get_tree_id(repo_clone, patches),
+            "workflows": [
+                [
+                    os.path.basename(workflow.path),
+                    ActRunCache.get_workflow_hash(workflow),
+                ]
+                for workflow in workflows
+            ],
+            "image": ActRunCache.get_image_id(runner_image),
+            "act": Act.get_version(),
+            "offline": offline,
+            "timeout": timeout,
+            "memory_limit": Act.get_memory_limit(),
+        }
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def __get_path(cls, key: str) -> str:
+        return os.path.join(cls.__CACHE_DIR, key[:2], f"{key}.json")
+
+    @classmethod
+    def get(
+        cls, key: str, workflows: List[GitHubWorkflow]
+    ) -> Optional[List[ActTestsRun]]:
+        """
+        Returns the cached runs of the workflows or None if they are not cached
+        """
+        path = cls.__get_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as f:
+                runs = json.loads(f.read())
+        except (OSError, json.JSONDecodeError):
+            logging.warning(f"Invalid test run cache entry {path}. Ignoring it...")
+            return None
+        if len(runs) != len(workflows):
+            return None
+
+        return [
+            ActTestsRun.from_dict(run, workflow)
+            for run, workflow in zip(runs, workflows)
+        ]
+
+    @classmethod
+    def put(cls, key: str, runs: List[ActTestsRun]):
+        # Failed runs (e.g. timeouts or memory limit exceeded) are not deterministic
+        if any(run.failed for run in runs):
+            return
+
+        path = cls.__get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The entry is renamed to its path so that it is never read partially written
+        tmp_path = f"{path}.{uuid.uuid4()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps([run.asdict() for run in runs]))
+        os.replace(tmp_path, path)
@@ -0,0 +1,239 @@
+import sys
+import junitparser
+from junitparser.junitparser import FinalResult
+from array import array
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+from junitparser import TestCase
+
+
+class TestResult:
+    """
+    Compact representation of the result of a test. It keeps the fields of the
+    junitparser TestCase that are used by GitBug-Actions, without the XML element.
+    """
+
+    # Prevents pytest from collecting the class
+    __test__ = False
+    __slots__ = (
+        "classname",
+        "name",
+        "time",
+        "results",
+        "system_out",
+        "system_err",
+        "outcome",
+    )
+
+    # Flags of the outcome
+    FAILURE = 1
+    ERROR = 2
+    SKIPPED = 4
+    __OUTCOMES = {"Failure": FAILURE, "Error": ERROR, "Skipped": SKIPPED}
+
+    def __init__(
+        self,
+        classname: Optional[str],
+        name: Optional[str],
+        time: Optional[float] = None,
+        results: Iterable[Tuple[str, Optional[str], Optional[str]]] = (),
+        system_out: Optional[str] = None,
+        system_err: Optional[str] = None,
+    ):
+        """
+        Args:
+            results: The (result, message, type) of each result of the test, where
+                result is the name of the junitparser class (Failure, Error, Skipped)
+        """
+        # The names are shared by the results of the same test in different runs
+        self.classname = sys.intern(classname) if classname is not None else None
+        self.name = sys.intern(name) if name is not None else None
+        self.time = time
+        self.results: Tuple[Tuple[str, Optional[str], Optional[str]], ...] = tuple(
+            (sys.intern(result), message, type_) for result, message, type_ in results
+        )
+        self.system_out = system_out
+        self.system_err = system_err
+        self.outcome = 0
+        for result, _, _ in self.results:
+            self.outcome |= TestResult.__OUTCOMES.get(result, TestResult.FAILURE)
+
+    @staticmethod
+    def from_test_case(test: TestCase) -> "TestResult":
+        return TestResult(
+            test.classname,
+            test.name,
+            test.time,
+            [
+                (result.__class__.__name__, result.message, result.type)
+                for result in test.result
+            ],
+            test.system_out,
+            test.system_err,
+        )
+
+    @property
+    def is_passed(self) -> bool:
+        return len(self.results) == 0
+
+    @property
+    def is_skipped(self) -> bool:
+        return self.outcome & TestResult.SKIPPED != 0
+
+    @property
+    def is_error(self) -> bool:
+        return self.outcome & TestResult.ERROR != 0
+
+    @property
+    def is_failed(self) -> bool:
+        """Not passed, not skipped and without errors"""
+        return not self.is_passed and not self.is_skipped and not self.is_error
+
+    @property
+    def result(self) -> List[FinalResult]:
+        """The results of the test as junitparser objects"""
+        return [
+            getattr(junitparser, result)(message, type_)
+            for result, message, type_ in self.results
+        ]
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in TestResult.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(TestResult.__slots__, state):
+            setattr(self, slot, value)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TestResult) and self.__getstate__() == (
+            other.__getstate__()
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.classname, self.name, self.results))
+
+    def __repr__(self) -> str:
+        return f"TestResult({self.classname!r}, {self.name!r}, {self.results!r})"
+
+
+class TestResults:
+    """
+    Immutable sequence of test results, with the outcome of each test stored in an
+    array so that the failed and erroring tests are only computed once.
+    """
+
+    __test__ = False
+    __slots__ = (
+        "tests",
+        "outcomes",
+        "__failed",
+        "__erroring",
+        "__passed_keys",
+        "__multiset",
+    )
+
+    def __init__(self, tests: Iterable[Union[TestResult, TestCase]] = ()):
+        self.tests: Tuple[TestResult, ...] = tuple(
+            test if isinstance(test, TestResult) else TestResult.from_test_case(test)
+            for test in tests
+        )
+        self.outcomes = array("B", (test.outcome for test in self.tests))
+        self.__failed: Optional[List[TestResult]] = None
+        self.__erroring: Optional[List[TestResult]] = None
+        self.__passed_keys: Optional[FrozenSet[Tuple[str, str]]] = None
+        self.__multiset: Optional[Counter] = None
+
+    @property
+    def failed(self) -> List[TestResult]:
+        """The tests that are not passed, not skipped and without errors"""
+        if self.__failed is None:
+            self.__failed = [
+                test
+                for test, outcome in zip(self.tests, self.outcomes)
+                if outcome == TestResult.FAILURE
+            ]
+        return self.__failed
+
+    @property
+    def erroring(self) -> List[TestResult]:
+        """The tests with errors"""
+        if self.__erroring is None:
+            self.__erroring = [
+                test
+                for test, outcome in zip(self.tests, self.outcomes)
+                if outcome & TestResult.ERROR
+            ]
+        return self.__erroring
+
+    @property
+    def passed_keys(self) -> FrozenSet[Tuple[str, str]]:
+        """The (classname, name) of the passed tests"""
+        if self.__passed_keys is None:
+            self.__passed_keys = frozenset(
+                (test.classname, test.name)
+                for test, outcome in zip(self.tests, self.outcomes)
+                if outcome == 0
+            )
+        return self.__passed_keys
+
+    @property
+    def multiset(self) -> Counter:
+        """
+        Canonical representation of the results, to compare runs regardless of the
+        order of the tests and of their results. It counts the (classname, name,
+        results) of the tests, where results are the sorted names of the results
+        of the test, or ("Passed",) for passed tests.
+        """
+        if self.__multiset is None:
+            self.__multiset = Counter(
+                TestResults.get_multiset_key(
+                    test.classname, test.name, [result for result, _, _ in test.results]
+                )
+                for test in self.tests
+            )
+        return self.__multiset
+
+    @staticmethod
+    def get_multiset_key(
+        classname: Optional[str], name: Optional[str], results: List[str]
+    ) -> Tuple[Optional[str], Optional[str], Tuple[str, ...]]:
+        if len(results) == 0 or results[0] == "Passed":
+            return (classname, name, ("Passed",))
+        return (classname, name, tuple(sorted(results)))
+
+    @staticmethod
+    def get_multiset_from_dicts(tests: List[Dict]) -> Counter:
+        """
+        Returns the multiset of tests serialized with `ActTestsRun.asdict`
+        """
+        return Counter(
+            TestResults.get_multiset_key(
+                test["classname"],
+                test["name"],
+                [result["result"] for result in test["results"]],
+            )
+            for test in tests
+        )
+
+    def __len__(self) -> int:
+        return len(self.tests)
+
+    def __iter__(self) -> Iterator[TestResult]:
+        return iter(self.tests)
+
+    def __getitem__(self, index):
+        return self.tests[index]
+
+    def __getstate__(self):
+        return self.tests
+
+    def __setstate__(self, tests):
+        TestResults.__init__(self, tests)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TestResults):
+            return self.tests == other.tests
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TestResults({list(self.tests)!r})"
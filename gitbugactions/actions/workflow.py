@@ -1,13 +1,72 @@
+import re
+import copy
 import yaml
+import hashlib
 import logging
+import threading
 from abc import ABC, abstractmethod
-from junitparser import TestCase
-from typing import List, Set
+from collections import OrderedDict
+from gitbugactions.actions.test_results import TestResult
+from typing import Any, Dict, List, Set, Tuple
 from gitbugactions.github_api import GithubToken
 from gitbugactions.actions.action import Action
 
 
+class WorkflowCache:
+    """
+    Bounded LRU cache of values derived from workflow files (e.g. the parsed
+    documents), keyed by the hash of their content. The same workflow content is
+    handled thousands of times across the history of a repository.
+    """
+
+    # The libyaml loader is much faster, but is not available in every installation
+    LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, Any] = OrderedDict()
+
+    @staticmethod
+    def get_key(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def load(self, content: str) -> Any:
+        """
+        Returns the parsed document of the workflow. The document is shared by
+        every caller and must be copied before being modified.
+
+        Raises:
+            yaml.YAMLError: If the content is not a valid YAML document
+        """
+        key = WorkflowCache.get_key(content)
+        doc = self.get(key, self)
+        if doc is self:
+            doc = yaml.load(content, Loader=WorkflowCache.LOADER)
+            # Solves problem where pyyaml parses 'on' (used in Github actions) as True
+            if isinstance(doc, dict) and True in doc:
+                doc["on"] = doc.pop(True)
+            self.set(key, doc)
+        return doc
+
+
 class GitHubWorkflow(ABC):
+    DOC_CACHE = WorkflowCache()
+
     __UNSUPPORTED_OS = [
         "windows-latest",
         "windows-2022",
@@ -29,13 +88,11 @@ class GitHubWorkflow(ABC):
         try:
             if workflow == "":
                 with open(path, "r") as stream:
-                    self.doc = yaml.safe_load(stream)
-            else:
-                self.doc = yaml.safe_load(workflow)
-            # Solves problem where pyyaml parses 'on' (used in Github actions) as True
-            if True in self.doc:
-                self.doc["on"] = self.doc[True]
-                self.doc.pop(True)
+                    workflow = stream.read()
+            # The document is instrumented in place, so the cached one is copied
+            self.doc = copy.deepcopy(GitHubWorkflow.DOC_CACHE.load(workflow))
+            if not isinstance(self.doc, (dict, list)):
+                self.doc = []
         except Exception:
             self.doc = []
         self.path = path
@@ -316,7 +373,7 @@ class GitHubWorkflow(ABC):
         pass
 
     @abstractmethod
-    def get_test_results(self, repo_path) -> List[TestCase]:
+    def get_test_results(self, repo_path) -> List[TestResult]:
         """
         Gets the test results from the workflow.
         """
@@ -335,11 +392,64 @@ class GitHubWorkflow(ABC):
 
 
 from gitbugactions.actions.multi.unknown_workflow import UnknownWorkflow
-from gitbugactions.actions.java.maven_workflow import MavenWorkflow
-from gitbugactions.actions.java.gradle_workflow import GradleWorkflow
-from gitbugactions.actions.python.pytest_workflow import PytestWorkflow
-from gitbugactions.actions.python.unittest_workflow import UnittestWorkflow
-from gitbugactions.actions.go.go_workflow import GoWorkflow
+from gitbugactions.actions.workflow_registry import WorkflowRegistry
+
+
+class BuildToolScanner:
+    """
+    Counts the build tool keywords in run commands. Each word (split by spaces)
+    counts once for every keyword it contains, and each build tool sums the counts
+    of its keywords. The keywords are matched by a single compiled pattern, and the
+    counts of each word are memoized since run commands repeat the same words.
+    """
+
+    __MAX_WORDS = 65536
+
+    def __init__(self, build_tool_keywords: Dict[str, List[str]]):
+        self.build_tools = list(build_tool_keywords)
+        # Weight of each keyword on each build tool
+        self.weights: Dict[str, Dict[str, int]] = {}
+        for build_tool, keywords in build_tool_keywords.items():
+            for keyword in keywords:
+                weights = self.weights.setdefault(keyword, {})
+                weights[build_tool] = weights.get(build_tool, 0) + 1
+
+        # Only the longest keyword starting at each position is matched, the
+        # keywords which are prefixes of the match are also found at the position
+        keywords = sorted(self.weights, key=len, reverse=True)
+        self.pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+        self.prefixes: Dict[str, List[str]] = {
+            match: [keyword for keyword in keywords if match.startswith(keyword)]
+            for match in keywords
+        }
+        self.word_counts: Dict[str, List[Tuple[str, int]]] = {}
+
+    def __get_word_counts(self, word: str) -> List[Tuple[str, int]]:
+        word_counts = self.word_counts.get(word)
+        if word_counts is None:
+            keywords = set()
+            for match in self.pattern.finditer(word):
+                keywords.update(self.prefixes[match.group(1)])
+
+            counts: Dict[str, int] = {}
+            for keyword in keywords:
+                for build_tool, weight in self.weights[keyword].items():
+                    counts[build_tool] = counts.get(build_tool, 0) + weight
+            word_counts = list(counts.items())
+
+            if len(self.word_counts) >= BuildToolScanner.__MAX_WORDS:
+                self.word_counts.clear()
+            self.word_counts[word] = word_counts
+        return word_counts
+
+    def get_counts(self, phrases: List[Any]) -> Dict[str, int]:
+        counts = {build_tool: 0 for build_tool in self.build_tools}
+        for phrase in phrases:
+            if isinstance(phrase, str):
+                for word in phrase.strip().lower().split(" "):
+                    for build_tool, count in self.__get_word_counts(word):
+                        counts[build_tool] += count
+        return counts
 
 
 class GitHubWorkflowFactory:
@@ -347,68 +457,70 @@ class GitHubWorkflowFactory:
     Factory class for creating workflow objects.
     """
 
+    __BUILD_TOOLS = WorkflowCache()
+    __scanner_lock = threading.Lock()
+    __scanner: Tuple[int, BuildToolScanner] = (-1, None)
+
+    @staticmethod
+    def get_build_tool_scanner() -> BuildToolScanner:
+        """
+        Returns the scanner of the keywords of every registered build tool. It is
+        rebuilt when new workflows are registered.
+        """
+        with GitHubWorkflowFactory.__scanner_lock:
+            version = WorkflowRegistry.get_version()
+            if GitHubWorkflowFactory.__scanner[0] != version:
+                GitHubWorkflowFactory.__scanner = (
+                    version,
+                    BuildToolScanner(WorkflowRegistry.get_build_tool_keywords()),
+                )
+                # The identified build tools depend on the registered keywords
+                GitHubWorkflowFactory.__BUILD_TOOLS = WorkflowCache()
+            return GitHubWorkflowFactory.__scanner[1]
+
     @staticmethod
     def _identify_build_tool(path: str, content: str = ""):
         """
         Identifies the build tool used by the workflow.
         """
-        # Build tool keywords
         try:
-            build_tool_keywords = {
-                "maven": MavenWorkflow.BUILD_TOOL_KEYWORDS,
-                "gradle": GradleWorkflow.BUILD_TOOL_KEYWORDS,
-                "pytest": PytestWorkflow.BUILD_TOOL_KEYWORDS,
-                "unittest": UnittestWorkflow.BUILD_TOOL_KEYWORDS,
-                "go": GoWorkflow.BUILD_TOOL_KEYWORDS,
-            }
-            aggregate_keywords = {kw for _ in build_tool_keywords.values() for kw in _}
-            keyword_counts = {keyword: 0 for keyword in aggregate_keywords}
-            aggregate_keyword_counts = {
-                build_tool: 0 for build_tool in build_tool_keywords
-            }
-
-            def _update_keyword_counts(keyword_counts, phrase):
-                if isinstance(phrase, str):
-                    for name in phrase.strip().lower().split(" "):
-                        for keyword in aggregate_keywords:
-                            if keyword in name:
-                                keyword_counts[keyword] += 1
+            scanner = GitHubWorkflowFactory.get_build_tool_scanner()
 
             # Load the workflow
-            doc = None
             if content == "":
                 with open(path, "r") as stream:
-                    doc = yaml.safe_load(stream)
-            else:
-                doc = yaml.safe_load(content)
+                    content = stream.read()
 
+            key = WorkflowCache.get_key(content)
+            build_tool = GitHubWorkflowFactory.__BUILD_TOOLS.get(key, key)
+            if build_tool != key:
+                return build_tool
+
+            # The cached document is shared, so it is only read
+            doc = GitHubWorkflow.DOC_CACHE.load(content)
             if doc is None:
+                GitHubWorkflowFactory.__BUILD_TOOLS.set(key, None)
                 return None
 
-            if True in doc:
-                doc["on"] = doc[True]
-                doc.pop(True)
-
             # Iterate over the workflow to find build tool names in the run commands
+            run_commands = []
             if "jobs" in doc and isinstance(doc["jobs"], dict):
                 for _, job in doc["jobs"].items():
                     if "steps" in job:
                         for step in job["steps"]:
                             if "run" in step:
-                                _update_keyword_counts(keyword_counts, step["run"])
-
-            # Aggregate keyword counts per build tool
-            for build_tool in build_tool_keywords:
-                for keyword in build_tool_keywords[build_tool]:
-                    aggregate_keyword_counts[build_tool] += keyword_counts[keyword]
+                                run_commands.append(step["run"])
+            aggregate_keyword_counts = scanner.get_counts(run_commands)
 
             # Return the build tool with the highest count
             max_build_tool = max(
                 aggregate_keyword_counts, key=aggregate_keyword_counts.get
             )
-            return (
+            build_tool = (
                 max_build_tool if aggregate_keyword_counts[max_build_tool] > 0 else None
             )
+            GitHubWorkflowFactory.__BUILD_TOOLS.set(key, build_tool)
+            return build_tool
         except yaml.YAMLError:
             return None
 
@@ -417,18 +529,14 @@ class GitHubWorkflowFactory:
         """
         Creates a workflow object according to the language and build system.
         """
+        # The workflow is read once for the identification and the parsing
+        if content == "":
+            with open(path, "r") as stream:
+                content = stream.read()
         build_tool = GitHubWorkflowFactory._identify_build_tool(path, content=content)
 
-        match (language, build_tool):
-            case ("java", "maven"):
-                return MavenWorkflow(path, content)
-            case ("java", "gradle"):
-                return GradleWorkflow(path, content)
-            case ("python", "pytest"):
-                return PytestWorkflow(path, content)
-            case ("python", "unittest"):
-                return UnittestWorkflow(path, content)
-            case ("go", "go"):
-                return GoWorkflow(path, content)
-            case (_, _):
-                return UnknownWorkflow(path, content)
+        # The workflow class is only imported when it is first used
+        workflow_class = WorkflowRegistry.get_workflow_class(language, build_tool)
+        if workflow_class is None:
+            return UnknownWorkflow(path, content)
+        return workflow_class(path, content)
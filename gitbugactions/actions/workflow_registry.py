@@ -0,0 +1,124 @@
+import logging
+import importlib
+import threading
+from importlib.metadata import entry_points
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Type
+
+
+@dataclass(frozen=True)
+class WorkflowRegistration:
+    language: str
+    build_tool: str
+    keywords: Tuple[str, ...]
+    # Path of the workflow class, in the "module:class" format
+    workflow_class: str
+
+
+class WorkflowRegistry:
+    """
+    Registry of the workflow classes of each (language, build tool) pair.
+
+    The language packages register their workflows when they are imported, and
+    other packages can register workflows through the "gitbugactions.workflows"
+    entry point group, whose entry points are modules that register workflows.
+    The registrations only hold the build tool keywords, the workflow classes are
+    imported the first time a workflow of their language and build tool is created.
+    """
+
+    ENTRY_POINT_GROUP = "gitbugactions.workflows"
+    __BUILTIN_PACKAGES = [
+        "gitbugactions.actions.java",
+        "gitbugactions.actions.python",
+        "gitbugactions.actions.go",
+    ]
+    __lock = threading.RLock()
+    __loaded = False
+    # Increased on each registration, to rebuild what depends on the registry
+    __version = 0
+    __registrations: Dict[Tuple[str, str], WorkflowRegistration] = {}
+    __classes: Dict[Tuple[str, str], Type] = {}
+
+    @staticmethod
+    def register(
+        language: str, build_tool: str, keywords: List[str], workflow_class: str
+    ):
+        """
+        Registers the workflow class used for a language and build tool.
+
+        Args:
+            language (str): Language of the repositories, in lower case
+            build_tool (str): Name of the build tool
+            keywords (List[str]): Keywords identifying the build tool in run commands
+            workflow_class (str): Path of the workflow class ("module:class")
+        """
+        with WorkflowRegistry.__lock:
+            key = (language, build_tool)
+            WorkflowRegistry.__registrations[key] = WorkflowRegistration(
+                language, build_tool, tuple(keywords), workflow_class
+            )
+            WorkflowRegistry.__classes.pop(key, None)
+            WorkflowRegistry.__version += 1
+
+    @staticmethod
+    def __load():
+        with WorkflowRegistry.__lock:
+            if WorkflowRegistry.__loaded:
+                return
+            WorkflowRegistry.__loaded = True
+
+            for package in WorkflowRegistry.__BUILTIN_PACKAGES:
+                importlib.import_module(package)
+            for entry_point in entry_points(group=WorkflowRegistry.ENTRY_POINT_GROUP):
+                try:
+                    entry_point.load()
+                except Exception:
+                    logging.exception(
+                        f"Failed to load the workflows of {entry_point.value}"
+                    )
+
+    @staticmethod
+    def get_version() -> int:
+        WorkflowRegistry.__load()
+        with WorkflowRegistry.__lock:
+            return WorkflowRegistry.__version
+
+    @staticmethod
+    def get_registrations() -> List[WorkflowRegistration]:
+        WorkflowRegistry.__load()
+        with WorkflowRegistry.__lock:
+            return list(WorkflowRegistry.__registrations.values())
+
+    @staticmethod
+    def get_build_tool_keywords() -> Dict[str, List[str]]:
+        """
+        Returns the keywords of each build tool, in registration order
+        """
+        build_tool_keywords: Dict[str, List[str]] = {}
+        for registration in WorkflowRegistry.get_registrations():
+            keywords = build_tool_keywords.setdefault(registration.build_tool, [])
+            # A build tool may be registered for multiple languages
+            for keyword in registration.keywords:
+                if keyword not in keywords:
+                    keywords.append(keyword)
+        return build_tool_keywords
+
+    @staticmethod
+    def get_workflow_class(language: str, build_tool: str) -> Optional[Type]:
+        """
+        Returns the workflow class for the language and build tool, importing it
+        if needed. None is returned if no workflow class is registered for them.
+        """
+        WorkflowRegistry.__load()
+        key = (language, build_tool)
+        with WorkflowRegistry.__lock:
+            if key in WorkflowRegistry.__classes:
+                return WorkflowRegistry.__classes[key]
+            registration = WorkflowRegistry.__registrations.get(key)
+            if registration is None:
+                return None
+
+            module, name = registration.workflow_class.split(":")
+            workflow_class = getattr(importlib.import_module(module), name)
+            WorkflowRegistry.__classes[key] = workflow_class
+            return workflow_class
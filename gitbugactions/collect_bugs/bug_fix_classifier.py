@@ -0,0 +1,51 @@
+import re
+import threading
+from typing import Dict, Iterable, List
+from nltk.stem import PorterStemmer
+
+
+class BugFixClassifier:
+    """
+    Classifies commit messages as bug fixes. A message is a bug fix if one of its
+    tokens (as split by nltk's wordpunct_tokenize) stems to "fix" with the Porter
+    stemmer.
+
+    The Porter stemmer only rewrites the suffix of a word and never produces an "x",
+    so a token can only stem to "fix" if its lowercase starts with "fix". Messages
+    without "fix" are rejected without tokenizing them, and only the candidate
+    tokens are stemmed, through a table shared by every classifier.
+    """
+
+    KEYWORD = "fix"
+    # Punctuation tokens of wordpunct_tokenize are never stemmed to a word
+    __WORD_PATTERN = re.compile(r"\w+")
+    __STEMMER = PorterStemmer()
+    __STEMS: Dict[str, str] = {}
+    __STEMS_LOCK = threading.Lock()
+
+    @staticmethod
+    def __stem(token: str) -> str:
+        stem = BugFixClassifier.__STEMS.get(token)
+        if stem is None:
+            with BugFixClassifier.__STEMS_LOCK:
+                stem = BugFixClassifier.__STEMMER.stem(token)
+                BugFixClassifier.__STEMS[token] = stem
+        return stem
+
+    def is_bug_fix(self, message: str) -> bool:
+        if BugFixClassifier.KEYWORD not in message.lower():
+            return False
+
+        for token in BugFixClassifier.__WORD_PATTERN.findall(message):
+            if (
+                token.lower().startswith(BugFixClassifier.KEYWORD)
+                and BugFixClassifier.__stem(token) == BugFixClassifier.KEYWORD
+            ):
+                return True
+        return False
+
+    def classify(self, messages: Iterable[str]) -> List[bool]:
+        """
+        Classifies a batch of commit messages
+        """
+        return [self.is_bug_fix(message) for message in messages]
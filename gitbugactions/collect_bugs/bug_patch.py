@@ -1,7 +1,8 @@
 import uuid
 import pygit2
+import hashlib
 import datetime
-from typing import List, Any, Dict, Set, Optional
+from typing import List, Any, Dict, Set, Optional, Tuple
 from enum import Enum
 from github import Repository
 from gitbugactions.github_api import GithubAPI
@@ -77,6 +78,7 @@ class BugPatch:
         self.change_type: ChangeType = ChangeType.get_change_type(
             self.bug_patch, self.non_code_patch
         )
+        self.__digest: Optional[str] = None
         self.actions: Set[Action] = actions
         self.strategy_used: str = "UNKNOWN"
         self.issues = None
@@ -84,7 +86,7 @@ class BugPatch:
         self.actions_runs: List[List[ActTestsRun]] = []
 
     def __flat_failed_tests(self, runs):
-        return sum(map(lambda act_run: act_run.failed_tests, runs), [])
+        return [test for act_run in runs for test in act_run.failed_tests]
 
     @property
     def prev_commit_passed(self):
@@ -170,6 +172,30 @@ class BugPatch:
                 file.target_file = file.source_file.replace("a/", "b/", 1)
         return patch
 
+    @staticmethod
+    def __get_patch_digest(patch: PatchSet) -> str:
+        return hashlib.sha256(str(patch).encode("utf-8")).hexdigest()
+
+    def get_test_states(self) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Returns the state tested by each phase (previous commit, previous commit with
+        diff, current commit): the commit checked out and the digests of the patches
+        applied on top of it. Phases with the same state have the same runs.
+        """
+        non_code_patch = ""
+        # Same condition as __apply_non_code_patch
+        if len(self.non_code_patch) > 0 and len(self.bug_patch) > 0:
+            non_code_patch = BugPatch.__get_patch_digest(self.non_code_patch)
+        return (
+            (self.previous_commit, non_code_patch),
+            (
+                self.previous_commit,
+                non_code_patch,
+                BugPatch.__get_patch_digest(self.test_patch),
+            ),
+            (self.commit,),
+        )
+
     def __set_commit(self, repo_clone: pygit2.Repository, commit: str):
         commit = repo_clone.revparse_single(commit)
         repo_clone.checkout_tree(commit)
@@ -182,21 +208,21 @@ class BugPatch:
         )
         repo_clone.set_head(commit.id)
 
-    def __apply_non_code_patch(self, repo_clone: pygit2.Repository):
+    def __apply_non_code_patch(self, executor: TestExecutor):
         # We only apply the non code patch when the bug patch is non-empty
         # Otherwise, we are testing the non code patch alone
         if len(self.non_code_patch) > 0 and len(self.bug_patch) > 0:
             try:
-                repo_clone.apply(pygit2.Diff.parse_diff(str(self.non_code_patch)))
+                executor.apply_patch(str(self.non_code_patch))
                 return True
             except pygit2.GitError:
                 # Invalid patches
                 return False
         return True
 
-    def __apply_test_patch(self, repo_clone: pygit2.Repository):
+    def __apply_test_patch(self, executor: TestExecutor):
         try:
-            repo_clone.apply(pygit2.Diff.parse_diff(str(self.test_patch)))
+            executor.apply_patch(str(self.test_patch))
             return True
         except pygit2.GitError:
             # Invalid patches
@@ -210,7 +236,7 @@ class BugPatch:
     ) -> Optional[List[ActTestsRun]]:
         executor.reset_repo()
         self.__set_commit(executor.repo_clone, self.previous_commit)
-        if not self.__apply_non_code_patch(executor.repo_clone):
+        if not self.__apply_non_code_patch(executor):
             return None
         return executor.run_tests(offline=offline, keep_containers=keep_containers)
 
@@ -222,9 +248,9 @@ class BugPatch:
     ) -> Optional[List[ActTestsRun]]:
         executor.reset_repo()
         self.__set_commit(executor.repo_clone, self.previous_commit)
-        if not self.__apply_non_code_patch(executor.repo_clone):
+        if not self.__apply_non_code_patch(executor):
             return None
-        if not self.__apply_test_patch(executor.repo_clone):
+        if not self.__apply_test_patch(executor):
             return None
         return executor.run_tests(offline=offline, keep_containers=keep_containers)
 
@@ -253,30 +279,36 @@ class BugPatch:
             set(),
         )
 
-    def __remove_patch_index(self, patch: PatchSet) -> str:
+    @staticmethod
+    def __get_normalized_patch_digest(patch: PatchSet) -> str:
+        # The index lines are removed since they depend on the blobs of the repo
         lines = str(patch).split("\n")
-        return "\n".join(list(filter(lambda line: not line.startswith("index"), lines)))
+        patch = "\n".join(filter(lambda line: not line.startswith("index"), lines))
+        return hashlib.sha256(patch.encode("utf-8")).hexdigest()
+
+    @property
+    def digest(self) -> str:
+        """
+        Digest of the bug, test and non code patches, ignoring their index lines.
+        Bug patches with the same changes have the same digest, even if they come
+        from different repositories (e.g. forks). It is computed on first use.
+        """
+        if self.__digest is None:
+            self.__digest = hashlib.sha256(
+                " ".join(
+                    BugPatch.__get_normalized_patch_digest(patch)
+                    for patch in (self.bug_patch, self.test_patch, self.non_code_patch)
+                ).encode("utf-8")
+            ).hexdigest()
+        return self.__digest
 
     def __hash__(self):
-        return hash(
-            (
-                self.__remove_patch_index(self.bug_patch),
-                self.__remove_patch_index(self.test_patch),
-                self.__remove_patch_index(self.non_code_patch),
-            )
-        )
+        return hash(self.digest)
 
     def __eq__(self, __value: object) -> bool:
         if not isinstance(__value, BugPatch):
             return False
-        return (
-            self.__remove_patch_index(self.bug_patch)
-            == self.__remove_patch_index(__value.bug_patch)
-            and self.__remove_patch_index(self.test_patch)
-            == self.__remove_patch_index(__value.test_patch)
-            and self.__remove_patch_index(self.non_code_patch)
-            == self.__remove_patch_index(__value.non_code_patch)
-        )
+        return self.digest == __value.digest
 
     def __ne__(self, __value: object) -> bool:
         return not self.__eq__(__value)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Set, Tuple
 from gitbugactions.collect_bugs.bug_patch import BugPatch
 from gitbugactions.actions.actions import ActTestsRun
 
@@ -7,23 +7,18 @@ from gitbugactions.actions.actions import ActTestsRun
 class CollectionStrategy(ABC):
     @staticmethod
     def _diff_tests(run_failed: List[ActTestsRun], run_passed: List[ActTestsRun]):
-        flat_failed_tests = sum(
-            map(lambda act_run: act_run.failed_tests, run_failed), []
-        )
-        flat_tests = sum(map(lambda act_run: act_run.tests, run_passed), [])
+        # The passed tests of each run are indexed once and shared by the strategies
+        passed_tests: Set[Tuple[str, str]] = set()
+        for act_run in run_passed:
+            passed_tests.update(act_run.tests.passed_keys)
         fixed, not_fixed = [], []
 
-        for failed_test in flat_failed_tests:
-            for test in flat_tests:
-                if (
-                    failed_test.classname == test.classname
-                    and failed_test.name == test.name
-                    and test.is_passed
-                ):
+        for act_run in run_failed:
+            for failed_test in act_run.failed_tests:
+                if (failed_test.classname, failed_test.name) in passed_tests:
                     fixed.append(failed_test)
-                    break
-            else:
-                not_fixed.append(failed_test)
+                else:
+                    not_fixed.append(failed_test)
 
         return fixed, not_fixed
 
@@ -0,0 +1,155 @@
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+from unidiff import PatchSet
+
+
+class CommitIndex:
+    """
+    Persistent index of the commits mined from a repository. It stores the result of
+    the expensive steps of the mining of each commit (classification of the message,
+    split of the patches and actions used), so that mining an updated repository
+    only processes the new commits. The entries are queried by commit when they are
+    needed, instead of being loaded at once.
+    """
+
+    __INDEX_DIR: str = os.environ.get(
+        "GITBUGACTIONS_COMMIT_INDEX_DIR",
+        os.path.join(tempfile.gettempdir(), "gitbugactions-commit-index"),
+    )
+    # Must be increased when the mining changes, to discard outdated indexes
+    __VERSION: int = 2
+    # Number of entries written in each transaction. The database is locked for
+    # the other processes while a transaction is open.
+    __BATCH_SIZE: int = 500
+
+    def __init__(self, repo_full_name: str):
+        os.makedirs(CommitIndex.__INDEX_DIR, exist_ok=True)
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+        self.connection = sqlite3.connect(
+            CommitIndex.get_index_path(repo_full_name),
+            timeout=60,
+            check_same_thread=False,
+        )
+        self.__create_tables()
+
+    @classmethod
+    def set_index_dir(cls, index_dir: str):
+        cls.__INDEX_DIR = index_dir
+
+    @classmethod
+    def get_index_path(cls, repo_full_name: str) -> str:
+        return os.path.join(cls.__INDEX_DIR, repo_full_name.replace("/", "-") + ".db")
+
+    def __create_tables(self):
+        with self.lock, self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != CommitIndex.__VERSION:
+                for table in ["commits", "patches", "actions"]:
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+                self.connection.execute(
+                    f"PRAGMA user_version = {CommitIndex.__VERSION}"
+                )
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS commits (oid TEXT PRIMARY KEY, is_bug_fix INTEGER NOT NULL)"
+            )
+            # The number of files of each patch are stored to skip the commits
+            # without a bug patch without parsing their patches
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS patches (
+                    oid TEXT PRIMARY KEY,
+                    bug_patch TEXT NOT NULL,
+                    test_patch TEXT NOT NULL,
+                    non_code_patch TEXT NOT NULL,
+                    bug_patch_files INTEGER NOT NULL,
+                    test_patch_files INTEGER NOT NULL,
+                    non_code_patch_files INTEGER NOT NULL
+                )"""
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS actions (oid TEXT PRIMARY KEY, actions TEXT NOT NULL)"
+            )
+
+    def __get(self, query: str, oid: str) -> Optional[Tuple]:
+        with self.lock:
+            return self.connection.execute(query, (oid,)).fetchone()
+
+    def __set(self, query: str, row: Tuple):
+        # The entries are committed in batches and by flush
+        with self.lock:
+            self.connection.execute(query, row)
+            self.pending_writes += 1
+            if self.pending_writes >= CommitIndex.__BATCH_SIZE:
+                self.connection.commit()
+                self.pending_writes = 0
+
+    def get_is_bug_fix(self, oid: str) -> Optional[bool]:
+        row = self.__get("SELECT is_bug_fix FROM commits WHERE oid = ?", oid)
+        return bool(row[0]) if row is not None else None
+
+    def set_is_bug_fix(self, oid: str, is_bug_fix: bool):
+        self.__set("INSERT OR REPLACE INTO commits VALUES (?, ?)", (oid, is_bug_fix))
+
+    def get_patch_sizes(self, oid: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns the number of files of the bug, test and non code patches of the
+        commit
+        """
+        return self.__get(
+            "SELECT bug_patch_files, test_patch_files, non_code_patch_files "
+            "FROM patches WHERE oid = ?",
+            oid,
+        )
+
+    def get_patches(self, oid: str) -> Optional[Tuple[PatchSet, PatchSet, PatchSet]]:
+        """
+        Returns the bug, test and non code patches of the commit
+        """
+        row = self.__get(
+            "SELECT bug_patch, test_patch, non_code_patch FROM patches WHERE oid = ?",
+            oid,
+        )
+        return tuple(map(PatchSet, row)) if row is not None else None
+
+    def set_patches(
+        self,
+        oid: str,
+        bug_patch: PatchSet,
+        test_patch: PatchSet,
+        non_code_patch: PatchSet,
+    ):
+        patches = (bug_patch, test_patch, non_code_patch)
+        self.__set(
+            "INSERT OR REPLACE INTO patches VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (oid, *map(str, patches), *map(len, patches)),
+        )
+
+    def get_actions(self, oid: str) -> Optional[List[str]]:
+        """
+        Returns the declarations of the actions used by the workflows of the commit
+        """
+        row = self.__get("SELECT actions FROM actions WHERE oid = ?", oid)
+        return json.loads(row[0]) if row is not None else None
+
+    def set_actions(self, oid: str, actions: List[str]):
+        self.__set(
+            "INSERT OR REPLACE INTO actions VALUES (?, ?)", (oid, json.dumps(actions))
+        )
+
+    def flush(self):
+        """
+        Writes the new entries to the index
+        """
+        with self.lock:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.connection.close()
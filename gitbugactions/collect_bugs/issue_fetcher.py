@@ -0,0 +1,191 @@
+from typing import Any, Dict, Iterable, List, Optional
+from github import Repository, UnknownObjectException, GithubException
+from gitbugactions.github_api import GithubAPI
+
+
+class IssueFetcher:
+    """
+    Fetches the issues and pull requests referenced by the commits of a repository.
+    Batches of issues are resolved, with their comments, labels and review comments,
+    by a single GraphQL query with an alias per issue, instead of several REST calls
+    per issue. The issues with more than a page of comments, labels or review
+    comments, or which the query fails to resolve, are fetched with the REST API.
+    """
+
+    BATCH_SIZE = 20
+    __QUERY = """
+fragment IssueFields on Issue {
+  title
+  body
+  comments(first: 100) { pageInfo { hasNextPage } nodes { body } }
+  labels(first: 100) { pageInfo { hasNextPage } nodes { name description } }
+}
+fragment PullRequestFields on PullRequest {
+  title
+  body
+  comments(first: 100) { pageInfo { hasNextPage } nodes { body } }
+  labels(first: 100) { pageInfo { hasNextPage } nodes { name description } }
+  reviewThreads(first: 100) {
+    pageInfo { hasNextPage }
+    nodes {
+      comments(first: 100) { pageInfo { hasNextPage } nodes { databaseId body } }
+    }
+  }
+}
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+%s
+  }
+}
+"""
+
+    def __init__(self, github: GithubAPI, repo_full_name: str):
+        self.github = github
+        self.repo_full_name = repo_full_name
+        self.__repo: Optional[Repository] = None
+
+    def __get_repo(self) -> Repository:
+        if self.__repo is None:
+            self.__repo = self.github.get_repo(self.repo_full_name)
+        return self.__repo
+
+    def fetch(self, numbers: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Returns the issues found by their number, in the format of
+        BugPatch.issues.
+        """
+        numbers = list(dict.fromkeys(numbers))
+        issues: Dict[int, Dict[str, Any]] = {}
+        for i in range(0, len(numbers), IssueFetcher.BATCH_SIZE):
+            batch = numbers[i : i + IssueFetcher.BATCH_SIZE]
+            missing = self.__fetch_batch(batch, issues)
+            for number in missing:
+                issue = self.__fetch_rest(number)
+                if issue is not None:
+                    issues[number] = issue
+        return issues
+
+    def __fetch_batch(
+        self, numbers: List[int], issues: Dict[int, Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Fetches a batch of issues with a GraphQL query. Returns the numbers which
+        must be fetched with the REST API.
+        """
+        aliases = "\n".join(
+            f"    issue{number}: issueOrPullRequest(number: {number}) "
+            "{ __typename ...IssueFields ...PullRequestFields }"
+            for number in numbers
+        )
+        owner, name = self.repo_full_name.split("/", 1)
+        try:
+            _, data = self.github.token.graphql_rate_limiter.request(
+                self.github.requester.requestJsonAndCheck,
+                "POST",
+                "/graphql",
+                input={
+                    "query": IssueFetcher.__QUERY % aliases,
+                    "variables": {"owner": owner, "name": name},
+                },
+            )
+        except GithubException:
+            return numbers
+
+        repository = (data.get("data") or {}).get("repository")
+        if repository is None:
+            return numbers
+        not_found = {
+            error["path"][-1]
+            for error in data.get("errors", [])
+            if error.get("type") == "NOT_FOUND" and len(error.get("path") or []) > 1
+        }
+
+        missing = []
+        for number in numbers:
+            node = repository.get(f"issue{number}")
+            if node is None:
+                if f"issue{number}" not in not_found:
+                    missing.append(number)
+                continue
+
+            issue = IssueFetcher.__parse_issue(number, node)
+            if issue is None:
+                missing.append(number)
+            else:
+                issues[number] = issue
+        return missing
+
+    @staticmethod
+    def __parse_issue(number: int, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Returns None if the issue has more than a page of some field.
+        """
+        is_pull_request = node["__typename"] == "PullRequest"
+        connections = [node["comments"], node["labels"]]
+        review_comments = None
+        if is_pull_request:
+            connections.append(node["reviewThreads"])
+            thread_comments = [
+                thread["comments"] for thread in node["reviewThreads"]["nodes"]
+            ]
+            connections.extend(thread_comments)
+            # The REST API lists the review comments in the order they were created
+            review_comments = [
+                comment["body"]
+                for comment in sorted(
+                    (
+                        comment
+                        for comments in thread_comments
+                        for comment in comments["nodes"]
+                    ),
+                    key=lambda comment: comment["databaseId"],
+                )
+            ]
+        if any(connection["pageInfo"]["hasNextPage"] for connection in connections):
+            return None
+
+        return {
+            "id": number,
+            "title": node["title"],
+            # The REST API returns null for empty bodies
+            "body": node["body"] or None,
+            "comments": [comment["body"] for comment in node["comments"]["nodes"]],
+            "labels": [
+                {"name": label["name"], "description": label["description"]}
+                for label in node["labels"]["nodes"]
+            ],
+            "is_pull_request": is_pull_request,
+            "review_comments": review_comments,
+        }
+
+    def __fetch_rest(self, number: int) -> Optional[Dict[str, Any]]:
+        try:
+            # GitHub's REST API considers every pull request an issue
+            # https://docs.github.com/en/rest/issues/issues?apiVersion=2022-11-28#get-an-issue
+            issue = self.__get_repo().get_issue(number)
+            is_pull_request = issue.pull_request is not None
+            comments, labels, review_comments = [], [], None
+
+            if is_pull_request:
+                review_comments = []
+                pull_request = issue.as_pull_request()
+                for comment in pull_request.get_review_comments():
+                    review_comments.append(comment.body)
+
+            for comment in issue.get_comments():
+                comments.append(comment.body)
+
+            for label in issue.get_labels():
+                labels.append({"name": label.name, "description": label.description})
+
+            return {
+                "id": number,
+                "title": issue.title,
+                "body": issue.body,
+                "comments": comments,
+                "labels": labels,
+                "is_pull_request": is_pull_request,
+                "review_comments": review_comments,
+            }
+        except (UnknownObjectException, GithubException):
+            return None
@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import hashlib
+import datetime
+import threading
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set
+from gitbugactions.collect_bugs.bug_patch import BugPatch
+from gitbugactions.actions.actions import ActTestsRun
+
+
+class RepoStatus(Enum):
+    # The possible bug patches of the repo were mined
+    MINED = 0
+    # Every possible bug patch of the repo was tested
+    DONE = 1
+
+
+class BugPatchStatus(Enum):
+    PENDING = 0
+    TESTED = 1
+    ERROR = 2
+
+
+class CollectionJournal:
+    """
+    Durable journal of a collect_bugs run. It records the status of each repo and
+    bug patch, so that a restarted run only executes the outstanding work.
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any] = None):
+        """
+        Args:
+            config (Dict[str, Any], optional): Configuration of the run (e.g. strategies
+                                               and filters). The journal is reset if it
+                                               was recorded with another configuration.
+        """
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        config_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self.lock, self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )"""
+            )
+            row = self.connection.execute(
+                "SELECT value FROM metadata WHERE key = 'config_hash'"
+            ).fetchone()
+            # The work recorded with another configuration is outdated
+            self.reset = row is None or row[0] != config_hash
+            if self.reset:
+                self.connection.execute("DROP TABLE IF EXISTS repos")
+                self.connection.execute("DROP TABLE IF EXISTS bug_patches")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES ('config_hash', ?)",
+                    (config_hash,),
+                )
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS repos (
+                    repository TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    possible_bug_patches INTEGER,
+                    head TEXT,
+                    updated_at TEXT NOT NULL
+                )"""
+            )
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS bug_patches (
+                    repository TEXT NOT NULL,
+                    commit_hash TEXT NOT NULL,
+                    previous_commit_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    is_bug_patch INTEGER,
+                    strategy TEXT,
+                    runs TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (repository, commit_hash)
+                )"""
+            )
+
+    @staticmethod
+    def __now() -> str:
+        return datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    @staticmethod
+    def summarize_runs(actions_runs: List[Optional[List[ActTestsRun]]]) -> List:
+        """
+        Summarizes the runs of each phase as (number of tests, number of failed
+        tests, run failed)
+        """
+        summary: List[Optional[List]] = []
+        for runs in actions_runs:
+            if runs is None:
+                summary.append(None)
+                continue
+            summary.append(
+                [[len(run.tests), len(run.failed_tests), run.failed] for run in runs]
+            )
+        return summary
+
+    def get_repo_status(self, repository: str) -> Optional[RepoStatus]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status FROM repos WHERE repository = ?", (repository,)
+            ).fetchone()
+        return RepoStatus[row[0]] if row is not None else None
+
+    def get_repo_head(self, repository: str) -> Optional[str]:
+        """
+        Returns the commit at the head of the repo when it was last mined
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT head FROM repos WHERE repository = ?", (repository,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_repo_mined(
+        self, repository: str, bug_patches: List[BugPatch], head: str = None
+    ):
+        now = CollectionJournal.__now()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?)",
+                (repository, RepoStatus.MINED.name, len(bug_patches), head, now),
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO bug_patches VALUES (?, ?, ?, ?, NULL, NULL, NULL, ?)",
+                [
+                    (
+                        repository,
+                        bug_patch.commit,
+                        bug_patch.previous_commit,
+                        BugPatchStatus.PENDING.name,
+                        now,
+                    )
+                    for bug_patch in bug_patches
+                ],
+            )
+
+    def finish_repo(self, repository: str) -> bool:
+        """
+        Marks the repo as done if all of its bug patches were tested.
+        Returns True if the repo was marked as done.
+        """
+        with self.lock, self.connection:
+            (outstanding,) = self.connection.execute(
+                "SELECT COUNT(*) FROM bug_patches WHERE repository = ? AND status != ?",
+                (repository, BugPatchStatus.TESTED.name),
+            ).fetchone()
+            if outstanding > 0:
+                return False
+            self.connection.execute(
+                "UPDATE repos SET status = ?, updated_at = ? WHERE repository = ?",
+                (RepoStatus.DONE.name, CollectionJournal.__now(), repository),
+            )
+            return True
+
+    def set_bug_patch_tested(
+        self, bug_patch: BugPatch, is_bug_patch: bool, runs_summary: List = None
+    ):
+        """
+        Args:
+            runs_summary (List, optional): Summary of the runs, if they were executed
+                                           elsewhere. Defaults to the summary of
+                                           `bug_patch.actions_runs`.
+        """
+        if runs_summary is None:
+            runs_summary = CollectionJournal.summarize_runs(bug_patch.actions_runs)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bug_patches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    bug_patch.repo.full_name,
+                    bug_patch.commit,
+                    bug_patch.previous_commit,
+                    BugPatchStatus.TESTED.name,
+                    int(is_bug_patch),
+                    bug_patch.strategy_used if is_bug_patch else None,
+                    json.dumps(runs_summary),
+                    CollectionJournal.__now(),
+                ),
+            )
+
+    def set_bug_patch_error(self, bug_patch: BugPatch):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE bug_patches SET status = ?, updated_at = ? WHERE repository = ? AND commit_hash = ?",
+                (
+                    BugPatchStatus.ERROR.name,
+                    CollectionJournal.__now(),
+                    bug_patch.repo.full_name,
+                    bug_patch.commit,
+                ),
+            )
+
+    def get_tested_commits(self, repository: str) -> Set[str]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT commit_hash FROM bug_patches WHERE repository = ? AND status = ?",
+                (repository, BugPatchStatus.TESTED.name),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get_bug_patch_statuses(self, repository: str) -> Dict[str, BugPatchStatus]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT commit_hash, status FROM bug_patches WHERE repository = ?",
+                (repository,),
+            ).fetchall()
+        return {row[0]: BugPatchStatus[row[1]] for row in rows}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
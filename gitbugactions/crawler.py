@@ -4,9 +4,10 @@ import tqdm
 import pandas as pd
 from abc import ABC, abstractmethod
 from github import Repository
+from typing import List, Tuple
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from gitbugactions.github_api import GithubAPI
+from gitbugactions.github_api import GithubAPI, GithubToken
 
 
 # FIXME change to custom logger
@@ -25,8 +26,19 @@ class RepoStrategy(ABC):
 class RepoCrawler:
     __GITHUB_CREATION_DATE = "2008-02-08"
     __PAGE_SIZE = 100
+    # Maximum number of results returned by a search of the GitHub API
+    __MAX_RESULTS = 1000
+    __DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+    # Pagination which partitions the creation range by the number of results
+    AUTO_PAGINATION = "auto"
 
-    def __init__(self, query: str, pagination_freq: str = None, n_workers: int = 1):
+    def __init__(
+        self,
+        query: str,
+        pagination_freq: str = None,
+        n_workers: int = 1,
+        n_search_workers: int = None,
+    ):
         """
         Args:
             query (str): String with the Github searching format
@@ -36,16 +48,30 @@ class RepoCrawler:
                 are obtained.
                 The possible values are listed here:
                 https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#timeseries-offset-aliases
+                The windows are only searched separately where the results exceed the
+                limit: the creation range is searched at once and split at the middle
+                window while it exceeds the limit, so consecutive sparse windows are
+                searched together.
+                If the value is 'auto', the creation range is split by the number of
+                results instead of at fixed windows.
+                Windows which still exceed the limit are split until they do not.
+            n_workers (int): Number of workers handling the repos.
+            n_search_workers (int): Number of windows searched in parallel. Each search
+                uses the next token, and is bounded by the search rate limiter of its
+                token. Defaults to the number of tokens.
         """
-        self.github: GithubAPI = GithubAPI(
-            per_page=RepoCrawler.__PAGE_SIZE,
-        )
         self.query: str = query
         self.pagination_freq: str = pagination_freq
         self.requests: int = 0
         self.n_workers = n_workers
         self.executor = ThreadPoolExecutor(max_workers=self.n_workers)
         self.futures = []
+        if n_search_workers is None:
+            n_search_workers = max(GithubToken.count_tokens(), 1)
+        self.search_executor = ThreadPoolExecutor(max_workers=n_search_workers)
+        self.search_futures = []
+        # Fetches the next page of each search while the current one is dispatched
+        self.page_executor = ThreadPoolExecutor(max_workers=n_search_workers)
 
     def __get_creation_range(self):
         created = list(
@@ -91,58 +117,160 @@ class RepoCrawler:
 
         return (start_date.isoformat(), end_date.isoformat())
 
-    def __search_repos(self, query: str, repo_strategy: RepoStrategy):
-        logging.info(f"Searching repos with query: {query}")
-        page_list = self.github.search_repositories(query)
-        totalCount = self.github.token.search_rate_limiter.request(
-            getattr, page_list, "totalCount"
-        )
+    def __search_repos(
+        self,
+        query: str,
+        repo_strategy: RepoStrategy,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        boundaries: List[datetime] = None,
+    ):
+        """
+        Searches the repos created between start_date and end_date (inclusive), or
+        the repos matching the query if the dates are not provided. If the results
+        exceed the limit, the window is split at the boundaries of the pagination
+        frequency between the dates.
+        """
+        search_query = query
+        if start_date is not None:
+            search_query += (
+                f" created:{start_date.strftime(RepoCrawler.__DATE_FORMAT)}"
+                f"..{end_date.strftime(RepoCrawler.__DATE_FORMAT)}"
+            )
+        logging.info(f"Searching repos with query: {search_query}")
+        # Each search uses the next token
+        github = GithubAPI(per_page=RepoCrawler.__PAGE_SIZE)
+        rate_limiter = github.token.search_rate_limiter
+        page_list = github.search_repositories(search_query)
+        totalCount = rate_limiter.request(getattr, page_list, "totalCount")
         if totalCount is None:
-            logging.error(f'Search "{query}" failed')
+            logging.error(f'Search "{search_query}" failed')
             return
-        elif totalCount == 1000:
+        elif totalCount > RepoCrawler.__MAX_RESULTS:
+            if boundaries:
+                middle = len(boundaries) // 2
+                self.__submit_search(
+                    query,
+                    repo_strategy,
+                    start_date,
+                    boundaries[middle] - timedelta(seconds=1),
+                    boundaries[:middle],
+                )
+                self.__submit_search(
+                    query,
+                    repo_strategy,
+                    boundaries[middle],
+                    end_date,
+                    boundaries[middle + 1 :],
+                )
+                return
+            elif start_date is not None and end_date > start_date:
+                # Split the window until the results fit in the limit. Each part is
+                # expected to have at most the limit if the repos are evenly spread.
+                n_windows = math.ceil(totalCount / RepoCrawler.__MAX_RESULTS)
+                for window in RepoCrawler.__split_window(
+                    start_date, end_date, n_windows
+                ):
+                    self.__submit_search(query, repo_strategy, *window)
+                return
             logging.warning(
-                f"1000 results limit of the GitHub API was reached.\nQuery: {query}"
+                "1000 results limit of the GitHub API was reached.\n"
+                f"Query: {search_query}"
+            )
+
+        n_pages = math.ceil(
+            min(totalCount, RepoCrawler.__MAX_RESULTS) / RepoCrawler.__PAGE_SIZE
+        )
+        next_page = None
+        if n_pages > 0:
+            next_page = self.page_executor.submit(
+                rate_limiter.request, page_list.get_page, 0
             )
-        n_pages = math.ceil(totalCount / RepoCrawler.__PAGE_SIZE)
         for p in range(n_pages):
-            repos = self.github.token.search_rate_limiter.request(page_list.get_page, p)
-            results = []
+            repos = next_page.result()
+            if p + 1 < n_pages:
+                next_page = self.page_executor.submit(
+                    rate_limiter.request, page_list.get_page, p + 1
+                )
             for repo in repos:
                 args = (repo,)
                 self.futures.append(
                     self.executor.submit(repo_strategy.handle_repo, *args)
                 )
 
+    @staticmethod
+    def __split_window(
+        start_date: datetime, end_date: datetime, n_windows: int
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Splits the range between start_date and end_date (inclusive) in n_windows
+        consecutive windows. The windows have a precision of one second.
+        """
+        seconds = int((end_date - start_date).total_seconds())
+        n_windows = max(min(n_windows, seconds + 1), 2)
+        windows = []
+        for i in range(n_windows):
+            window_start = start_date + timedelta(seconds=seconds * i // n_windows)
+            if i > 0:
+                window_start += timedelta(seconds=1)
+            window_end = start_date + timedelta(seconds=seconds * (i + 1) // n_windows)
+            if window_start <= window_end:
+                windows.append((window_start, window_end))
+        return windows
+
+    def __submit_search(
+        self,
+        query: str,
+        repo_strategy: RepoStrategy,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        boundaries: List[datetime] = None,
+    ):
+        self.search_futures.append(
+            self.search_executor.submit(
+                self.__search_repos,
+                query,
+                repo_strategy,
+                start_date,
+                end_date,
+                boundaries,
+            )
+        )
+
+    def __wait_searches(self):
+        # Searches submit new searches when they split their window
+        i = 0
+        while i < len(self.search_futures):
+            self.search_futures[i].result()
+            i += 1
+
     def get_repos(self, repo_strategy: RepoStrategy):
         if self.pagination_freq is not None:
             creation_range = self.__get_creation_range()
-            date_ranges = pd.date_range(
-                start=creation_range[0],
-                end=creation_range[1],
-                freq=self.pagination_freq,
-                inclusive="neither",
-            )
+            if self.pagination_freq == RepoCrawler.AUTO_PAGINATION:
+                # The whole range is split by __search_repos if needed
+                boundaries = []
+            else:
+                boundaries = [
+                    date.to_pydatetime()
+                    for date in pd.date_range(
+                        start=creation_range[0],
+                        end=creation_range[1],
+                        freq=self.pagination_freq,
+                        inclusive="neither",
+                    )
+                ]
 
             query = list(
                 filter(lambda x: not x.startswith("created:"), self.query.split(" "))
             )
             query = " ".join(query)
-            start_date = creation_range[0]
-
-            for i in range(len(date_ranges)):
-                end_date = date_ranges[i] - timedelta(seconds=1)
-                created_filter = (
-                    f" created:{start_date}..{end_date.strftime('%Y-%m-%dT%H:%M:%S')}"
-                )
-                self.__search_repos(query + created_filter, repo_strategy)
-                start_date = date_ranges[i].strftime("%Y-%m-%dT%H:%M:%S")
-
-            end_date = creation_range[1]
-            created_filter = f" created:{start_date}..{end_date}"
-            self.__search_repos(query + created_filter, repo_strategy)
+            start_date = datetime.fromisoformat(creation_range[0])
+            end_date = datetime.fromisoformat(creation_range[1])
+            self.__submit_search(query, repo_strategy, start_date, end_date, boundaries)
+            self.__wait_searches()
 
             for future in tqdm.tqdm(as_completed(self.futures)):
                 future.result()
         else:
-            return self.__search_repos(query, repo_strategy)
+            return self.__search_repos(self.query, repo_strategy)
@@ -0,0 +1,306 @@
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+import traceback
+from abc import ABC, abstractmethod
+from multiprocessing.managers import BaseManager
+from typing import Callable, Dict, Optional, Tuple
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Parses an address in the format host:port
+    """
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def get_authkey() -> bytes:
+    if "GITBUGACTIONS_AUTHKEY" not in os.environ:
+        logging.error("No environment variable GITBUGACTIONS_AUTHKEY provided.")
+        exit(1)
+    return os.environ["GITBUGACTIONS_AUTHKEY"].encode("utf-8")
+
+
+class JobQueue(ABC):
+    """
+    Queue from which the workers take the jobs of a coordinator and to which they
+    send the results. Jobs and results are dicts with (at least) an "id" and a
+    "type".
+    """
+
+    @abstractmethod
+    def get_job(self, timeout: float = None) -> Optional[Dict]:
+        """
+        Returns None if no job is available before the timeout
+        """
+        pass
+
+    @abstractmethod
+    def put_result(self, result: Dict):
+        pass
+
+
+class LocalJobQueue(JobQueue):
+    """
+    In-process job queue. Used as a stand-in for the network queue and by the
+    coordinator to put the jobs and get the results of the queues it serves.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+
+    def put_job(self, job: Dict):
+        self.jobs.put(job)
+
+    def get_job(self, timeout: float = None) -> Optional[Dict]:
+        try:
+            return self.jobs.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_result(self, result: Dict):
+        self.results.put(result)
+
+    def get_result(self, timeout: float = None) -> Optional[Dict]:
+        """
+        Returns None if no result is available before the timeout
+        """
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class JobQueueServer(LocalJobQueue):
+    """
+    Serves the job queue to the workers on the local network. Each job handed out
+    to a worker is leased until a deadline, which the worker extends with
+    heartbeats while it is alive. The job is requeued if its lease expires (e.g.
+    the worker died or disconnected) or if it runs for longer than `job_timeout`.
+    A job which was handed out `max_attempts` times without a result gets an
+    error result instead.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        authkey: bytes,
+        lease_timeout: float = 60,
+        job_timeout: Optional[float] = None,
+        max_attempts: int = 3,
+    ):
+        """
+        Args:
+            lease_timeout (float, optional): Seconds without heartbeats after which a
+                                             worker is considered dead. Defaults to 60.
+            job_timeout (Optional[float], optional): Maximum seconds a job may run.
+                                                     Defaults to no limit.
+            max_attempts (int, optional): Number of times a job is handed out before
+                                          it fails. Defaults to 3.
+        """
+        super().__init__()
+        self.lease_timeout = lease_timeout
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self.leases_lock = threading.Lock()
+        # Jobs handed out to the workers, by lease id
+        self.leases: Dict[str, Dict] = {}
+        self.attempts: Dict[str, int] = {}
+        self.stop_event = threading.Event()
+
+        class Manager(BaseManager):
+            pass
+
+        Manager.register(
+            "get_job_queue",
+            callable=lambda: self,
+            exposed=("lease_job", "put_result", "renew_leases"),
+        )
+        self.server = Manager(address=address, authkey=authkey).get_server()
+        self.address: Tuple[str, int] = self.server.address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.__monitor_leases, daemon=True).start()
+        logging.info(f"Serving job queue on {self.address[0]}:{self.address[1]}")
+
+    def lease_job(self, worker: str, timeout: float = None) -> Optional[Dict]:
+        """
+        Hands out a job to `worker`. The job has a "lease" which must be sent back
+        with its result.
+        """
+        job = self.get_job(timeout=timeout)
+        if job is None:
+            return None
+
+        lease_id = str(uuid.uuid4())
+        now = time.monotonic()
+        with self.leases_lock:
+            self.attempts[job["id"]] = self.attempts.get(job["id"], 0) + 1
+            self.leases[lease_id] = {
+                "job": job,
+                "worker": worker,
+                "expires_at": now + self.lease_timeout,
+                "deadline": (
+                    now + self.job_timeout if self.job_timeout is not None else None
+                ),
+            }
+        return dict(job, lease=lease_id)
+
+    def renew_leases(self, worker: str):
+        """
+        Heartbeat of `worker`, which extends the leases of its jobs
+        """
+        expires_at = time.monotonic() + self.lease_timeout
+        with self.leases_lock:
+            for lease in self.leases.values():
+                if lease["worker"] == worker:
+                    lease["expires_at"] = expires_at
+
+    def put_result(self, result: Dict):
+        if "lease" in result:
+            result = dict(result)
+            with self.leases_lock:
+                lease = self.leases.pop(result.pop("lease"), None)
+                # The job was requeued, so another worker is responsible for it
+                if lease is None:
+                    return
+                self.attempts.pop(result["id"], None)
+        super().put_result(result)
+
+    def __requeue_expired_jobs(self):
+        now = time.monotonic()
+        with self.leases_lock:
+            expired = [
+                lease_id
+                for lease_id, lease in self.leases.items()
+                if now >= lease["expires_at"]
+                or (lease["deadline"] is not None and now >= lease["deadline"])
+            ]
+            for lease_id in expired:
+                job = self.leases.pop(lease_id)["job"]
+                attempts = self.attempts[job["id"]]
+                if attempts < self.max_attempts:
+                    logging.warning(
+                        f"The lease of job {job['id']} expired. Requeueing it..."
+                    )
+                    self.jobs.put(job)
+                    continue
+
+                del self.attempts[job["id"]]
+                self.results.put(
+                    {
+                        "id": job["id"],
+                        "type": job["type"],
+                        "error": f"The lease of the job expired {attempts} times "
+                        "(the workers timed out or disconnected)",
+                    }
+                )
+
+    def __monitor_leases(self):
+        while not self.stop_event.wait(min(1, self.lease_timeout / 2)):
+            self.__requeue_expired_jobs()
+
+    def shutdown(self):
+        self.stop_event.set()
+        # The stop event is only created once the server starts serving
+        if hasattr(self.server, "stop_event"):
+            self.server.stop_event.set()
+        self.server.listener.close()
+
+
+class RemoteJobQueue(JobQueue):
+    """
+    Job queue served by a JobQueueServer running on another host. A heartbeat
+    keeps the leases of the jobs handed out to this queue alive.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        authkey: bytes,
+        heartbeat_interval: float = 10,
+    ):
+        class Manager(BaseManager):
+            pass
+
+        Manager.register("get_job_queue")
+        manager = Manager(address=address, authkey=authkey)
+        manager.connect()
+        self.job_queue = manager.get_job_queue()
+        self.worker = str(uuid.uuid4())
+        self.heartbeat_interval = heartbeat_interval
+        self.stop_event = threading.Event()
+        threading.Thread(target=self.__heartbeat, daemon=True).start()
+
+    def __heartbeat(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            try:
+                self.job_queue.renew_leases(self.worker)
+            except (EOFError, ConnectionError):
+                return
+
+    def get_job(self, timeout: float = None) -> Optional[Dict]:
+        return self.job_queue.lease_job(self.worker, timeout)
+
+    def put_result(self, result: Dict):
+        self.job_queue.put_result(result)
+
+    def close(self):
+        self.stop_event.set()
+
+
+class JobWorker:
+    """
+    Executes the jobs of a job queue with the handler registered for their type.
+    The result of a job is {"id", "type", "result"} or {"id", "type", "error"}
+    if the handler raised an exception.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        handlers: Dict[str, Callable[[Dict], Dict]],
+        n_workers: int = 1,
+    ):
+        self.job_queue = job_queue
+        self.handlers = handlers
+        self.n_workers = n_workers
+        self.stop_event = threading.Event()
+
+    def __run_job(self, job: Dict) -> Dict:
+        result = {"id": job["id"], "type": job["type"]}
+        if "lease" in job:
+            result["lease"] = job["lease"]
+        try:
+            result["result"] = self.handlers[job["type"]](job)
+        except Exception:
+            logging.error(
+                f"Error while running job {job['id']}: {traceback.format_exc()}"
+            )
+            result["error"] = traceback.format_exc()
+        return result
+
+    def __work(self):
+        while not self.stop_event.is_set():
+            try:
+                job = self.job_queue.get_job(timeout=1)
+                if job is None:
+                    continue
+                self.job_queue.put_result(self.__run_job(job))
+            except (EOFError, ConnectionError):
+                logging.info("The coordinator closed the connection. Stopping...")
+                return
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        threads = [threading.Thread(target=self.__work) for _ in range(self.n_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
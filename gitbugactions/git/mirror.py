@@ -0,0 +1,177 @@
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Set
+
+
+class RepoMirrorManager:
+    """
+    Persistent store of bare mirrors of the cloned repositories. Every clone is
+    created from the local mirror, so each repository is only downloaded over the
+    network once. Clones hardlink the objects of the mirror instead of borrowing
+    them through git alternates, so their `.git` is self-contained and still works
+    when the work tree is copied to a container or an image.
+    """
+
+    # Only the branches and tags are mirrored (e.g., not the refs/pull/* of GitHub)
+    __REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+    __MIRRORS_DIR: str = os.environ.get(
+        "GITBUGACTIONS_MIRRORS_DIR",
+        os.path.join(tempfile.gettempdir(), "gitbugactions-mirrors"),
+    )
+    __LOCKS: Dict[str, threading.Lock] = dict()
+    __LOCKS_LOCK: threading.Lock = threading.Lock()
+    # Mirrors already fetched by this process
+    __UPDATED: Set[str] = set()
+
+    @classmethod
+    def set_mirrors_dir(cls, mirrors_dir: str):
+        with cls.__LOCKS_LOCK:
+            cls.__MIRRORS_DIR = mirrors_dir
+            cls.__UPDATED.clear()
+
+    @staticmethod
+    def normalize_url(clone_url: str) -> str:
+        url = clone_url.strip().rstrip("/")
+        if url.endswith(".git"):
+            url = url[: -len(".git")]
+        return url.lower()
+
+    @classmethod
+    def get_mirror_path(cls, clone_url: str) -> str:
+        url = RepoMirrorManager.normalize_url(clone_url)
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        name = "-".join(url.split("/")[-2:]).replace(":", "-")
+        return os.path.join(cls.__MIRRORS_DIR, f"{name}-{digest[:16]}.git")
+
+    @classmethod
+    def __get_lock(cls, mirror_path: str) -> threading.Lock:
+        with cls.__LOCKS_LOCK:
+            if mirror_path not in cls.__LOCKS:
+                cls.__LOCKS[mirror_path] = threading.Lock()
+            return cls.__LOCKS[mirror_path]
+
+    @staticmethod
+    def __git(args, cwd=None):
+        run = subprocess.run(["git"] + args, cwd=cwd, capture_output=True)
+        if run.returncode != 0:
+            raise RuntimeError(
+                f"git {' '.join(args)} failed: {run.stderr.decode('utf-8')}"
+            )
+        return run
+
+    @staticmethod
+    def __is_mirror(mirror_path: str) -> bool:
+        run = subprocess.run(
+            ["git", "rev-parse", "--is-bare-repository"],
+            cwd=mirror_path,
+            capture_output=True,
+        )
+        return run.returncode == 0 and run.stdout.strip() == b"true"
+
+    @staticmethod
+    def __configure_remote(mirror_path: str):
+        first_refspec, *refspecs = RepoMirrorManager.__REFSPECS
+        RepoMirrorManager.__git(
+            ["config", "--replace-all", "remote.origin.fetch", first_refspec],
+            cwd=mirror_path,
+        )
+        for refspec in refspecs:
+            RepoMirrorManager.__git(
+                ["config", "--add", "remote.origin.fetch", refspec], cwd=mirror_path
+            )
+        # Mirrors created with `git clone --mirror` also fetched every other ref
+        subprocess.run(
+            ["git", "config", "--unset", "remote.origin.mirror"],
+            cwd=mirror_path,
+            capture_output=True,
+        )
+        refs = RepoMirrorManager.__git(
+            ["for-each-ref", "--format=delete %(refname)", "refs/pull"],
+            cwd=mirror_path,
+        ).stdout
+        if len(refs) > 0:
+            subprocess.run(
+                ["git", "update-ref", "--stdin"],
+                cwd=mirror_path,
+                input=refs,
+                capture_output=True,
+            )
+
+    @staticmethod
+    def __fetch(mirror_path: str):
+        RepoMirrorManager.__git(
+            ["fetch", "--prune", "--quiet", "origin"], cwd=mirror_path
+        )
+        # Clones check out the default branch of the remote
+        run = RepoMirrorManager.__git(
+            ["ls-remote", "--symref", "origin", "HEAD"], cwd=mirror_path
+        )
+        for line in run.stdout.decode("utf-8").splitlines():
+            if line.startswith("ref: ") and line.endswith("\tHEAD"):
+                RepoMirrorManager.__git(
+                    ["symbolic-ref", "HEAD", line[len("ref: ") : -len("\tHEAD")]],
+                    cwd=mirror_path,
+                )
+                break
+
+    @classmethod
+    def update_mirror(cls, clone_url: str, refresh: bool = False) -> str:
+        """
+        Creates the mirror of the repository if it does not exist yet. Otherwise,
+        the mirror is incrementally fetched once per process (or when `refresh`
+        is True). Returns the path to the mirror.
+        """
+        mirror_path = cls.get_mirror_path(clone_url)
+
+        with cls.__get_lock(mirror_path):
+            if os.path.exists(mirror_path):
+                if refresh or mirror_path not in cls.__UPDATED:
+                    logging.info(f"Updating mirror of {clone_url}")
+                    RepoMirrorManager.__configure_remote(mirror_path)
+                    RepoMirrorManager.__fetch(mirror_path)
+                    cls.__UPDATED.add(mirror_path)
+                return mirror_path
+
+            logging.info(f"Mirroring {clone_url} to {mirror_path}")
+            os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+            # Clone to a temporary path so that interrupted clones are never used
+            tmp_path = f"{mirror_path}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            try:
+                RepoMirrorManager.__git(["init", "--bare", "--quiet", tmp_path])
+                RepoMirrorManager.__git(
+                    ["remote", "add", "origin", clone_url], cwd=tmp_path
+                )
+                RepoMirrorManager.__configure_remote(tmp_path)
+                RepoMirrorManager.__fetch(tmp_path)
+                try:
+                    os.rename(tmp_path, mirror_path)
+                except OSError:
+                    # Another process created the mirror at the same time
+                    if not RepoMirrorManager.__is_mirror(mirror_path):
+                        raise
+                    logging.info(f"Using the mirror of {clone_url} of another process")
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+            except Exception:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+            cls.__UPDATED.add(mirror_path)
+            return mirror_path
+
+    @classmethod
+    def clone(cls, clone_url: str, path: str):
+        """
+        Clones the repository to `path` from its local mirror. The objects of the
+        mirror are hardlinked (or copied across file systems) instead of shared
+        with `--shared`, so the clone does not depend on the mirror. Its origin
+        points to `clone_url`.
+        """
+        mirror_path = cls.update_mirror(clone_url)
+        RepoMirrorManager.__git(["clone", "--local", "--quiet", mirror_path, path])
+        RepoMirrorManager.__git(["remote", "set-url", "origin", clone_url], cwd=path)
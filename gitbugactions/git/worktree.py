@@ -0,0 +1,146 @@
+import os
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+import pygit2
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+class WorktreeManager:
+    """
+    Pool of work trees of a repository clone, used to test bugs concurrently. Each
+    work tree is a local clone of the repository clone, which hardlinks its objects
+    instead of copying the whole repository. Unlike a `git worktree`, whose `.git`
+    file points to the gitdir of the host, the `.git` of each work tree is
+    self-contained, so git keeps working when act copies the work tree to a
+    container. Released work trees are cleaned and reused.
+    """
+
+    def __init__(self, repo_clone: pygit2.Repository):
+        self.repo_clone = repo_clone
+        self.lock = threading.Lock()
+        self.worktrees: List[str] = []
+        self.free_worktrees: List[str] = []
+
+    @staticmethod
+    def __git(args, cwd: str):
+        run = subprocess.run(["git"] + args, cwd=cwd, capture_output=True)
+        if run.returncode != 0:
+            raise RuntimeError(
+                f"git {' '.join(args)} failed: {run.stderr.decode('utf-8')}"
+            )
+        return run
+
+    def __create_worktree(self) -> str:
+        path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
+        WorktreeManager.__git(
+            [
+                "clone",
+                "--local",
+                "--no-checkout",
+                "--quiet",
+                self.repo_clone.path,
+                path,
+            ],
+            cwd=self.repo_clone.workdir,
+        )
+        # Same remote as the repository clone, as if it was copied
+        if "origin" in list(self.repo_clone.remotes.names()):
+            origin_url = self.repo_clone.remotes["origin"].url
+            WorktreeManager.__git(["remote", "set-url", "origin", origin_url], cwd=path)
+        # Avoids the "too many open files" bug (see PatchCollector)
+        WorktreeManager.__git(["config", "gc.auto", "0"], cwd=path)
+        return path
+
+    def __detach(self, path: str, commit: str):
+        exists = subprocess.run(
+            ["git", "cat-file", "-e", f"{commit}^{{commit}}"],
+            cwd=path,
+            capture_output=True,
+        )
+        if exists.returncode != 0:
+            # The commit was created or fetched by the repository clone after the
+            # work tree was created
+            WorktreeManager.__git(
+                [
+                    "fetch",
+                    "--quiet",
+                    self.repo_clone.path,
+                    "+refs/heads/*:refs/remotes/origin/*",
+                    "+refs/tags/*:refs/tags/*",
+                    commit,
+                ],
+                cwd=path,
+            )
+        WorktreeManager.__git(
+            ["checkout", "--force", "--detach", "--quiet", commit], cwd=path
+        )
+
+    def acquire(self, commit: str) -> pygit2.Repository:
+        """
+        Returns a clean work tree detached at `commit`
+        """
+        with self.lock:
+            path = self.free_worktrees.pop() if len(self.free_worktrees) > 0 else None
+
+        if path is None:
+            path = self.__create_worktree()
+            with self.lock:
+                self.worktrees.append(path)
+
+        try:
+            self.__detach(path, commit)
+        except RuntimeError:
+            with self.lock:
+                self.__remove_worktree(path)
+            raise
+        return pygit2.Repository(path)
+
+    def release(self, worktree: pygit2.Repository):
+        """
+        Cleans up the work tree for any untracked or modified files and returns it
+        to the pool
+        """
+        path = os.path.normpath(worktree.workdir)
+        worktree.free()
+        try:
+            WorktreeManager.__git(["reset", "--hard", "--quiet"], cwd=path)
+            WorktreeManager.__git(
+                ["clean", "-f", "-f", "-d", "-x", "--quiet"], cwd=path
+            )
+        except RuntimeError:
+            logging.warning(f"Error while cleaning worktree {path}. Discarding it...")
+            with self.lock:
+                self.__remove_worktree(path)
+            return
+
+        with self.lock:
+            self.free_worktrees.append(path)
+
+    @contextmanager
+    def checkout(self, commit: str) -> Iterator[pygit2.Repository]:
+        worktree = self.acquire(commit)
+        try:
+            yield worktree
+        finally:
+            self.release(worktree)
+
+    def __remove_worktree(self, path: str):
+        if os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
+        if path in self.worktrees:
+            self.worktrees.remove(path)
+        if path in self.free_worktrees:
+            self.free_worktrees.remove(path)
+
+    def cleanup(self):
+        """
+        Removes all the work trees.
+        """
+        with self.lock:
+            for path in list(self.worktrees):
+                self.__remove_worktree(path)
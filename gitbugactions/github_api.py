@@ -1,61 +1,195 @@
 import os
 import time
+import sqlite3
+import hashlib
 import threading
 import logging
+import requests
 
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
 from github import Github, RateLimitExceededException
-from datetime import datetime
 from functools import partial
+from gitbugactions.http_cache import CachedHTTPSRequestsConnectionClass
 
 
 class RateLimiter:
     """
-    Rate Limiter for the Github API
+    Token bucket rate limiter for a resource of the Github API (core, search, graphql).
+    The bucket holds up to requests_limit requests and is refilled at
+    requests_limit / reset_seconds requests per second. The remaining requests
+    and reset time returned in the headers of the responses of the API correct
+    the bucket.
+
+    Requests reserve their slot while holding the lock, and wait for it without
+    the lock, so the threads sharing a token are woken up in the order of their
+    reservations. If a TokenPool is provided, the bucket is stored in the pool and
+    shared with the other processes using it.
     """
 
-    def __init__(self, requests_limit: int, reset_seconds: int):
+    def __init__(
+        self,
+        requests_limit: int,
+        reset_seconds: int,
+        pool: Optional["TokenPool"] = None,
+        key: Optional[str] = None,
+    ):
+        # Number of requests made
         self.requests = 0
         self.requests_limit = requests_limit
         self.reset_seconds = reset_seconds
-        self.first_request = datetime.now()
+        self.rate = requests_limit / reset_seconds
+        # Requests available in the bucket. It is negative when requests are waiting.
+        self.available: float = requests_limit
+        self.last_refill = time.time()
+        # Set when the API reports that no requests remain until this timestamp
+        self.reset_time: Optional[float] = None
+        # End of the current window of the API, when the budget is fully restored
+        self.window_reset: Optional[float] = None
         self.lock = threading.Lock()
+        self.pool = pool
+        self.key = key
 
-    def request(self, fn, *args, **kwargs):
+    @contextmanager
+    def __bucket(self) -> Iterator[float]:
+        """
+        Holds the bucket, refilled up to the current time, while it is updated.
+        """
         with self.lock:
-            time_after_reset = (datetime.now() - self.first_request).total_seconds()
-            retries = 3
-            if self.requests == 0:
-                self.first_request = datetime.now()
-            elif time_after_reset > self.reset_seconds:
-                self.requests = 0
-                self.first_request = datetime.now()
-            if self.requests == self.requests_limit:
-                time.sleep(self.reset_seconds - time_after_reset)
-                self.requests = 0
+            if self.pool is None:
+                now = time.time()
+                self.__refill(now)
+                yield now
+                return
+
+            with self.pool.bucket(self.key) as bucket:
+                if bucket.state is not None:
+                    (
+                        self.available,
+                        self.last_refill,
+                        self.reset_time,
+                        self.window_reset,
+                    ) = bucket.state
+                now = time.time()
+                self.__refill(now)
+                yield now
+                bucket.state = (
+                    self.available,
+                    self.last_refill,
+                    self.reset_time,
+                    self.window_reset,
+                )
+
+    def __refill(self, now: float):
+        if (self.reset_time is not None and now >= self.reset_time) or (
+            self.window_reset is not None and now >= self.window_reset
+        ):
+            # The requests waiting for the reset are paid by the new window
+            self.available = min(self.available, 0) + self.requests_limit
+            if self.reset_time is not None and now >= self.reset_time:
+                self.reset_time = None
+            if self.window_reset is not None and now >= self.window_reset:
+                self.window_reset = None
+        if self.reset_time is None:
+            self.available = min(
+                self.available + (now - self.last_refill) * self.rate,
+                self.requests_limit,
+            )
+        self.last_refill = now
+
+    def __reserve(self) -> float:
+        """
+        Reserves a request and returns the number of seconds to wait before it can
+        be made.
+        """
+        with self.__bucket() as now:
+            self.available -= 1
+            self.requests += 1
+            if self.available >= 0:
+                return 0
+            elif self.reset_time is not None:
+                return self.reset_time - now
+            return -self.available / self.rate
+
+    @property
+    def remaining(self) -> int:
+        with self.__bucket():
+            return max(int(self.available), 0)
+
+    def get_available_time(self, requests: int) -> float:
+        """
+        Returns the timestamp at which the bucket is expected to have the given
+        number of requests available.
+        """
+        with self.__bucket() as now:
+            if self.available >= requests:
+                return now
+            elif self.reset_time is not None:
+                return self.reset_time
+            refill_time = now + (requests - self.available) / self.rate
+            if self.window_reset is not None:
+                return min(refill_time, self.window_reset)
+            return refill_time
+
+    def try_acquire(self) -> bool:
+        """
+        Reserves a request if one is available without waiting.
+        """
+        with self.__bucket():
+            if self.available < 1:
+                return False
+            self.available -= 1
             self.requests += 1
+            return True
+
+    def acquire(self):
+        wait = self.__reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, remaining: int, reset_time: float):
+        """
+        Updates the bucket with the rate limit reported by the API.
+
+        Args:
+            remaining (int): Requests remaining in the current window of the API.
+            reset_time (float): Timestamp of the end of the current window.
+        """
+        with self.__bucket() as now:
+            self.available = min(self.available, remaining)
+            if reset_time > now:
+                self.window_reset = reset_time
+            if remaining <= 0 and reset_time > now:
+                self.reset_time = max(self.reset_time or 0, reset_time)
 
-        while retries > 0:
+    def refund(self):
+        """
+        Returns a request which the API did not count against the rate limit.
+        """
+        with self.__bucket():
+            self.available = min(self.available + 1, self.requests_limit)
+
+    def request(self, fn, *args, **kwargs):
+        retries = 3
+        while True:
+            self.acquire()
             try:
                 return fn(*args, **kwargs)
             except RateLimitExceededException as exc:
-                with self.lock:
-                    logging.warning(f"Github Rate Limit Exceeded: {exc.headers}")
-                    reset_time = datetime.fromtimestamp(
-                        int(exc.headers["x-ratelimit-reset"])
-                    )
-                    retry_after = (reset_time - datetime.now()).total_seconds() + 1
-                    retry_after = max(
-                        retry_after, 0
-                    )  # In case we hit a negative total_seconds
-                    time.sleep(retry_after)
-                    retries -= 1
+                logging.warning(f"Github Rate Limit Exceeded: {exc.headers}")
+                retries -= 1
                 if retries == 0:
                     raise exc
-
-    def update_requests(self, requests: int):
-        with self.lock:
-            self.requests = requests
+                headers = exc.headers or {}
+                if "retry-after" in headers:
+                    # Secondary rate limit
+                    reset_time = time.time() + int(headers["retry-after"])
+                elif "x-ratelimit-reset" in headers:
+                    reset_time = int(headers["x-ratelimit-reset"])
+                else:
+                    reset_time = time.time() + self.reset_seconds
+                # The next requests wait for the reset without holding the lock
+                self.update(0, reset_time + 1)
 
 
 class SearchRateLimiter(RateLimiter):
@@ -64,11 +198,12 @@ class SearchRateLimiter(RateLimiter):
     than the core API.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         super().__init__(
             # The real limit is 30, but we try to avoid it
             requests_limit=29,
             reset_seconds=60,
+            **kwargs,
         )
 
 
@@ -77,16 +212,109 @@ class CoreRateLimiter(RateLimiter):
     Rate Limiter for the Github core API.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         super().__init__(
             # The real limit is 5000, but we try to avoid it
             requests_limit=4995,
             reset_seconds=3600,
+            **kwargs,
         )
 
 
+class GraphQLRateLimiter(RateLimiter):
+    """
+    Rate Limiter for the Github GraphQL API. Each query is counted as one request,
+    although complex queries cost more points of the GraphQL budget.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            # The real limit is 5000 points, but we try to avoid it
+            requests_limit=4995,
+            reset_seconds=3600,
+            **kwargs,
+        )
+
+
+class TokenPool:
+    """
+    Rate limiter buckets of the tokens, shared by the processes of the machine. The
+    buckets are stored in a SQLite database and updated in exclusive transactions,
+    so that the processes using the same tokens share their budget instead of each
+    one assuming it has the full rate limit.
+    """
+
+    class Bucket:
+        def __init__(
+            self,
+            state: Optional[Tuple[float, float, Optional[float], Optional[float]]],
+        ):
+            # (available, last_refill, reset_time, window_reset) of the bucket, None
+            # if new
+            self.state = state
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        # Transactions are handled explicitly to lock the database while updating
+        self.connection = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    available REAL NOT NULL,
+                    last_refill REAL NOT NULL,
+                    reset_time REAL,
+                    window_reset REAL
+                )"""
+            )
+            columns = [
+                row[1] for row in self.connection.execute("PRAGMA table_info(buckets)")
+            ]
+            # Pools created before the window reset was stored
+            if "window_reset" not in columns:
+                self.connection.execute(
+                    "ALTER TABLE buckets ADD COLUMN window_reset REAL"
+                )
+
+    @staticmethod
+    def get_key(token: str, resource: str) -> str:
+        # The tokens are not stored in the database
+        return f"{hashlib.sha256(token.encode()).hexdigest()}:{resource}"
+
+    @contextmanager
+    def bucket(self, key: str) -> Iterator["TokenPool.Bucket"]:
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    """SELECT available, last_refill, reset_time, window_reset
+                    FROM buckets WHERE key = ?""",
+                    (key,),
+                ).fetchone()
+                bucket = TokenPool.Bucket(row)
+                yield bucket
+                if bucket.state is not None:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)",
+                        (key, *bucket.state),
+                    )
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
 class GithubToken:
     __TOKENS: List["GithubToken"] = None
+    # Shared with other processes if GITHUB_TOKEN_POOL has the path of the pool
+    __POOL: Optional[TokenPool] = None
     __TOKENS_LOCK: threading.Lock = threading.Lock()
     __CURRENT_TOKEN = 0
     __OFFSET = 200
@@ -96,29 +324,97 @@ class GithubToken:
         self.lock_rate: threading.Lock = threading.Lock()
         self.last_update: float = 0
         self.token: str = token
-        self.search_rate_limiter = SearchRateLimiter()
-        self.core_rate_limiter = CoreRateLimiter()
+        self.search_rate_limiter = SearchRateLimiter(**self.__pool_args("search"))
+        self.core_rate_limiter = CoreRateLimiter(**self.__pool_args("core"))
+        self.graphql_rate_limiter = GraphQLRateLimiter(**self.__pool_args("graphql"))
         GithubToken.__TOKENS.append(self)
         self.github = GithubAPI(token=self)
 
+    def __pool_args(self, resource: str) -> Dict:
+        if GithubToken.__POOL is None:
+            return {}
+        return {
+            "pool": GithubToken.__POOL,
+            "key": TokenPool.get_key(self.token, resource),
+        }
+
     def update_rate_limit(self):
         with self.lock_rate:
             if time.time() - self.last_update > GithubToken.__UPDATE_RATE_INTERVAL:
                 rate_limit = self.github.get_rate_limit()
-                self.search_rate_limiter.update_requests(
-                    rate_limit.search.limit - rate_limit.search.remaining
+                self.search_rate_limiter.update(
+                    rate_limit.search.remaining, rate_limit.search.reset.timestamp()
                 )
-                self.core_rate_limiter.update_requests(
-                    rate_limit.core.limit - rate_limit.core.remaining
+                self.core_rate_limiter.update(
+                    rate_limit.core.remaining, rate_limit.core.reset.timestamp()
+                )
+                self.last_update = time.time()
+
+    def get_rate_limiter(self, resource: str) -> Optional[RateLimiter]:
+        return {
+            "core": self.core_rate_limiter,
+            "search": self.search_rate_limiter,
+            "graphql": self.graphql_rate_limiter,
+        }.get(resource)
+
+    def update_from_headers(self, headers: Dict[str, str], not_modified: bool = False):
+        """
+        Updates the rate limiter of the resource of a response of the API, without
+        requesting the rate limit.
+
+        Args:
+            not_modified (bool): If True, the response was a 304 (Not Modified), which
+                                 the API does not count against the rate limit.
+        """
+        rate_limiter = self.get_rate_limiter(headers.get("x-ratelimit-resource"))
+        if rate_limiter is not None and not_modified:
+            rate_limiter.refund()
+        if (
+            rate_limiter is not None
+            and "x-ratelimit-remaining" in headers
+            and "x-ratelimit-reset" in headers
+        ):
+            rate_limiter.update(
+                int(headers["x-ratelimit-remaining"]),
+                int(headers["x-ratelimit-reset"]),
+            )
+
+    @staticmethod
+    def __update_from_response(
+        request: requests.PreparedRequest, response: requests.Response
+    ):
+        authorization = request.headers.get("Authorization")
+        if authorization is None or GithubToken.__TOKENS is None:
+            return
+        # The header has the format "<type> <token>"
+        token = authorization.split(" ")[-1]
+        for github_token in GithubToken.__TOKENS:
+            if github_token.token == token:
+                github_token.update_from_headers(
+                    response.headers, getattr(response, "not_modified", False)
                 )
+                return
 
     @staticmethod
     def has_tokens() -> bool:
         return "GITHUB_ACCESS_TOKEN" in os.environ
 
+    @staticmethod
+    def count_tokens() -> int:
+        if not GithubToken.has_tokens():
+            return 0
+        return len(os.environ["GITHUB_ACCESS_TOKEN"].split(","))
+
     @staticmethod
     def init_tokens():
         if GithubToken.has_tokens():
+            if "GITHUB_TOKEN_POOL" in os.environ:
+                GithubToken.__POOL = TokenPool(os.environ["GITHUB_TOKEN_POOL"])
+            # Keeps the rate limiters of the tokens in sync with the responses
+            CachedHTTPSRequestsConnectionClass.configure(
+                os.environ.get("GITHUB_HTTP_CACHE"),
+                on_response=GithubToken.__update_from_response,
+            )
             GithubToken.__TOKENS = []
             tokens = os.environ["GITHUB_ACCESS_TOKEN"].split(",")
             for token in tokens:
@@ -127,46 +423,44 @@ class GithubToken:
             logging.error("No environment variable GITHUB_ACCESS_TOKEN provided.")
             exit(1)
 
-    @staticmethod
-    def __wait_for_tokens():
-        if len(GithubToken.__TOKENS) == 0:
-            return
-
-        soonest_reset = GithubToken.__TOKENS[0].github.get_rate_limit().core.reset
-        for token in GithubToken.__TOKENS[1:]:
-            reset = token.github.get_rate_limit().core.reset
-            if reset < soonest_reset:
-                soonest_reset = reset
-        time.sleep((datetime.now() - soonest_reset).total_seconds())
-
     @staticmethod
     def get_token() -> "GithubToken":
+        """
+        Returns the token with the most requests remaining. If every token has less
+        than the offset of requests remaining, waits until the first one is expected
+        to have them, based on the reset times returned by the API.
+        """
         with GithubToken.__TOKENS_LOCK:
             if GithubToken.__TOKENS is None:
                 GithubToken.init_tokens()
 
-            len_tokens = (
-                0 if not GithubToken.has_tokens() else len(GithubToken.__TOKENS)
-            )
-            if len_tokens == 0:
-                return None
+        len_tokens = 0 if not GithubToken.has_tokens() else len(GithubToken.__TOKENS)
+        if len_tokens == 0:
+            return None
 
-            next_tokens = (
-                GithubToken.__TOKENS[GithubToken.__CURRENT_TOKEN :]
-                + GithubToken.__TOKENS[: GithubToken.__CURRENT_TOKEN]
-            )
-            for token in next_tokens:
-                GithubToken.__CURRENT_TOKEN = (
-                    GithubToken.__CURRENT_TOKEN + 1
-                ) % len_tokens
-                if (
-                    token.core_rate_limiter.requests_limit
-                    - token.core_rate_limiter.requests
-                    >= GithubToken.__OFFSET
-                ):
-                    return token
+        while True:
+            # Read without the lock, since each read may query the token pool
+            remaining = [
+                token.core_rate_limiter.remaining for token in GithubToken.__TOKENS
+            ]
+            with GithubToken.__TOKENS_LOCK:
+                # Ties are broken in round-robin order
+                best = max(
+                    (
+                        (GithubToken.__CURRENT_TOKEN + i) % len_tokens
+                        for i in range(len_tokens)
+                    ),
+                    key=lambda i: remaining[i],
+                )
+                if remaining[best] >= GithubToken.__OFFSET:
+                    GithubToken.__CURRENT_TOKEN = (best + 1) % len_tokens
+                    return GithubToken.__TOKENS[best]
 
-            GithubToken.__wait_for_tokens()
+            available_time = min(
+                token.core_rate_limiter.get_available_time(GithubToken.__OFFSET)
+                for token in GithubToken.__TOKENS
+            )
+            time.sleep(max(available_time - time.time(), 0))
 
 
 class GithubAPI(Github):
@@ -179,7 +473,12 @@ class GithubAPI(Github):
             super().__init__(*args, **kwargs)
             return
 
-        super().__init__(*args, **kwargs)
+        if self.token is not None:
+            # Only the clients of the tokens use the connection class of http_cache
+            with CachedHTTPSRequestsConnectionClass.inject():
+                super().__init__(*args, **kwargs)
+        else:
+            super().__init__(*args, **kwargs)
         for attr, val in Github.__dict__.items():
             if attr.startswith("_") or not callable(val):
                 continue
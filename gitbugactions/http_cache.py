@@ -0,0 +1,268 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+
+from typing import Callable, Dict, Optional, Tuple
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE, DEFAULT_RETRIES
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from github.Requester import (
+    Requester,
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+)
+
+
+class HttpCache:
+    """
+    Persistent cache of the responses of the GitHub API with an ETag or a
+    Last-Modified header, used to revalidate them with conditional requests.
+    The responses which were not used for `max_age` seconds are purged.
+    """
+
+    # Number of responses stored between purges
+    __PURGE_INTERVAL = 1000
+
+    def __init__(self, path: str, max_age: float = 7 * 24 * 3600):
+        self.lock = threading.Lock()
+        self.max_age = max_age
+        self.stored = 0
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            columns = [
+                row[1]
+                for row in self.connection.execute("PRAGMA table_info(responses)")
+            ]
+            # Caches created before the responses were purged
+            if len(columns) > 0 and "used_at" not in columns:
+                self.connection.execute("DROP TABLE responses")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    headers TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    used_at REAL NOT NULL
+                )"""
+            )
+        self.purge()
+
+    def purge(self):
+        """
+        Removes the responses which were not used for `max_age` seconds
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM responses WHERE used_at < ?",
+                (time.time() - self.max_age,),
+            )
+
+    @staticmethod
+    def get_key(request: requests.PreparedRequest) -> str:
+        # The responses are shared by the tokens, which are rotated between runs
+        return hashlib.sha256(
+            "\n".join(
+                [request.method, request.url, request.headers.get("Accept", "")]
+            ).encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT headers, content FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, headers: Dict[str, str], content: bytes):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(headers), content, time.time()),
+            )
+            self.stored += 1
+            purge = self.stored % HttpCache.__PURGE_INTERVAL == 0
+        if purge:
+            self.purge()
+
+    def touch(self, key: str):
+        """
+        Marks the response as used (e.g. revalidated with a conditional request)
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    Sends the GET requests with a cached response as conditional requests. Responses
+    with the 304 (Not Modified) status, which do not count against the rate limit,
+    are replaced by the cached response. Every response is passed to on_response,
+    which reads the rate limit from its headers.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HttpCache],
+        on_response: Optional[
+            Callable[[requests.PreparedRequest, requests.Response], None]
+        ] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.on_response = on_response
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs):
+        response = self.__send(request, stream=stream, **kwargs)
+        if self.on_response is not None:
+            self.on_response(request, response)
+        return response
+
+    def __send(
+        self, request: requests.PreparedRequest, stream: bool = False, **kwargs
+    ) -> requests.Response:
+        if self.cache is None or request.method != "GET" or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = HttpCache.get_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            headers, _ = cached
+            if "etag" in headers:
+                request.headers["If-None-Match"] = headers["etag"]
+            if "last-modified" in headers:
+                request.headers["If-Modified-Since"] = headers["last-modified"]
+
+        response = super().send(request, stream=stream, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(key)
+            return self.__build_response(response, *cached)
+        elif response.status_code == 200 and (
+            "etag" in response.headers or "last-modified" in response.headers
+        ):
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            self.cache.set(key, headers, response.content)
+        return response
+
+    def __build_response(
+        self,
+        not_modified: requests.Response,
+        headers: Dict[str, str],
+        content: bytes,
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        # Keeps the current rate limit and date of the conditional request
+        response.headers.update(not_modified.headers)
+        response._content = content
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        # The API does not count the 304 responses against the rate limit
+        response.not_modified = True
+        return response
+
+
+class CachedHTTPSRequestsConnectionClass(HTTPSRequestsConnectionClass):
+    """
+    Connection of PyGithub which sends the requests through a CachingHTTPAdapter.
+    PyGithub creates a connection per request when the connection class is
+    injected, so the connections share a single session to reuse the HTTP
+    connections.
+    """
+
+    __CACHE: Optional[HttpCache] = None
+    __ON_RESPONSE: Optional[
+        Callable[[requests.PreparedRequest, requests.Response], None]
+    ] = None
+    __SESSION: Optional[requests.Session] = None
+    __SESSION_LOCK: threading.Lock = threading.Lock()
+    __INJECT_LOCK: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        host: str,
+        port: Optional[int] = None,
+        strict: bool = False,
+        timeout: Optional[int] = None,
+        retry=None,
+        pool_size: Optional[int] = None,
+        **kwargs,
+    ):
+        self.port = port if port else 443
+        self.host = host
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.retry = DEFAULT_RETRIES if retry is None else retry
+        self.pool_size = DEFAULT_POOLSIZE if pool_size is None else pool_size
+
+        cls = CachedHTTPSRequestsConnectionClass
+        with cls.__SESSION_LOCK:
+            if cls.__SESSION is None:
+                cls.__SESSION = requests.Session()
+                cls.__SESSION.auth = Requester.noopAuth
+                cls.__SESSION.mount(
+                    "https://",
+                    CachingHTTPAdapter(
+                        cls.__CACHE,
+                        cls.__ON_RESPONSE,
+                        max_retries=self.retry,
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size,
+                    ),
+                )
+        self.session = cls.__SESSION
+
+    def close(self):
+        # The session is shared by every connection
+        pass
+
+    @staticmethod
+    def configure(
+        path: Optional[str] = None,
+        on_response: Optional[
+            Callable[[requests.PreparedRequest, requests.Response], None]
+        ] = None,
+    ):
+        """
+        Caches the responses of the connections in the database at path, if
+        provided, and passes them to on_response.
+        """
+        cls = CachedHTTPSRequestsConnectionClass
+        with cls.__SESSION_LOCK:
+            cls.__CACHE = HttpCache(path) if path is not None else None
+            cls.__ON_RESPONSE = on_response
+            cls.__SESSION = None
+
+    @staticmethod
+    @contextmanager
+    def inject():
+        """
+        The Github clients created in this context send their requests through this
+        connection class. The connection class of a client is set when it is
+        created, so the clients created elsewhere are not affected.
+        """
+        cls = CachedHTTPSRequestsConnectionClass
+        with cls.__INJECT_LOCK:
+            Requester.injectConnectionClasses(HTTPRequestsConnectionClass, cls)
+            try:
+                yield
+            finally:
+                Requester.resetConnectionClasses()
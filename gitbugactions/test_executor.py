@@ -4,6 +4,7 @@ import threading
 import subprocess
 import os, copy, uuid, pygit2
 from gitbugactions.actions.actions import GitHubActions, ActTestsRun
+from gitbugactions.actions.run_cache import ActRunCache
 from gitbugactions.docker.client import DockerClient
 from pygit2 import Repository
 from typing import List
@@ -21,8 +22,16 @@ class TestExecutor:
         act_cache_dir: str,
         default_actions: GitHubActions,
         runner_image: str = "gitbugactions:latest",
+        use_cache: bool = True,
     ):
+        """
+        Args:
+            use_cache (bool, optional): If the runs can be reused from the test run cache.
+                                        Must be False to check the flakiness of the tests.
+                                        Defaults to True.
+        """
         TestExecutor.__schedule_cleanup(runner_image)
+        self.use_cache = use_cache
         self.act_cache_dir = act_cache_dir
         self.repo_clone = repo_clone
         self.runner_image = runner_image
@@ -31,6 +40,8 @@ class TestExecutor:
         # such as paths, runners, etc.
         self.default_actions = default_actions
         self.first_commit = repo_clone.revparse_single("HEAD")
+        # Patches applied to the working directory since the repo was reset
+        self.applied_patches: List[str] = []
 
     @staticmethod
     def __schedule_cleanup(runner_image):
@@ -77,6 +88,15 @@ class TestExecutor:
             cwd=self.repo_clone.workdir,
             capture_output=True,
         )
+        self.applied_patches.clear()
+
+    def apply_patch(self, patch: str):
+        """
+        Applies a patch to the working directory. Raises pygit2.GitError if the
+        patch does not apply.
+        """
+        self.repo_clone.apply(pygit2.Diff.parse_diff(patch))
+        self.applied_patches.append(patch)
 
     def run_tests(
         self, keep_containers: bool = False, offline: bool = False, timeout: int = 10
@@ -101,6 +121,24 @@ class TestExecutor:
                     os.path.basename(workflow.path),
                 )
                 test_actions.test_workflows.append(new_workflow)
+
+        # The containers are kept for inspection, so the runs are not reused
+        use_cache = self.use_cache and not keep_containers and ActRunCache.is_enabled()
+        if use_cache:
+            cache_key = ActRunCache.get_key(
+                self.repo_clone,
+                self.applied_patches,
+                test_actions.test_workflows,
+                self.runner_image,
+                offline,
+                timeout,
+            )
+            cached_runs = ActRunCache.get(cache_key, test_actions.test_workflows)
+            if cached_runs is not None:
+                for act_run in cached_runs:
+                    act_run.default_actions = default_actions
+                return cached_runs
+
         # Act creates names for the containers by hashing the content of the workflows
         # To avoid conflicts between threads, we randomize the name
         for workflow in test_actions.test_workflows:
@@ -116,5 +154,7 @@ class TestExecutor:
 
         for act_run in act_runs:
             act_run.default_actions = default_actions
+        if use_cache:
+            ActRunCache.put(cache_key, act_runs)
 
         return act_runs
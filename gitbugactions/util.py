@@ -11,6 +11,7 @@ from typing import Optional, List
 from gitbugactions.actions.actions import GitHubActions
 from gitbugactions.actions.actions import ActCacheDirManager
 from gitbugactions.test_executor import TestExecutor
+from gitbugactions.git.mirror import RepoMirrorManager
 from junitparser.junitparser import JUnitXmlError
 from enum import Enum
 
@@ -29,8 +30,22 @@ def delete_repo_clone(repo_clone: pygit2.Repository):
 
 
 def clone_repo(clone_url: str, path: str) -> pygit2.Repository:
+    """
+    Clones the repository from its local mirror (see RepoMirrorManager), so
+    that the repository is only downloaded once. If the mirror can not be
+    used, the repository is cloned directly from `clone_url`.
+    """
     retries = 3
     for r in range(retries):
+        try:
+            RepoMirrorManager.clone(clone_url, path)
+            return pygit2.Repository(path)
+        except (RuntimeError, OSError, pygit2.GitError):
+            logging.warning(
+                f"Error while cloning {clone_url} from mirror: {traceback.format_exc()}"
+            )
+            shutil.rmtree(path, ignore_errors=True)
+
         try:
             repo_clone: pygit2.Repository = pygit2.clone_repository(clone_url, path)
             return repo_clone
@@ -87,6 +87,7 @@ def run_bug(
             act_cache_dir,
             get_default_actions(diff_folder_path, repo_clone, bug["language"]),
             runner_image=image_name,
+            use_cache=False,
         )
         runs = executor.run_tests(offline=offline)
         docker_client.images.remove(image_name)
@@ -1,6 +1,8 @@
 from gitbugactions.actions.multi.junitxmlparser import JUnitXMLParser
 from gitbugactions.actions.actions import ActTestsRun
-from junitparser import Error
+from junitparser import Error, JUnitXml, JUnitXmlError, TestCase
+from junitparser.junitparser import etree
+import os
 import pytest
 
 
@@ -66,3 +68,112 @@ def test_act_tests_run(xml_file, nr_tests, nr_of_failing_tests):
     tests_run = ActTestsRun(True, tests, "", "", "", "", "", 0, False, 0)
     assert len(tests_run.failed_tests) == nr_of_failing_tests
     assert len(tests_run.tests) == nr_tests
+
+
+def get_test_results_tree(xml):
+    """Iterates over the tests of a JUnit XML file loaded with junitparser."""
+    tests = []
+    for element in xml:
+        if isinstance(element, TestCase):
+            tests.append(element)
+        elif element is not None:
+            tests.extend(get_test_results_tree(element))
+    return tests
+
+
+def get_test_data(test):
+    # The text of the results (e.g. stack traces) is not kept
+    return (
+        test.classname,
+        test.name,
+        test.time,
+        [(type(r).__name__, r.message, r.type) for r in test.result],
+        test.system_out,
+        test.system_err,
+    )
+
+
+NESTED_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testcase classname="Ignored" name="root"/>
+  <testsuite name="a">
+    <properties><property name="p" value="v"/></properties>
+    <testsuite name="b">
+      <testcase classname="B" name="first" time="0.5"/>
+    </testsuite>
+    <testcase classname="A" name="second" time="1">
+      <failure message="boom" type="AssertionError">trace</failure>
+      <system-out>out</system-out>
+    </testcase>
+    <testcase classname="A" name="third"><skipped/></testcase>
+  </testsuite>
+  <other><testsuite name="c"><testcase classname="C" name="ignored"/></testsuite></other>
+  <testsuite name="d"><testcase classname="D" name="fourth"><error message="e"/></testcase></testsuite>
+</testsuites>
+"""
+
+
+def test_same_results_as_junitparser(tmp_path):
+    """Test that streaming the reports gives the same tests as loading them."""
+    nested = tmp_path / "nested.xml"
+    nested.write_text(NESTED_REPORT)
+    files = [str(nested)]
+    for root, _, filenames in os.walk("test/resources/test_reports"):
+        files.extend(os.path.join(root, f) for f in filenames if f.endswith(".xml"))
+
+    for file in files:
+        expected = get_test_results_tree(JUnitXml.fromfile(file))
+        tests = JUnitXMLParser().get_test_results(file)
+        assert list(map(get_test_data, tests)) == list(map(get_test_data, expected))
+    assert [test.name for test in JUnitXMLParser().get_test_results(str(nested))] == [
+        "second",
+        "third",
+        "first",
+        "fourth",
+    ]
+
+
+def test_truncated_output(tmp_path, monkeypatch):
+    """Test that the output and messages of the tests are truncated."""
+    monkeypatch.setattr(JUnitXMLParser, "MAX_OUTPUT_LENGTH", 3)
+    report = tmp_path / "report.xml"
+    report.write_text(
+        '<testsuite><testcase classname="A" name="a">'
+        '<failure message="failed" type="AssertionError">trace</failure>'
+        '<error message="errored">trace</error>'
+        "<system-out>12345</system-out><system-err>abcde</system-err>"
+        "</testcase></testsuite>"
+    )
+    tests = JUnitXMLParser().get_test_results(str(report))
+    assert len(tests) == 1
+    assert tests[0].system_out == "123"
+    assert tests[0].system_err == "abc"
+    assert tests[0].results == (
+        ("Failure", "fai", "AssertionError"),
+        ("Error", "err", None),
+    )
+
+
+def test_parsed_elements_removed(tmp_path, monkeypatch):
+    """Test that the elements are removed from the document once parsed."""
+    report = tmp_path / "report.xml"
+    report.write_text(NESTED_REPORT)
+    roots = []
+    iterparse = etree.iterparse
+
+    def mock_iterparse(*args, **kwargs):
+        for event, elem in iterparse(*args, **kwargs):
+            if len(roots) == 0:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(etree, "iterparse", mock_iterparse)
+    assert len(JUnitXMLParser().get_test_results(str(report))) == 4
+    assert len(roots) == 1 and len(roots[0]) == 0
+
+
+def test_invalid_report(tmp_path):
+    report = tmp_path / "report.xml"
+    report.write_text("<report/>")
+    with pytest.raises(JUnitXmlError):
+        JUnitXMLParser().get_test_results(str(report))
@@ -0,0 +1,93 @@
+import pygit2
+import pytest
+from junitparser import TestCase, Failure, Skipped
+from gitbugactions.actions.actions import ActTestsRun
+from gitbugactions.actions.run_cache import ActRunCache
+from gitbugactions.actions.workflow import GitHubWorkflowFactory
+from test.git.test_mirror import commit_file
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path):
+    ActRunCache.set_cache_dir(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def workflow():
+    return GitHubWorkflowFactory.create_workflow(
+        "test/resources/test_workflows/java/maven_test_repo.yml", "java"
+    )
+
+
+def create_run(workflow, failed=False):
+    passed = TestCase("test_passed", "Tests", 0.5)
+    failure = TestCase("test_failure", "Tests", 1.0)
+    failure.result = [Failure("assertion failed", "AssertionError")]
+    failure.system_out = "output"
+    skipped = TestCase("test_skipped", "Tests", 0.0)
+    skipped.result = [Skipped("skip")]
+    return ActTestsRun(
+        failed,
+        [passed, failure, skipped],
+        "out",
+        "err",
+        workflow,
+        "name",
+        "maven",
+        10,
+        False,
+        1,
+    )
+
+
+def test_cache_runs(workflow):
+    run = create_run(workflow)
+    assert ActRunCache.get("key", [workflow]) is None
+
+    ActRunCache.put("key", [run])
+    runs = ActRunCache.get("key", [workflow])
+    assert len(runs) == 1
+    assert runs[0].workflow is workflow
+    assert runs[0].asdict() == run.asdict()
+    assert len(runs[0].failed_tests) == 1
+    assert runs[0].failed_tests[0].system_out == "output"
+    # The number of workflows must match
+    assert ActRunCache.get("key", [workflow, workflow]) is None
+
+
+def test_failed_runs_not_cached(workflow):
+    ActRunCache.put("key", [create_run(workflow), create_run(workflow, failed=True)])
+    assert ActRunCache.get("key", [workflow, workflow]) is None
+
+
+def test_cache_is_opt_in():
+    assert ActRunCache.is_enabled()
+    ActRunCache.set_cache_dir(None)
+    assert not ActRunCache.is_enabled()
+
+
+def test_tree_id(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "repo"))
+    commit_file(repo, "a.txt", "a")
+    head_tree = str(repo.head.peel(pygit2.Commit).tree.id)
+    assert ActRunCache.get_tree_id(repo, []) == head_tree
+
+    patch = (
+        "diff --git a/a.txt b/a.txt\n"
+        "--- a/a.txt\n"
+        "+++ b/a.txt\n"
+        "@@ -1 +1 @@\n"
+        "-a\n"
+        "+b\n"
+    )
+    patched_tree = ActRunCache.get_tree_id(repo, [patch])
+    assert patched_tree != head_tree
+    assert ActRunCache.get_tree_id(repo, [patch]) == patched_tree
+    assert ActRunCache.get_tree_id(repo, [patch, patch]) not in (
+        head_tree,
+        patched_tree,
+    )
+
+    # The tree of another commit
+    commit_file(repo, "a.txt", "b")
+    assert ActRunCache.get_tree_id(repo, []) not in (head_tree, patched_tree)
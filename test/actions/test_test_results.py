@@ -0,0 +1,68 @@
+import pickle
+from junitparser import TestCase, Failure, Error, Skipped
+from gitbugactions.actions.actions import ActTestsRun
+from gitbugactions.actions.workflow import GitHubWorkflowFactory
+from gitbugactions.actions.test_results import TestResult, TestResults
+
+
+def create_test(name, *results):
+    test = TestCase(name, "Tests", 0.5)
+    test.result = list(results)
+    test.system_out = f"{name} output"
+    return test
+
+
+def create_tests():
+    return [
+        create_test("passed"),
+        create_test("failure", Failure("assertion failed", "AssertionError")),
+        create_test("error", Error("exception", "RuntimeError")),
+        create_test("failure_error", Failure("failed"), Error("exception")),
+        create_test("skipped", Skipped("skip")),
+        create_test("failure_skipped", Failure("failed"), Skipped("skip")),
+    ]
+
+
+def test_test_result():
+    tests = create_tests()
+    for test in tests:
+        result = TestResult.from_test_case(test)
+        assert result.classname == test.classname
+        assert result.name == test.name
+        assert result.time == test.time
+        assert result.system_out == test.system_out
+        assert result.system_err == test.system_err
+        assert result.is_passed == test.is_passed
+        assert result.is_skipped == test.is_skipped
+        assert result.result == test.result
+
+
+def test_test_results():
+    results = TestResults(create_tests())
+    assert len(results) == 6
+    assert [test.name for test in results.failed] == ["failure"]
+    assert [test.name for test in results.erroring] == ["error", "failure_error"]
+    assert results[0].is_passed
+
+    restored = pickle.loads(pickle.dumps(results))
+    assert restored == results
+    assert [test.name for test in restored.failed] == ["failure"]
+
+
+def test_act_tests_run():
+    workflow = GitHubWorkflowFactory.create_workflow(
+        "test/resources/test_workflows/java/maven_test_repo.yml", "java"
+    )
+    run = ActTestsRun(False, create_tests(), "", "", workflow, "", "", 0, False, 0)
+    assert isinstance(run.tests, TestResults)
+    assert [test.name for test in run.failed_tests] == ["failure"]
+    assert [test.name for test in run.erroring_tests] == ["error", "failure_error"]
+
+    data = run.asdict()
+    assert data["tests"][1]["results"] == [
+        {"result": "Failure", "message": "assertion failed", "type": "AssertionError"}
+    ]
+    assert data["tests"][0]["results"] == [
+        {"result": "Passed", "message": "", "type": ""}
+    ]
+    assert ActTestsRun.from_dict(data, workflow).tests == run.tests
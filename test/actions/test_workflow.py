@@ -1,4 +1,4 @@
-from gitbugactions.actions.workflow import GitHubWorkflowFactory
+from gitbugactions.actions.workflow import GitHubWorkflowFactory, WorkflowCache
 from gitbugactions.actions.java.maven_workflow import MavenWorkflow
 from gitbugactions.actions.python.pytest_workflow import PytestWorkflow
 from gitbugactions.actions.go.go_workflow import GoWorkflow
@@ -236,3 +236,80 @@ def test_workflow_matrix_include_exclude(yml_file, language, expected_result):
     workflow = create_workflow(yml_file, language)
 
     assert workflow.has_matrix_include_exclude() == expected_result
+
+
+def test_workflow_cache():
+    """Test that cached workflows are not shared between workflow objects."""
+    yml_file = "test/resources/test_workflows/java/maven_test_repo.yml"
+    workflow = create_workflow(yml_file, "java")
+    workflow.doc["jobs"] = {}
+    workflow = create_workflow(yml_file, "java")
+    assert isinstance(workflow, MavenWorkflow)
+    assert len(workflow.doc["jobs"]) > 0
+    assert "on" in workflow.doc and True not in workflow.doc
+
+    cache = WorkflowCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def reference_keyword_counts(build_tool_keywords, phrases):
+    """The substring scan previously used by _identify_build_tool."""
+    aggregate_keywords = {kw for _ in build_tool_keywords.values() for kw in _}
+    keyword_counts = {keyword: 0 for keyword in aggregate_keywords}
+    for phrase in phrases:
+        if isinstance(phrase, str):
+            for name in phrase.strip().lower().split(" "):
+                for keyword in aggregate_keywords:
+                    if keyword in name:
+                        keyword_counts[keyword] += 1
+    return {
+        build_tool: sum(keyword_counts[keyword] for keyword in keywords)
+        for build_tool, keywords in build_tool_keywords.items()
+    }
+
+
+def test_build_tool_scanner():
+    """Test that the scanner counts keywords as the substring scan."""
+    scanner = GitHubWorkflowFactory.get_build_tool_scanner()
+    build_tool_keywords = {
+        build_tool: [
+            keyword
+            for keyword, weights in scanner.weights.items()
+            for _ in range(weights.get(build_tool, 0))
+        ]
+        for build_tool in scanner.build_tools
+    }
+
+    phrases = [
+        "./mvnw test",
+        "mvn -B package --file pom.xml",
+        "./gradlew build\n./gradlew check",
+        "python -m pytest && py.test",
+        "go test ./... && go vet",
+        "python -m xmlrunner discover  unittest",
+        "  MAVEN_OPTS=x mavenw   ",
+        "google django mvnwmvnw gradlewgradle",
+        "",
+        None,
+        ["mvn"],
+    ]
+    for root, _, files in os.walk("test/resources/test_workflows"):
+        for file in files:
+            doc = GitHubWorkflowFactory.create_workflow(
+                os.path.join(root, file), ""
+            ).doc
+            for job in doc.get("jobs", {}).values():
+                phrases += [step.get("run") for step in job.get("steps", [])]
+
+    for phrase in phrases:
+        assert scanner.get_counts([phrase]) == reference_keyword_counts(
+            build_tool_keywords, [phrase]
+        )
+    assert scanner.get_counts(phrases) == reference_keyword_counts(
+        build_tool_keywords, phrases
+    )
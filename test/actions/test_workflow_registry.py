@@ -0,0 +1,49 @@
+from gitbugactions.actions.workflow import GitHubWorkflowFactory
+from gitbugactions.actions.workflow_registry import WorkflowRegistry
+from gitbugactions.actions.multi.unknown_workflow import UnknownWorkflow
+
+WORKFLOW = """
+on: push
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v3
+      - run: fakebuild test
+"""
+
+
+class FakeBuildWorkflow(UnknownWorkflow):
+    def get_build_tool(self) -> str:
+        return "fakebuild"
+
+
+def test_builtin_workflows():
+    assert ("java", "maven") in [
+        (registration.language, registration.build_tool)
+        for registration in WorkflowRegistry.get_registrations()
+    ]
+    assert list(WorkflowRegistry.get_build_tool_keywords())[:5] == [
+        "maven",
+        "gradle",
+        "pytest",
+        "unittest",
+        "go",
+    ]
+    assert WorkflowRegistry.get_workflow_class("java", "unknown") is None
+
+
+def test_register_workflow():
+    workflow = GitHubWorkflowFactory.create_workflow("", "fakelang", content=WORKFLOW)
+    assert workflow.get_build_tool() == "unknown"
+
+    WorkflowRegistry.register(
+        "fakelang",
+        "fakebuild",
+        ["fakebuild"],
+        "test.actions.test_workflow_registry:FakeBuildWorkflow",
+    )
+    workflow = GitHubWorkflowFactory.create_workflow("", "fakelang", content=WORKFLOW)
+    assert isinstance(workflow, FakeBuildWorkflow)
+    workflow = GitHubWorkflowFactory.create_workflow("", "java", content=WORKFLOW)
+    assert workflow.get_build_tool() == "unknown"
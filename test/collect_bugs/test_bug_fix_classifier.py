@@ -0,0 +1,62 @@
+import random
+from nltk.tokenize import wordpunct_tokenize
+from nltk.stem import PorterStemmer
+from gitbugactions.collect_bugs.bug_fix_classifier import BugFixClassifier
+
+
+def reference_is_bug_fix(message: str) -> bool:
+    tokens = wordpunct_tokenize(message)
+    stemmer = PorterStemmer()
+    tokens = [stemmer.stem(token) for token in tokens]
+    return "fix" in tokens
+
+
+MESSAGES = [
+    "fixing bug",
+    "bug",
+    "Test test. Fixes bug",
+    "Test test. Prefix",
+    "Test test. Small fix",
+    "FIX: null pointer",
+    "Fixed #123",
+    "fix_parser",
+    "fix-parser",
+    "fixture update",
+    "Fixation of the version",
+    "fixer",
+    "fixable",
+    "fixy",
+    "hotfix",
+    "bugfix: parser",
+    "[fix] parser",
+    "fix's",
+    "fixes.",
+    "fIxEs the build\n\nCo-authored-by: someone",
+    "İfix",
+    "ﬁx ligature",
+    "fixé",
+    "fix2",
+    "",
+]
+
+
+def test_bug_fix_classifier():
+    classifier = BugFixClassifier()
+    expected = [reference_is_bug_fix(message) for message in MESSAGES]
+    assert classifier.classify(MESSAGES) == expected
+    assert any(expected) and not all(expected)
+
+
+def test_bug_fix_classifier_random():
+    rng = random.Random(0)
+    words = ["fix", "Fix", "FIX", "fixes", "fixing", "fixed", "fixture", "prefix"]
+    words += ["bug", "typo", "ing", "es", "ed", "_", "-", ".", " ", "\n", "2", "é"]
+    messages = [
+        "".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        for _ in range(2000)
+    ]
+
+    classifier = BugFixClassifier()
+    assert classifier.classify(messages) == [
+        reference_is_bug_fix(message) for message in messages
+    ]
@@ -0,0 +1,45 @@
+from unittest.mock import Mock
+from unidiff import PatchSet
+from gitbugactions.collect_bugs.bug_patch import BugPatch
+
+PATCH = """diff --git a/src/A.java b/src/A.java
+index {}..e69de29 100644
+--- a/src/A.java
++++ b/src/A.java
+@@ -1 +1 @@
+-class A {{ }}
++class A {{}}
+"""
+
+
+def create_bug_patch(repo_name, index, test_patch=""):
+    repo = Mock()
+    repo.full_name = repo_name
+    repo.language = "Java"
+    commit = Mock(id="b" * 40, message="Fix A", commit_time=1)
+    previous_commit = Mock(id="a" * 40, message="Add A", commit_time=0)
+    return BugPatch(
+        repo,
+        commit,
+        previous_commit,
+        PatchSet(PATCH.format(index)),
+        PatchSet(test_patch),
+        PatchSet(""),
+        set(),
+    )
+
+
+def test_bug_patch_digest():
+    bug_patch = create_bug_patch("gitbugactions/test", "1234567")
+    # The index lines depend on the repository, e.g. on forks
+    fork_bug_patch = create_bug_patch("fork/test", "89abcde")
+    assert bug_patch.digest == fork_bug_patch.digest
+    assert bug_patch == fork_bug_patch
+    assert len({bug_patch, fork_bug_patch}) == 1
+
+    other_bug_patch = create_bug_patch(
+        "gitbugactions/test", "1234567", test_patch=PATCH.format("1234567")
+    )
+    assert bug_patch.digest != other_bug_patch.digest
+    assert bug_patch != other_bug_patch
+    assert len({bug_patch, other_bug_patch}) == 2
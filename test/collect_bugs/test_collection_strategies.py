@@ -0,0 +1,103 @@
+from junitparser import TestCase, Failure, Error, Skipped
+from gitbugactions.actions.actions import ActTestsRun
+from gitbugactions.actions.test_results import TestResult
+from gitbugactions.collect_bugs.collection_strategies import CollectionStrategy
+
+
+def create_run(tests):
+    return ActTestsRun(False, tests, "", "", None, "", "", 0, False, 0)
+
+
+def create_test(classname, name, *results):
+    test = TestCase(name, classname)
+    test.result = list(results)
+    return test
+
+
+def reference_diff_tests(run_failed, run_passed):
+    """The nested loop previously used by _diff_tests."""
+    flat_failed_tests = sum(map(lambda act_run: act_run.failed_tests, run_failed), [])
+    flat_tests = [test for act_run in run_passed for test in act_run.tests]
+    fixed, not_fixed = [], []
+    for failed_test in flat_failed_tests:
+        for test in flat_tests:
+            if (
+                failed_test.classname == test.classname
+                and failed_test.name == test.name
+                and test.is_passed
+            ):
+                fixed.append(failed_test)
+                break
+        else:
+            not_fixed.append(failed_test)
+    return fixed, not_fixed
+
+
+def test_diff_tests():
+    run_failed = [
+        create_run(
+            [
+                create_test("A", "fixed", Failure()),
+                create_test("A", "not_fixed", Failure()),
+                create_test("A", "error", Error()),
+                create_test("B", "fixed", Failure()),
+                create_test("A", "passed"),
+            ]
+        ),
+        create_run([create_test("C", "other_run", Failure())]),
+    ]
+    run_passed = [
+        create_run(
+            [
+                create_test("A", "fixed"),
+                create_test("A", "not_fixed", Failure()),
+                create_test("A", "error"),
+                create_test("B", "fixed", Skipped()),
+            ]
+        ),
+        create_run([create_test("C", "other_run"), create_test("B", "fixed")]),
+    ]
+
+    fixed, not_fixed = CollectionStrategy._diff_tests(run_failed, run_passed)
+    assert [(t.classname, t.name) for t in fixed] == [
+        ("A", "fixed"),
+        ("B", "fixed"),
+        ("C", "other_run"),
+    ]
+    assert [(t.classname, t.name) for t in not_fixed] == [("A", "not_fixed")]
+    assert (fixed, not_fixed) == reference_diff_tests(run_failed, run_passed)
+    assert not CollectionStrategy._check_tests_were_fixed(run_failed, run_passed)
+
+
+class CountingTestResult(TestResult):
+    """Counts the reads of the classname of the test."""
+
+    reads = 0
+
+    @property
+    def classname(self):
+        CountingTestResult.reads += 1
+        return self._classname
+
+    @classname.setter
+    def classname(self, classname):
+        self._classname = classname
+
+
+def test_diff_tests_complexity():
+    """The failed tests are looked up instead of compared with every test."""
+    passed_tests = [
+        CountingTestResult(f"Class{i % 100}", f"test{i}") for i in range(20000)
+    ]
+    failed_tests = [
+        TestResult(f"Class{i % 100}", f"test{i}", results=[("Failure", None, None)])
+        for i in range(0, 20000, 40)
+    ]
+    run_failed, run_passed = [create_run(failed_tests)], [create_run(passed_tests)]
+
+    CountingTestResult.reads = 0
+    for _ in range(10):
+        fixed, not_fixed = CollectionStrategy._diff_tests(run_failed, run_passed)
+    assert len(fixed) == 500 and len(not_fixed) == 0
+    # The passed tests are indexed once, instead of once per failed test
+    assert CountingTestResult.reads == len(passed_tests)
@@ -0,0 +1,148 @@
+import os
+import pygit2
+import sqlite3
+import pytest
+from unittest.mock import Mock
+from unidiff import PatchSet
+from collect_bugs import PatchCollector
+from gitbugactions.git.mirror import RepoMirrorManager
+from gitbugactions.collect_bugs.commit_index import CommitIndex
+from test.git.test_mirror import commit_file
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path):
+    CommitIndex.set_index_dir(str(tmp_path / "index"))
+    RepoMirrorManager.set_mirrors_dir(str(tmp_path / "mirrors"))
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "origin"))
+    os.makedirs(os.path.join(repo.workdir, "src", "main", "java"))
+    commit_file(repo, "src/main/java/A.java", "class A {}")
+    return repo
+
+
+def commit_fix(
+    repo: pygit2.Repository, content: str, filename: str = "src/main/java/A.java"
+) -> str:
+    with open(os.path.join(repo.workdir, filename), "w") as f:
+        f.write(content)
+    repo.index.add(filename)
+    repo.index.write()
+    signature = pygit2.Signature("gitbugactions", "gitbugactions@example.com")
+    return str(
+        repo.create_commit(
+            "HEAD",
+            signature,
+            signature,
+            "Fix A",
+            repo.index.write_tree(),
+            [repo.head.target],
+        )
+    )
+
+
+def get_commits(origin):
+    RepoMirrorManager.update_mirror(origin.workdir, refresh=True)
+    repo = Mock()
+    repo.full_name = "gitbugactions/test"
+    repo.clone_url = origin.workdir
+    repo.language = "Java"
+    collector = PatchCollector(repo)
+    try:
+        return [patch.commit for patch in collector.get_possible_patches()]
+    finally:
+        collector.delete_repo()
+
+
+def test_commit_index():
+    bug_patch = PatchSet(
+        "diff --git a/A.java b/A.java\n"
+        "--- a/A.java\n"
+        "+++ b/A.java\n"
+        "@@ -1 +1 @@\n"
+        "-class A {}\n"
+        "+class A { }\n"
+    )
+    index = CommitIndex("gitbugactions/test")
+    index.set_is_bug_fix("a", True)
+    index.set_patches("a", bug_patch, PatchSet(""), PatchSet(""))
+    index.set_actions("a", ["actions/checkout@v3"])
+    # The entries not flushed yet are also returned
+    assert index.get_is_bug_fix("a")
+    index.close()
+
+    index = CommitIndex("gitbugactions/test")
+    assert index.get_is_bug_fix("a")
+    assert index.get_is_bug_fix("b") is None
+    assert index.get_patch_sizes("a") == (1, 0, 0)
+    assert index.get_patch_sizes("b") is None
+    patches = index.get_patches("a")
+    assert list(map(str, patches)) == [str(bug_patch), "", ""]
+    assert index.get_patches("b") is None
+    assert index.get_actions("a") == ["actions/checkout@v3"]
+    assert index.get_actions("b") is None
+    index.close()
+
+
+def test_commit_index_batches(monkeypatch):
+    monkeypatch.setattr(CommitIndex, "_CommitIndex__BATCH_SIZE", 2)
+    index = CommitIndex("gitbugactions/test")
+    index.set_is_bug_fix("a", True)
+    index.set_is_bug_fix("b", False)
+    index.set_is_bug_fix("c", True)
+
+    # The full batches are committed before the index is flushed
+    other = sqlite3.connect(CommitIndex.get_index_path("gitbugactions/test"), timeout=0)
+    assert other.execute("SELECT oid FROM commits").fetchall() == [("a",), ("b",)]
+    index.flush()
+    # Another process can write once the pending entries are committed
+    with other:
+        other.execute("INSERT INTO commits VALUES ('d', 0)")
+    other.close()
+    assert index.get_is_bug_fix("d") is False
+    index.close()
+
+
+def test_incremental_mining(origin, monkeypatch):
+    first_fix = commit_fix(origin, "class A { }")
+    commit_file(origin, "src/main/java/A.java", "class A {  }")
+    assert get_commits(origin) == [first_fix]
+
+    # Only the new commits are processed
+    mined_commits = []
+    get_patches = PatchCollector._PatchCollector__get_patches
+
+    def mock_get_patches(self, repo_clone, commit, previous_commit):
+        mined_commits.append(str(commit.id))
+        return get_patches(self, repo_clone, commit, previous_commit)
+
+    monkeypatch.setattr(
+        PatchCollector, "_PatchCollector__get_patches", mock_get_patches
+    )
+    second_fix = commit_fix(origin, "class A {}")
+
+    assert sorted(get_commits(origin)) == sorted([first_fix, second_fix])
+    assert mined_commits == [second_fix]
+
+
+def test_indexed_patches_not_parsed(origin, monkeypatch):
+    os.makedirs(os.path.join(origin.workdir, "src", "test", "java"))
+    # A fix of the tests only has no bug patch
+    commit_fix(origin, "class ATest {}", filename="src/test/java/ATest.java")
+    fix = commit_fix(origin, "class A { }")
+    assert get_commits(origin) == [fix]
+
+    # Only the patches of the commits with a bug patch are parsed
+    parsed_commits = []
+    get_patches = CommitIndex.get_patches
+
+    def mock_get_patches(self, oid):
+        parsed_commits.append(oid)
+        return get_patches(self, oid)
+
+    monkeypatch.setattr(CommitIndex, "get_patches", mock_get_patches)
+    assert get_commits(origin) == [fix]
+    assert parsed_commits == [fix]
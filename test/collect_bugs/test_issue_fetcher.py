@@ -0,0 +1,102 @@
+from unittest.mock import Mock
+from gitbugactions.collect_bugs.issue_fetcher import IssueFetcher
+
+
+def page(nodes, has_next_page=False):
+    return {"pageInfo": {"hasNextPage": has_next_page}, "nodes": nodes}
+
+
+def create_github(repository, errors=()):
+    github = Mock()
+    github.token.graphql_rate_limiter.request.side_effect = (
+        lambda fn, *args, **kwargs: fn(*args, **kwargs)
+    )
+    github.requester.requestJsonAndCheck.return_value = (
+        {},
+        {"data": {"repository": repository}, "errors": list(errors)},
+    )
+    return github
+
+
+def test_issue_fetcher():
+    repository = {
+        "issue1": {
+            "__typename": "Issue",
+            "title": "Bug",
+            "body": "",
+            "comments": page([{"body": "comment"}]),
+            "labels": page([{"name": "bug", "description": None}]),
+        },
+        "issue2": {
+            "__typename": "PullRequest",
+            "title": "Fix bug",
+            "body": "Fixes #1",
+            "comments": page([]),
+            "labels": page([]),
+            "reviewThreads": page(
+                [
+                    {"comments": page([{"databaseId": 3, "body": "third"}])},
+                    {
+                        "comments": page(
+                            [
+                                {"databaseId": 1, "body": "first"},
+                                {"databaseId": 2, "body": "second"},
+                            ]
+                        )
+                    },
+                ]
+            ),
+        },
+        "issue3": None,
+    }
+    errors = [{"type": "NOT_FOUND", "path": ["repository", "issue3"]}]
+    github = create_github(repository, errors)
+
+    issues = IssueFetcher(github, "gitbugactions/test").fetch([1, 2, 3, 2])
+    # A single query for every issue
+    assert github.requester.requestJsonAndCheck.call_count == 1
+    assert not github.get_repo.called
+    assert issues == {
+        1: {
+            "id": 1,
+            "title": "Bug",
+            "body": None,
+            "comments": ["comment"],
+            "labels": [{"name": "bug", "description": None}],
+            "is_pull_request": False,
+            "review_comments": None,
+        },
+        2: {
+            "id": 2,
+            "title": "Fix bug",
+            "body": "Fixes #1",
+            "comments": [],
+            "labels": [],
+            "is_pull_request": True,
+            "review_comments": ["first", "second", "third"],
+        },
+    }
+
+
+def test_issue_fetcher_rest_fallback():
+    repository = {
+        "issue1": {
+            "__typename": "Issue",
+            "title": "Bug",
+            "body": "Description",
+            "comments": page([{"body": "comment"}], has_next_page=True),
+            "labels": page([]),
+        },
+    }
+    github = create_github(repository)
+    issue = github.get_repo.return_value.get_issue.return_value
+    issue.pull_request = None
+    issue.title, issue.body = "Bug", "Description"
+    issue.get_comments.return_value = [Mock(body=str(i)) for i in range(101)]
+    issue.get_labels.return_value = []
+
+    issues = IssueFetcher(github, "gitbugactions/test").fetch([1])
+    # Issues with more comments than a page are fetched with the REST API
+    github.get_repo.return_value.get_issue.assert_called_once_with(1)
+    assert issues[1]["comments"] == [str(i) for i in range(101)]
+    assert issues[1]["is_pull_request"] is False
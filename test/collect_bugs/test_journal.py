@@ -0,0 +1,77 @@
+from unittest.mock import Mock
+from gitbugactions.collect_bugs.journal import (
+    CollectionJournal,
+    RepoStatus,
+    BugPatchStatus,
+)
+
+
+def create_bug_patch(commit: str):
+    bug_patch = Mock()
+    bug_patch.repo.full_name = "gitbugactions/test-repo"
+    bug_patch.commit = commit
+    bug_patch.previous_commit = commit + "~1"
+    bug_patch.strategy_used = "FAIL_PASS"
+    run = Mock(tests=[Mock(), Mock()], failed_tests=[Mock()], failed=False)
+    bug_patch.actions_runs = [[run], None, [run]]
+    return bug_patch
+
+
+def test_journal_resume(tmp_path):
+    path = str(tmp_path / "journal.db")
+    repo_name = "gitbugactions/test-repo"
+    bug_patches = [create_bug_patch("a"), create_bug_patch("b")]
+
+    journal = CollectionJournal(path)
+    assert journal.get_repo_status(repo_name) is None
+    journal.set_repo_mined(repo_name, bug_patches)
+    journal.set_bug_patch_tested(bug_patches[0], True)
+    journal.set_bug_patch_error(bug_patches[1])
+    assert not journal.finish_repo(repo_name)
+    journal.close()
+
+    # A new run resumes the state of the previous one
+    journal = CollectionJournal(path)
+    assert journal.get_repo_status(repo_name) == RepoStatus.MINED
+    assert journal.get_tested_commits(repo_name) == {"a"}
+    assert journal.get_bug_patch_statuses(repo_name) == {
+        "a": BugPatchStatus.TESTED,
+        "b": BugPatchStatus.ERROR,
+    }
+    journal.set_repo_mined(repo_name, bug_patches)
+    # Mining again does not reset the tested bug patches
+    assert journal.get_tested_commits(repo_name) == {"a"}
+
+    journal.set_bug_patch_tested(bug_patches[1], False)
+    assert journal.finish_repo(repo_name)
+    assert journal.get_repo_status(repo_name) == RepoStatus.DONE
+    journal.close()
+
+
+def test_journal_config_change(tmp_path):
+    path = str(tmp_path / "journal.db")
+    repo_name = "gitbugactions/test-repo"
+    bug_patches = [create_bug_patch("a")]
+
+    journal = CollectionJournal(path, config={"strategies": ["FAIL_PASS"]})
+    assert journal.reset
+    journal.set_repo_mined(repo_name, bug_patches, head="c")
+    journal.set_bug_patch_tested(bug_patches[0], True)
+    assert journal.finish_repo(repo_name)
+    journal.close()
+
+    # Same configuration
+    journal = CollectionJournal(path, config={"strategies": ["FAIL_PASS"]})
+    assert not journal.reset
+    assert journal.get_repo_status(repo_name) == RepoStatus.DONE
+    assert journal.get_repo_head(repo_name) == "c"
+    assert journal.get_tested_commits(repo_name) == {"a"}
+    journal.close()
+
+    # The work recorded with another configuration is discarded
+    journal = CollectionJournal(path, config={"strategies": ["PASS_PASS"]})
+    assert journal.reset
+    assert journal.get_repo_status(repo_name) is None
+    assert journal.get_repo_head(repo_name) is None
+    assert journal.get_tested_commits(repo_name) == set()
+    journal.close()
@@ -0,0 +1,40 @@
+from unittest.mock import Mock, patch
+from collect_bugs import PatchTestJobHandler
+
+
+def create_job(repository: str):
+    return {
+        "bug": {"repository": repository},
+        "actions": [],
+        "config": {
+            "normalize_non_code_patch": True,
+            "strategies": ["FAIL_PASS"],
+            "memory_limit": "7g",
+        },
+    }
+
+
+def test_repo_without_default_actions_searched_once():
+    handler = PatchTestJobHandler()
+    patch_collector = Mock(default_github_actions=None)
+    patch_collector.set_default_github_actions.side_effect = RuntimeError(
+        "has no valid default actions."
+    )
+    patch_collector.test_patch.return_value = False
+
+    with patch("collect_bugs.set_test_config"), patch(
+        "collect_bugs.Act.set_memory_limit"
+    ), patch("collect_bugs.GithubAPI"), patch(
+        "collect_bugs.PatchCollector", return_value=patch_collector
+    ), patch(
+        "collect_bugs.BugPatch.from_dict"
+    ), patch(
+        "collect_bugs.CollectionJournal.summarize_runs", return_value=[]
+    ):
+        for _ in range(2):
+            result = handler(create_job("a"))
+            assert not result["is_bug_patch"]
+
+    # The patches are tested without default actions
+    assert patch_collector.set_default_github_actions.call_count == 1
+    assert patch_collector.test_patch.call_count == 2
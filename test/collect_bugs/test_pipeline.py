@@ -0,0 +1,37 @@
+import os
+import pytest
+from unittest.mock import Mock
+from collect_bugs import CollectionPipeline
+from gitbugactions.collect_bugs.journal import CollectionJournal
+
+
+def create_patch_collector(repo_name: str):
+    patch_collector = Mock()
+    patch_collector.repo.full_name = repo_name
+    return patch_collector
+
+
+def test_unrecorded_results_are_not_overwritten(tmp_path):
+    journal = CollectionJournal(str(tmp_path / "journal.db"), config={})
+    bug_patches_path = tmp_path / "gitbugactions-test.json"
+    bug_patches_path.write_text('{"commit_hash": "a"}\n')
+    pipeline = CollectionPipeline(str(tmp_path), 1, journal=journal)
+
+    with pytest.raises(RuntimeError, match="gitbugactions/test"):
+        pipeline.run([create_patch_collector("gitbugactions/test")])
+    assert bug_patches_path.read_text() == '{"commit_hash": "a"}\n'
+    assert not os.path.exists(tmp_path / "data.json")
+    journal.close()
+
+
+def test_duplicate_patches_of_other_repos_dropped(tmp_path):
+    pipeline = CollectionPipeline(str(tmp_path), 1)
+    drop_duplicate_patches = pipeline._CollectionPipeline__drop_duplicate_patches
+    fix = Mock(digest="fix", commit="a")
+    fork_fix = Mock(digest="fix", commit="b")
+    other_fix = Mock(digest="other", commit="c")
+
+    assert drop_duplicate_patches("repo", [fix]) == [fix]
+    # The same fix in a fork is only tested in the first repo
+    assert drop_duplicate_patches("fork", [fork_fix, other_fix]) == [other_fix]
+    assert drop_duplicate_patches("repo", [fix]) == [fix]
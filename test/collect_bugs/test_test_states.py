@@ -0,0 +1,99 @@
+import time
+import pygit2
+import pytest
+import threading
+from unittest.mock import Mock
+from unidiff import PatchSet
+from collect_bugs import PatchCollector
+from gitbugactions.collect_bugs.bug_patch import BugPatch
+from test.git.test_mirror import commit_file
+
+NON_CODE_PATCH = """diff --git a/pom.xml b/pom.xml
+--- a/pom.xml
++++ b/pom.xml
+@@ -1 +1 @@
+-a
++b
+"""
+
+
+def test_run_test_state_once():
+    repo = Mock()
+    repo.language = "java"
+    collector = PatchCollector(repo)
+    calls = []
+
+    def run():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["run"]
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                collector._PatchCollector__run_test_state(("commit", ""), run)
+            )
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["run"]] * 4
+    assert collector._PatchCollector__run_test_state(("commit", ""), run) == ["run"]
+    assert collector._PatchCollector__run_test_state(("other",), run) == ["run"]
+    assert len(calls) == 2
+
+
+def test_failed_test_state_is_retried():
+    repo = Mock()
+    repo.language = "java"
+    collector = PatchCollector(repo)
+    calls = []
+
+    def run():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("docker failed")
+        return ["run"]
+
+    with pytest.raises(RuntimeError):
+        collector._PatchCollector__run_test_state(("commit", ""), run)
+    assert collector._PatchCollector__run_test_state(("commit", ""), run) == ["run"]
+    assert collector._PatchCollector__run_test_state(("commit", ""), run) == ["run"]
+    assert len(calls) == 2
+
+
+def test_get_test_states(tmp_path):
+    repo = Mock()
+    repo.language = "java"
+    repo_clone = pygit2.init_repository(str(tmp_path / "repo"))
+    commit_file(repo_clone, "a.txt", "a")
+    previous_commit = repo_clone.head.peel(pygit2.Commit)
+    commit_file(repo_clone, "b.txt", "b")
+    commit = repo_clone.head.peel(pygit2.Commit)
+
+    def create_bug_patch(bug_patch: str, non_code_patch: str):
+        return BugPatch(
+            repo,
+            commit,
+            previous_commit,
+            PatchSet(bug_patch),
+            PatchSet(""),
+            PatchSet(non_code_patch),
+            set(),
+        )
+
+    # The non code patch is only applied if the bug patch is non-empty
+    non_code_only = create_bug_patch("", NON_CODE_PATCH).get_test_states()
+    mixed = create_bug_patch(NON_CODE_PATCH, NON_CODE_PATCH).get_test_states()
+    empty = create_bug_patch("", "").get_test_states()
+
+    assert non_code_only == empty
+    assert mixed[0] != empty[0]
+    assert mixed[0][0] == empty[0][0] == str(previous_commit.id)
+    assert mixed[2] == empty[2] == (str(commit.id),)
@@ -0,0 +1,79 @@
+import os
+import pygit2
+import pytest
+from unittest.mock import Mock
+from collect_bugs import PatchCollector
+from gitbugactions.git.mirror import RepoMirrorManager
+from test.git.test_mirror import commit_file
+
+WORKFLOW = """
+on: push
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v3
+      - uses: {}
+      - run: mvn test
+"""
+
+
+@pytest.fixture(autouse=True)
+def mirrors_dir(tmp_path):
+    RepoMirrorManager.set_mirrors_dir(str(tmp_path / "mirrors"))
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "origin"))
+    os.makedirs(os.path.join(repo.workdir, ".github", "workflows"))
+    commit_file(repo, "README.md", "readme")
+    return repo
+
+
+@pytest.fixture
+def collector(origin):
+    repo = Mock()
+    repo.full_name = "gitbugactions/test"
+    repo.clone_url = origin.workdir
+    repo.language = "Java"
+    collector = PatchCollector(repo)
+    yield collector
+    collector.delete_repo()
+
+
+def get_used_actions(collector, commit):
+    return {
+        action.declaration
+        for action in collector._PatchCollector__get_used_actions(str(commit))
+    }
+
+
+def test_get_used_actions(origin, collector):
+    no_workflows = origin.head.target
+    first = commit_file(
+        origin,
+        ".github/workflows/test.yml",
+        WORKFLOW.format("actions/setup-java@v3"),
+    )
+    commit_file(origin, ".github/workflows/notes.txt", "uses: a/b@v1")
+    second = commit_file(
+        origin,
+        ".github/workflows/build.yaml",
+        WORKFLOW.format("actions/cache@v3"),
+    )
+    RepoMirrorManager.update_mirror(origin.workdir, refresh=True)
+    collector._PatchCollector__clone_repo()
+
+    assert get_used_actions(collector, no_workflows) == set()
+    assert get_used_actions(collector, first) == {
+        "actions/checkout@v3",
+        "actions/setup-java@v3",
+    }
+    assert get_used_actions(collector, second) == {
+        "actions/checkout@v3",
+        "actions/setup-java@v3",
+        "actions/cache@v3",
+    }
+    # The unchanged workflow is only parsed once
+    assert len(collector.workflow_actions) == 2
@@ -1,5 +1,6 @@
+import random
 from junitparser import TestCase
-from junitparser.junitparser import Failure, Error
+from junitparser.junitparser import Failure, Error, Skipped
 from filter_bugs import equal_test_results
 
 
@@ -69,3 +70,71 @@ def test_check_different_results():
     test_case.result = [Failure()]
     new_results = [test_case]
     assert not equal_test_results(old_results, new_results)
+
+
+def reference_equal_test_results(old_test_results, new_test_results):
+    """The nested loop previously used by equal_test_results."""
+
+    def check_test(old_test, new_test):
+        if not (
+            old_test["name"] == new_test.name
+            and old_test["classname"] == new_test.classname
+        ):
+            return False
+        if new_test.is_passed and old_test["results"][0]["result"] == "Passed":
+            return True
+        if len(old_test["results"]) != len(new_test.result):
+            return False
+        aux_new_test_result = list(new_test.result)
+        for old_result in old_test["results"]:
+            for i, new_result in enumerate(aux_new_test_result):
+                if old_result["result"] == new_result.__class__.__name__:
+                    aux_new_test_result.pop(i)
+                    break
+            else:
+                return False
+        return True
+
+    if len(old_test_results) != len(new_test_results):
+        return False
+    aux_new_test_results = list(new_test_results)
+    for old_test in old_test_results:
+        for i, new_test in enumerate(aux_new_test_results):
+            if check_test(old_test, new_test):
+                aux_new_test_results.pop(i)
+                break
+        else:
+            return False
+    return True
+
+
+def test_equal_test_results_random():
+    rng = random.Random(0)
+    results = {"Failure": Failure, "Error": Error, "Skipped": Skipped}
+
+    def random_test():
+        test_case = TestCase(rng.choice(["a", "b"]), classname=rng.choice(["A", "B"]))
+        test_case.result = [
+            results[rng.choice(list(results))]() for _ in range(rng.randint(0, 2))
+        ]
+        return test_case
+
+    def to_dict(test_case):
+        names = [result.__class__.__name__ for result in test_case.result]
+        return {
+            "classname": test_case.classname,
+            "name": test_case.name,
+            "results": [{"result": name} for name in names or ["Passed"]],
+        }
+
+    for _ in range(2000):
+        old_results = [to_dict(random_test()) for _ in range(rng.randint(0, 3))]
+        new_results = [random_test() for _ in range(rng.randint(0, 3))]
+        if rng.random() < 0.5:
+            # Same tests and results in a different order
+            new_results = [random_test() for _ in range(len(old_results))]
+            old_results = [to_dict(test) for test in new_results]
+            rng.shuffle(old_results)
+        assert equal_test_results(old_results, new_results) == (
+            reference_equal_test_results(old_results, new_results)
+        )
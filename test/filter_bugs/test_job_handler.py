@@ -0,0 +1,41 @@
+from unittest.mock import Mock, patch
+from filter_bugs import FilterBugJobHandler
+
+
+def create_job(repository: str):
+    return {
+        "bug": {"repository": repository, "clone_url": repository},
+        "export_path": "export",
+        "offline": True,
+    }
+
+
+def test_least_recently_used_repos_are_evicted(monkeypatch):
+    monkeypatch.setattr(FilterBugJobHandler, "MAX_REPOS", 2)
+    handler = FilterBugJobHandler()
+    deleted = []
+
+    def filter_bug(bug, worktrees, export_path, offline):
+        if bug["repository"] == "a" and len(deleted) == 0:
+            # "a" is not evicted while it has a running job
+            handler(create_job("b"))
+            handler(create_job("c"))
+            assert deleted == ["b"]
+        return "NON-FLAKY"
+
+    with patch("filter_bugs.clone_repo", side_effect=lambda url, path: url), patch(
+        "filter_bugs.WorktreeManager",
+        side_effect=lambda repo_clone: Mock(repo_clone=repo_clone),
+    ), patch("filter_bugs.filter_bug", side_effect=filter_bug), patch(
+        "filter_bugs.delete_repo_clone", side_effect=deleted.append
+    ):
+        assert handler(create_job("a")) == {"status": "NON-FLAKY"}
+        assert deleted == ["b"]
+        assert list(handler.worktrees) == ["a", "c"]
+
+        # Each repository is cloned once while it is kept
+        handler(create_job("a"))
+        assert list(handler.worktrees) == ["c", "a"]
+        handler(create_job("d"))
+        assert list(handler.worktrees) == ["a", "d"]
+        assert deleted == ["b", "c"]
@@ -0,0 +1,123 @@
+import os
+import shutil
+import pygit2
+import subprocess
+import pytest
+from gitbugactions.git.mirror import RepoMirrorManager
+from gitbugactions.util import clone_repo
+
+
+def commit_file(repo: pygit2.Repository, filename: str, content: str):
+    with open(os.path.join(repo.workdir, filename), "w") as f:
+        f.write(content)
+    repo.index.add(filename)
+    repo.index.write()
+    signature = pygit2.Signature("gitbugactions", "gitbugactions@example.com")
+    parents = [] if repo.head_is_unborn else [repo.head.target]
+    return repo.create_commit(
+        "HEAD",
+        signature,
+        signature,
+        f"Add {filename}",
+        repo.index.write_tree(),
+        parents,
+    )
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "origin"))
+    commit_file(repo, "a.txt", "a")
+    return repo
+
+
+@pytest.fixture(autouse=True)
+def mirrors_dir(tmp_path):
+    RepoMirrorManager.set_mirrors_dir(str(tmp_path / "mirrors"))
+
+
+def test_clone_from_mirror(tmp_path, origin):
+    clone_url = origin.workdir
+    repo_clone = clone_repo(clone_url, str(tmp_path / "clone1"))
+    mirror_path = RepoMirrorManager.get_mirror_path(clone_url)
+
+    assert os.path.exists(mirror_path)
+    assert repo_clone.head.target == origin.head.target
+    assert repo_clone.remotes["origin"].url == clone_url
+    # The clone does not reference the objects of the mirror
+    alternates = os.path.join(repo_clone.path, "objects", "info", "alternates")
+    assert not os.path.exists(alternates)
+
+    repo_clone = clone_repo(clone_url, str(tmp_path / "clone2"))
+    assert repo_clone.head.target == origin.head.target
+    assert len(os.listdir(os.path.dirname(mirror_path))) == 1
+
+
+def test_update_mirror(tmp_path, origin):
+    clone_url = origin.workdir
+    clone_repo(clone_url, str(tmp_path / "clone1"))
+    new_commit = commit_file(origin, "b.txt", "b")
+
+    # The mirror is only fetched once per process unless a refresh is requested
+    repo_clone = clone_repo(clone_url, str(tmp_path / "clone2"))
+    assert repo_clone.head.target != new_commit
+    RepoMirrorManager.update_mirror(clone_url, refresh=True)
+    repo_clone = clone_repo(clone_url, str(tmp_path / "clone3"))
+    assert repo_clone.head.target == new_commit
+
+
+def test_mirror_path_normalization():
+    assert RepoMirrorManager.get_mirror_path(
+        "https://github.com/gitbugactions/gitbugactions.git"
+    ) == RepoMirrorManager.get_mirror_path(
+        "https://github.com/gitbugactions/gitbugactions"
+    )
+
+
+def test_clone_is_self_contained(tmp_path, origin):
+    clone_url = origin.workdir
+    clone_repo(clone_url, str(tmp_path / "clone"))
+    # e.g., act copies the work tree to the container
+    shutil.copytree(str(tmp_path / "clone"), str(tmp_path / "copy"), symlinks=True)
+    shutil.rmtree(RepoMirrorManager.get_mirror_path(clone_url))
+
+    run = subprocess.run(
+        ["git", "log", "--format=%H"], cwd=str(tmp_path / "copy"), capture_output=True
+    )
+    assert run.returncode == 0
+    assert run.stdout.decode("utf-8").strip() == str(origin.head.target)
+
+
+def test_mirror_refs(tmp_path, origin):
+    # GitHub exposes the pull requests as refs/pull/*
+    origin.references.create("refs/pull/1/head", origin.head.target)
+    origin.references.create("refs/tags/v1", origin.head.target)
+    origin.branches.local.create("feature", origin.head.peel(pygit2.Commit))
+
+    mirror = pygit2.Repository(RepoMirrorManager.update_mirror(origin.workdir))
+    refs = set(mirror.references)
+    assert "refs/tags/v1" in refs
+    assert "refs/heads/feature" in refs
+    assert not any(ref.startswith("refs/pull/") for ref in refs)
+    assert mirror.references["HEAD"].target == origin.references["HEAD"].target
+
+
+def test_mirror_created_by_another_process(tmp_path, origin, monkeypatch):
+    clone_url = origin.workdir
+    mirror_path = RepoMirrorManager.get_mirror_path(clone_url)
+    rename = os.rename
+
+    def concurrent_rename(src, dst):
+        # Another process renames its mirror first
+        other_path = str(tmp_path / "other.git")
+        subprocess.run(["git", "clone", "--bare", "--quiet", clone_url, other_path])
+        rename(other_path, dst)
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", concurrent_rename)
+    assert RepoMirrorManager.update_mirror(clone_url) == mirror_path
+    monkeypatch.undo()
+
+    assert os.listdir(os.path.dirname(mirror_path)) == [os.path.basename(mirror_path)]
+    repo_clone = clone_repo(clone_url, str(tmp_path / "clone"))
+    assert repo_clone.head.target == origin.head.target
@@ -0,0 +1,71 @@
+import os
+import shutil
+import pygit2
+import subprocess
+from gitbugactions.git.worktree import WorktreeManager
+from test.git.test_mirror import commit_file
+
+
+def test_worktree_reuse(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "repo"))
+    repo.remotes.create("origin", "https://github.com/gitbugactions/test.git")
+    first_commit = commit_file(repo, "a.txt", "a")
+    commit_file(repo, "b.txt", "b")
+    worktrees = WorktreeManager(repo)
+
+    with worktrees.checkout(str(repo.head.target)) as worktree:
+        path = worktree.workdir
+        assert worktree.head.target == repo.head.target
+        # Changes made while testing a bug
+        worktree.checkout_tree(worktree.get(first_commit))
+        worktree.set_head(first_commit)
+        with open(os.path.join(path, "untracked.txt"), "w") as f:
+            f.write("untracked")
+
+    # The released worktree is cleaned up and reused
+    with worktrees.checkout(str(first_commit)) as worktree:
+        assert worktree.workdir == path
+        assert worktree.head_is_detached
+        assert worktree.head.target == first_commit
+        assert not os.path.exists(os.path.join(path, "untracked.txt"))
+        assert not os.path.exists(os.path.join(path, "b.txt"))
+        assert len(worktree.status()) == 0
+        # A second concurrent checkout creates a new worktree
+        with worktrees.checkout(str(repo.head.target)) as other_worktree:
+            assert other_worktree.workdir != path
+            assert other_worktree.head.target == repo.head.target
+
+    assert len(worktrees.worktrees) == 2
+    worktrees.cleanup()
+    assert len(worktrees.worktrees) == 0
+    assert not os.path.exists(path)
+
+
+def test_worktree_is_self_contained(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / "repo"))
+    repo.remotes.create("origin", "https://github.com/gitbugactions/test.git")
+    first_commit = commit_file(repo, "a.txt", "a")
+    commit_file(repo, "b.txt", "b")
+    # e.g., get_default_github_actions moves the HEAD of the clone
+    repo.checkout_tree(repo.get(first_commit))
+    repo.set_head(first_commit)
+    worktrees = WorktreeManager(repo)
+    with worktrees.checkout(str(first_commit)) as worktree:
+        path = worktree.workdir
+    second_commit = commit_file(repo, "c.txt", "c")
+
+    # The new commit is fetched from the repository clone
+    with worktrees.checkout(str(second_commit)) as worktree:
+        assert worktree.workdir == path
+        assert worktree.head.target == second_commit
+        assert worktree.remotes["origin"].url == repo.remotes["origin"].url
+        # act copies the work tree to the container
+        shutil.copytree(worktree.workdir, str(tmp_path / "copy"), symlinks=True)
+
+    worktrees.cleanup()
+    shutil.rmtree(str(tmp_path / "repo"))
+    run = subprocess.run(
+        ["git", "log", "--format=%H"], cwd=str(tmp_path / "copy"), capture_output=True
+    )
+    assert run.returncode == 0
+    assert run.stdout.decode("utf-8").split()[0] == str(second_commit)
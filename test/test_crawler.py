@@ -1,9 +1,23 @@
 import time
+import types
 import pytest
+import requests
+import threading
 
 from unittest import mock
+from datetime import datetime
+from requests.adapters import HTTPAdapter
 from concurrent.futures import ThreadPoolExecutor
-from gitbugactions.github_api import SearchRateLimiter, CoreRateLimiter, GithubAPI
+from gitbugactions.crawler import RepoCrawler, RepoStrategy
+from gitbugactions.github_api import (
+    SearchRateLimiter,
+    CoreRateLimiter,
+    RateLimiter,
+    TokenPool,
+    GithubAPI,
+    GithubToken,
+)
+from gitbugactions.http_cache import CachedHTTPSRequestsConnectionClass
 
 
 def test_rate_limiter():
@@ -21,6 +35,74 @@ def test_rate_limiter():
         assert rate_limiter.requests == 2
 
 
+class FakeClock:
+    """
+    Clock of the rate limiters which is only advanced by their sleeps. The sleeps
+    block while `resume` is not set.
+    """
+
+    def __init__(self):
+        self.now = time.time()
+        self.sleeps = []
+        self.lock = threading.Lock()
+        self.resume = threading.Event()
+        self.resume.set()
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        with self.lock:
+            self.sleeps.append(seconds)
+        self.resume.wait()
+        with self.lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(
+        "gitbugactions.github_api.time",
+        types.SimpleNamespace(time=clock.time, sleep=clock.sleep),
+    )
+    return clock
+
+
+def test_token_bucket(clock):
+    rate_limiter = RateLimiter(requests_limit=2, reset_seconds=1)
+    assert rate_limiter.try_acquire()
+    assert rate_limiter.try_acquire()
+    assert not rate_limiter.try_acquire()
+
+    clock.resume.clear()
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = [executor.submit(rate_limiter.request, clock.time) for _ in range(2)]
+    while len(clock.sleeps) < 2:
+        time.sleep(0.01)
+    # The waiting requests do not hold the lock
+    assert not rate_limiter.lock.locked()
+    assert rate_limiter.try_acquire() is False
+    clock.resume.set()
+    for future in futures:
+        future.result()
+    # The bucket is refilled with 2 requests per second
+    assert sorted(clock.sleeps) == pytest.approx([0.5, 1])
+
+
+def test_rate_limiter_update(clock):
+    rate_limiter = RateLimiter(requests_limit=100, reset_seconds=3600)
+    rate_limiter.update(10, clock.time() + 3600)
+    assert rate_limiter.remaining == 10
+
+    # No requests are made until the reset reported by the API
+    rate_limiter.update(0, clock.time() + 0.5)
+    assert not rate_limiter.try_acquire()
+    rate_limiter.request(lambda: None)
+    assert clock.sleeps == pytest.approx([0.5])
+    assert rate_limiter.remaining == 99
+
+
 @pytest.mark.first
 def test_github_api():
     with mock.patch("github.Github.get_emojis") as get_emojis:
@@ -36,3 +118,221 @@ def test_github_api():
         github.search_repositories("test")
         assert search_repositories.call_count == 2
         assert github.token.search_rate_limiter.requests == 2
+
+
+class FakeSearch:
+    """Search results with 500 repos per day of the created range"""
+
+    def __init__(self, query):
+        created = query.split("created:")[1]
+        start, end = map(datetime.fromisoformat, created.split(".."))
+        self.repos = [
+            f"{created}/{i}" for i in range(int((end - start).total_seconds() / 172.8))
+        ]
+        self.totalCount = len(self.repos)
+
+    def get_page(self, page):
+        return self.repos[page * 100 : (page + 1) * 100]
+
+
+class CollectRepos(RepoStrategy):
+    def __init__(self):
+        self.repos = []
+        self.lock = threading.Lock()
+
+    def handle_repo(self, repo):
+        with self.lock:
+            self.repos.append(repo)
+
+
+def test_crawler_splits_windows():
+    github = mock.MagicMock()
+    github.search_repositories.side_effect = FakeSearch
+    github.token.search_rate_limiter.request.side_effect = lambda fn, *args: fn(*args)
+    with mock.patch("gitbugactions.crawler.GithubAPI", return_value=github):
+        crawler = RepoCrawler(
+            "language:Java created:2020-01-01..2020-01-06",
+            pagination_freq="W",
+            n_search_workers=4,
+        )
+        strategy = CollectRepos()
+        crawler.get_repos(strategy)
+
+    queries = [call.args[0] for call in github.search_repositories.call_args_list]
+    searches = [FakeSearch(query) for query in queries]
+    # The weekly windows with more than 1000 results are split until they fit
+    assert any(search.totalCount > 1000 for search in searches)
+    windows = [search.repos for search in searches if search.totalCount <= 1000]
+    assert len(windows) > 2
+    assert sorted(strategy.repos) == sorted(sum(windows, []))
+    assert len(strategy.repos) > 2990
+
+
+def test_crawler_merges_sparse_windows():
+    github = mock.MagicMock()
+    github.search_repositories.side_effect = FakeSearch
+    github.token.search_rate_limiter.request.side_effect = lambda fn, *args: fn(*args)
+    with mock.patch("gitbugactions.crawler.GithubAPI", return_value=github):
+        crawler = RepoCrawler(
+            "language:Java created:2020-01-01..2020-01-06", pagination_freq="h"
+        )
+        strategy = CollectRepos()
+        crawler.get_repos(strategy)
+
+    queries = [call.args[0] for call in github.search_repositories.call_args_list]
+    searches = [FakeSearch(query) for query in queries]
+    # The hourly windows are searched together while they fit in the limit
+    assert len(queries) < 20
+    windows = [search.repos for search in searches if search.totalCount <= 1000]
+    assert sorted(strategy.repos) == sorted(sum(windows, []))
+    assert len(strategy.repos) > 2990
+
+
+def test_crawler_auto_pagination():
+    github = mock.MagicMock()
+    github.search_repositories.side_effect = FakeSearch
+    github.token.search_rate_limiter.request.side_effect = lambda fn, *args: fn(*args)
+    with mock.patch("gitbugactions.crawler.GithubAPI", return_value=github):
+        crawler = RepoCrawler(
+            "language:Java created:2020-01-01..2020-01-06",
+            pagination_freq=RepoCrawler.AUTO_PAGINATION,
+        )
+        strategy = CollectRepos()
+        crawler.get_repos(strategy)
+
+    queries = [call.args[0] for call in github.search_repositories.call_args_list]
+    # The range with 3000 results is split in 3 windows with 1000 results
+    assert queries == [
+        "language:Java created:2020-01-01T00:00:00..2020-01-06T23:59:59",
+        "language:Java created:2020-01-01T00:00:00..2020-01-02T23:59:59",
+        "language:Java created:2020-01-03T00:00:00..2020-01-04T23:59:59",
+        "language:Java created:2020-01-05T00:00:00..2020-01-06T23:59:59",
+    ]
+    assert len(strategy.repos) == 2997
+
+
+def test_token_pool(tmp_path):
+    path = str(tmp_path / "tokens.db")
+    key = TokenPool.get_key("token", "search")
+    # Rate limiters of different processes using the same token
+    rate_limiters = [
+        RateLimiter(requests_limit=4, reset_seconds=3600, pool=TokenPool(path), key=key)
+        for _ in range(2)
+    ]
+    assert rate_limiters[0].try_acquire()
+    assert rate_limiters[1].try_acquire()
+    assert rate_limiters[0].remaining == 2
+    assert rate_limiters[1].remaining == 2
+
+    rate_limiters[0].update(0, time.time() + 3600)
+    assert not rate_limiters[1].try_acquire()
+
+    other = RateLimiter(
+        requests_limit=4,
+        reset_seconds=3600,
+        pool=TokenPool(path),
+        key=TokenPool.get_key("other", "search"),
+    )
+    assert other.remaining == 4
+
+
+def test_token_pool_window_reset(tmp_path):
+    path = str(tmp_path / "tokens.db")
+    key = TokenPool.get_key("token", "core")
+    rate_limiters = [
+        RateLimiter(requests_limit=4, reset_seconds=3600, pool=TokenPool(path), key=key)
+        for _ in range(2)
+    ]
+    # The window reported to one process is reset in the other
+    rate_limiters[0].update(1, time.time() + 0.5)
+    assert rate_limiters[1].remaining == 1
+    time.sleep(0.6)
+    assert rate_limiters[1].remaining == 4
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    monkeypatch.setenv("GITHUB_ACCESS_TOKEN", "token1,token2,token3")
+    monkeypatch.delenv("GITHUB_TOKEN_POOL", raising=False)
+    monkeypatch.setattr(GithubToken, "_GithubToken__TOKENS", None)
+    GithubToken.get_token()
+    monkeypatch.setattr(GithubToken, "_GithubToken__CURRENT_TOKEN", 0)
+    yield GithubToken._GithubToken__TOKENS
+    CachedHTTPSRequestsConnectionClass.configure()
+
+
+def test_rate_limit_from_responses(tokens):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {
+                "content-type": "application/json",
+                "x-ratelimit-resource": "core",
+                "x-ratelimit-remaining": "300",
+                "x-ratelimit-reset": str(int(time.time()) + 3600),
+            }
+        )
+        response._content = b'{"full_name": "gitbugactions/test"}'
+        response.request = request
+        response.url = request.url
+        return response
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        GithubAPI(token=tokens[1]).get_repo("gitbugactions/test")
+    # Only the rate limiter of the token of the request is updated
+    assert tokens[1].core_rate_limiter.remaining == 300
+    assert tokens[0].core_rate_limiter.remaining > 4000
+
+
+def test_not_modified_response_refunded(tokens, clock):
+    rate_limiter = tokens[0].core_rate_limiter
+    rate_limiter.request(lambda: None)
+    rate_limiter.request(lambda: None)
+    reset = str(int(clock.time()) + 3600)
+    headers = {"x-ratelimit-resource": "core", "x-ratelimit-reset": reset}
+    # The 304 responses are not counted by the API
+    tokens[0].update_from_headers(
+        dict(headers, **{"x-ratelimit-remaining": "4995"}), not_modified=True
+    )
+    assert rate_limiter.remaining == 4994
+    tokens[0].update_from_headers(dict(headers, **{"x-ratelimit-remaining": "4990"}))
+    assert rate_limiter.remaining == 4990
+
+
+def test_get_token_least_loaded(tokens):
+    # Equally loaded tokens are returned in round-robin order
+    assert [GithubToken.get_token() for _ in range(4)] == tokens + tokens[:1]
+
+    now = time.time()
+    tokens[0].core_rate_limiter.update(3000, now + 3600)
+    tokens[1].core_rate_limiter.update(4000, now + 3600)
+    tokens[2].core_rate_limiter.update(100, now + 3600)
+    assert GithubToken.get_token() == tokens[1]
+
+
+def test_get_token_waits_for_reset(tokens, clock):
+    now = clock.time()
+    tokens[0].core_rate_limiter.update(0, now + 3600)
+    tokens[1].core_rate_limiter.update(10, now + 0.5)
+    tokens[2].core_rate_limiter.update(0, now + 3600)
+    # Waits until the window of the second token is reset
+    assert GithubToken.get_token() == tokens[1]
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_get_token_waits_without_lock(tokens, clock):
+    now = clock.time()
+    for token in tokens:
+        token.core_rate_limiter.update(0, now + 3600)
+    clock.resume.clear()
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(GithubToken.get_token)
+    while len(clock.sleeps) == 0:
+        time.sleep(0.01)
+    # The waiting caller does not block the other callers
+    assert not GithubToken._GithubToken__TOKENS_LOCK.locked()
+    clock.resume.set()
+    # Sleeps until the reset of the first token, instead of polling
+    assert future.result() == tokens[0]
+    assert clock.sleeps == pytest.approx([3600])
@@ -0,0 +1,122 @@
+import sys
+import time
+import subprocess
+import threading
+from gitbugactions.distributed import (
+    JobWorker,
+    JobQueueServer,
+    LocalJobQueue,
+    RemoteJobQueue,
+)
+
+
+def run_jobs(job_queue, coordinator_queue, n_jobs: int):
+    def square(job):
+        if job["value"] < 0:
+            raise ValueError("negative value")
+        return {"square": job["value"] ** 2}
+
+    worker = JobWorker(job_queue, {"square": square}, n_workers=2)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+
+    for i in range(-1, n_jobs - 1):
+        coordinator_queue.put_job({"id": str(i), "type": "square", "value": i})
+
+    results = {}
+    for _ in range(n_jobs):
+        result = coordinator_queue.get_result(timeout=10)
+        assert result is not None
+        results[result["id"]] = result
+
+    worker.stop()
+    thread.join()
+    return results
+
+
+def test_local_job_queue():
+    job_queue = LocalJobQueue()
+    results = run_jobs(job_queue, job_queue, 10)
+
+    assert len(results) == 10
+    assert "error" in results["-1"]
+    for i in range(9):
+        assert results[str(i)]["result"] == {"square": i**2}
+    assert job_queue.get_result(timeout=0.1) is None
+
+
+def test_remote_job_queue():
+    server = JobQueueServer(("127.0.0.1", 0), b"test")
+    try:
+        remote_queue = RemoteJobQueue(server.address, b"test")
+        results = run_jobs(remote_queue, server, 5)
+        assert len(results) == 5
+        assert results["3"]["result"] == {"square": 9}
+        assert "error" in results["-1"]
+    finally:
+        server.shutdown()
+
+
+def start_dying_worker(server: JobQueueServer) -> subprocess.Popen:
+    """
+    Starts a worker process which never finishes its jobs
+    """
+    script = f"""
+import time
+from gitbugactions.distributed import JobWorker, RemoteJobQueue
+
+job_queue = RemoteJobQueue({server.address!r}, b"test", heartbeat_interval=0.1)
+JobWorker(job_queue, {{"square": lambda job: time.sleep(3600)}}).run()
+"""
+    return subprocess.Popen([sys.executable, "-c", script])
+
+
+def test_killed_worker_job_is_requeued():
+    server = JobQueueServer(("127.0.0.1", 0), b"test", lease_timeout=1)
+    try:
+        server.put_job({"id": "0", "type": "square", "value": 3})
+        dying_worker = start_dying_worker(server)
+        # Wait until the job is handed out to the worker
+        while len(server.leases) == 0:
+            assert dying_worker.poll() is None
+            time.sleep(0.1)
+        # The heartbeats keep the lease of the running job alive
+        time.sleep(2)
+        assert len(server.leases) == 1
+        assert server.get_result(timeout=0.1) is None
+        dying_worker.kill()
+        dying_worker.wait()
+
+        remote_queue = RemoteJobQueue(server.address, b"test")
+        worker = JobWorker(remote_queue, {"square": lambda job: job["value"] ** 2})
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        try:
+            result = server.get_result(timeout=10)
+        finally:
+            worker.stop()
+            thread.join()
+        assert result == {"id": "0", "type": "square", "result": 9}
+        assert len(server.leases) == 0
+    finally:
+        server.shutdown()
+
+
+def test_killed_worker_job_fails_after_max_attempts():
+    server = JobQueueServer(("127.0.0.1", 0), b"test", lease_timeout=1, max_attempts=1)
+    try:
+        server.put_job({"id": "0", "type": "square", "value": 3})
+        dying_worker = start_dying_worker(server)
+        while len(server.leases) == 0:
+            assert dying_worker.poll() is None
+            time.sleep(0.1)
+        dying_worker.kill()
+        dying_worker.wait()
+
+        result = server.get_result(timeout=10)
+        assert result is not None
+        assert result["id"] == "0"
+        assert "error" in result
+        assert server.get_job(timeout=0.1) is None
+    finally:
+        server.shutdown()
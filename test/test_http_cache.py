@@ -0,0 +1,120 @@
+import time
+import requests
+from unittest import mock
+from github import Github
+from requests.adapters import HTTPAdapter
+from gitbugactions.http_cache import (
+    HttpCache,
+    CachingHTTPAdapter,
+    CachedHTTPSRequestsConnectionClass,
+)
+
+
+def create_response(request, status, headers, content=b""):
+    response = requests.Response()
+    response.status_code = status
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response._content = content
+    response.request = request
+    response.url = request.url
+    return response
+
+
+def test_caching_adapter(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.db"))
+    session = requests.Session()
+    responses = []
+    on_response = lambda request, response: responses.append(response)
+    session.mount("https://", CachingHTTPAdapter(cache, on_response))
+    requests_headers = []
+
+    def send(self, request, **kwargs):
+        requests_headers.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return create_response(request, 304, {"x-ratelimit-remaining": "4999"})
+        return create_response(
+            request,
+            200,
+            {"etag": '"v1"', "x-ratelimit-remaining": "4998"},
+            b'{"full_name": "gitbugactions/test"}',
+        )
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        url = "https://api.github.com/repos/gitbugactions/test"
+        first = session.get(url, headers={"Authorization": "token a"})
+        second = session.get(url, headers={"Authorization": "token a"})
+        # Responses are shared by the tokens
+        other_token = session.get(url, headers={"Authorization": "token b"})
+
+    assert "If-None-Match" not in requests_headers[0]
+    assert requests_headers[1]["If-None-Match"] == '"v1"'
+    assert requests_headers[2]["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.not_modified
+    assert not hasattr(first, "not_modified")
+    assert second.json() == first.json() == {"full_name": "gitbugactions/test"}
+    # The rate limit is the one of the conditional request
+    assert second.headers["x-ratelimit-remaining"] == "4999"
+    assert second.headers["etag"] == '"v1"'
+    assert other_token.json() == first.json()
+    # The rate limit of every response is reported
+    assert [response.headers["x-ratelimit-remaining"] for response in responses] == [
+        "4998",
+        "4999",
+        "4999",
+    ]
+
+
+def test_cached_github(tmp_path):
+    sent = []
+
+    def send(self, request, **kwargs):
+        sent.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return create_response(request, 304, {})
+        return create_response(
+            request,
+            200,
+            {"etag": '"v1"', "content-type": "application/json; charset=utf-8"},
+            b'{"full_name": "gitbugactions/test", "url": "https://api.github.com"}',
+        )
+
+    CachedHTTPSRequestsConnectionClass.configure(str(tmp_path / "cache.db"))
+    try:
+        with CachedHTTPSRequestsConnectionClass.inject():
+            github = Github(login_or_token="token")
+        # Only the clients created while the connection class is injected use it
+        other_github = Github(login_or_token="token")
+        with mock.patch.object(HTTPAdapter, "send", send):
+            assert github.get_repo("gitbugactions/test").full_name == (
+                "gitbugactions/test"
+            )
+            assert github.get_repo("gitbugactions/test").full_name == (
+                "gitbugactions/test"
+            )
+            other_github.get_repo("gitbugactions/test")
+    finally:
+        CachedHTTPSRequestsConnectionClass.configure()
+    # The request of the other client is not conditional
+    assert sent == [None, '"v1"', None]
+
+
+def test_unused_responses_purged(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    cache = HttpCache(path, max_age=60)
+    cache.set("old", {"etag": '"v1"'}, b"old")
+    cache.set("used", {"etag": '"v1"'}, b"used")
+    cache.close()
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 40)
+    cache = HttpCache(path, max_age=60)
+    cache.touch("used")
+    cache.close()
+
+    # The responses not used in the last 60 seconds are removed
+    monkeypatch.setattr(time, "time", lambda: now + 80)
+    cache = HttpCache(path, max_age=60)
+    assert cache.get("old") is None
+    assert cache.get("used") == ({"etag": '"v1"'}, b"used")
+    cache.close()
@@ -0,0 +1,49 @@
+import sys
+import fire
+import logging
+
+from gitbugactions.actions.actions import ActCacheDirManager
+from gitbugactions.distributed import (
+    JobWorker,
+    RemoteJobQueue,
+    parse_address,
+    get_authkey,
+)
+from collect_bugs import PatchTestJobHandler
+from filter_bugs import FilterBugJobHandler
+
+
+def worker(coordinator_address: str, n_workers: int = 1):
+    """Runs the jobs dispatched by a collect_bugs or filter_bugs coordinator.
+
+    Args:
+        coordinator_address (str): Address (host:port) of the coordinator.
+        n_workers (int, optional): Number of parallel workers. Defaults to 1.
+    """
+    ActCacheDirManager.init_act_cache_dirs(n_dirs=n_workers)
+    job_queue = RemoteJobQueue(parse_address(coordinator_address), get_authkey())
+    logging.info(f"Connected to coordinator {coordinator_address}")
+
+    patch_test_handler = PatchTestJobHandler()
+    filter_bug_handler = FilterBugJobHandler()
+    try:
+        JobWorker(
+            job_queue,
+            {
+                "test_patch": patch_test_handler,
+                "filter_bug": filter_bug_handler,
+            },
+            n_workers,
+        ).run()
+    finally:
+        job_queue.close()
+        patch_test_handler.cleanup()
+        filter_bug_handler.cleanup()
+
+
+def main():
+    fire.Fire(worker)
+
+
+if __name__ == "__main__":
+    sys.exit(main())